@@ -1,15 +1,21 @@
 import streamlit as st
-from document_management import upload_documents, fetch_documents
-from process import process_documents  # Import the process function
-import supabase
-from kyc import know_your_customer
-from see_user_docs import see_user_documents
 from database import supabase_client
-from easy_kyc import easy_kyc
+from cache import cached_read, read_cache
+import metrics
+import job_queue
+
+# Page modules are imported in the branch that shows them, so opening one page
+# never pays for the OCR, PDF and LLM libraries another page needs.
 
 # Page configuration
 st.set_page_config(page_title="GenAI-KYC", layout="wide")
 
+# Serves /metrics for Prometheus when METRICS_PORT is set; only the first run starts it
+metrics.start_metrics_server()
+
+# Background workers extract uploaded documents; only the first run starts them
+job_queue.start_workers()
+
 # Custom CSS for button styling
 st.markdown(
     """
@@ -49,6 +55,7 @@ def get_logged_in_user():
     """Fetch the logged-in user's details from session state."""
     return st.session_state.get("username")
 
+@cached_read("admin", ttl=300)
 def is_admin(username):
     """Check if the user exists in the 'admin' table."""
     if username:
@@ -89,6 +96,20 @@ else:
         if st.sidebar.button("Easy KYC", use_container_width=True):
             st.session_state["page"] = "KYC"
 
+    if is_admin_user:
+        with st.sidebar.expander("Read cache"):
+            stats = read_cache.stats()
+            st.write(f"{stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%}), {stats['entries']} entries")
+
+        with st.sidebar.expander("Extraction jobs"):
+            counts = job_queue.job_queue.counts()
+            st.write(", ".join(f"{counts[status]} {status}" for status in job_queue.STATUSES))
+
+        if st.sidebar.checkbox("Show timings"):
+            st.sidebar.dataframe(metrics.stage_summary(), hide_index=True, use_container_width=True)
+            with st.sidebar.expander("Recent spans"):
+                st.dataframe(metrics.recent_spans(), hide_index=True)
+
     if st.sidebar.button("Logout", use_container_width=True):
         st.session_state["user_logged_in"] = False
         st.session_state["username"] = None
@@ -109,16 +130,21 @@ elif st.session_state["page"] == "signup":
     sign_up()
 
 elif st.session_state["page"] == "upload_documents":
+    from document_management import upload_documents
     upload_documents()
 
 elif st.session_state["page"] == "fetch_documents":
+    from document_management import fetch_documents
     fetch_documents()
 
 elif st.session_state["page"] == "see_user_documents":
+    from see_user_docs import see_user_documents
     see_user_documents()
 
 elif st.session_state["page"] == "know_your_customer":
+    from kyc import know_your_customer
     know_your_customer()
 
 elif st.session_state["page"] == "KYC":
+    from easy_kyc import easy_kyc
     easy_kyc()
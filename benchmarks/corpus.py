@@ -0,0 +1,185 @@
+"""Synthetic KYC documents for the benchmarks.
+
+Every document is generated from a seed, so a corpus can be rebuilt
+byte-for-byte on another machine instead of being checked in:
+
+    python benchmarks/corpus.py /tmp/kyc-corpus
+"""
+import argparse
+import csv
+import os
+import random
+import pymupdf
+from PIL import Image
+
+FIRST_NAMES = ["Asha", "Ravi", "Maria", "John", "Wei", "Fatima", "Carlos", "Elena", "Kofi", "Yuki"]
+LAST_NAMES = ["Sharma", "Kumar", "Garcia", "Smith", "Chen", "Khan", "Silva", "Petrova", "Mensah", "Sato"]
+STREETS = ["MG Road", "Main Street", "Park Avenue", "Station Road", "Lake View", "Hill Crest"]
+CITIES = ["Bengaluru", "Mumbai", "London", "Toronto", "Singapore", "Nairobi"]
+
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842  # A4 in points
+CARD_WIDTH, CARD_HEIGHT = 243, 153  # ID-1 card in points (85.6 x 54 mm)
+
+
+def kyc_lines(rng, page_number=0):
+    """Lines of text resembling one page of an identity or address proof."""
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    lines = [
+        f"Page {page_number + 1} - Know Your Customer record",
+        f"Name: {name}",
+        f"Date of Birth: {rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/{rng.randint(1950, 2005)}",
+        f"Address: {rng.randint(1, 999)} {rng.choice(STREETS)}, {rng.choice(CITIES)} {rng.randint(100000, 999999)}",
+        f"Phone: +91 {rng.randint(7000000000, 9999999999)}",
+        f"Document Number: {rng.choice('ABCDEFGHJK')}{rng.randint(1000000, 9999999)}",
+    ]
+    # Filler paragraphs so pages carry a realistic amount of text
+    for _ in range(rng.randint(10, 25)):
+        lines.append(" ".join(rng.choice(FIRST_NAMES + LAST_NAMES + STREETS + CITIES) for _ in range(8)))
+    return lines
+
+
+def _text_page(doc, lines):
+    page = doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+    page.insert_text((50, 60), "\n".join(lines), fontsize=11)
+    return page
+
+
+def _scanned_page(doc, lines, dpi):
+    # Render a text page to pixels and place only the picture, like a scanner would
+    with pymupdf.open() as scratch:
+        pixmap = _text_page(scratch, lines).get_pixmap(dpi=dpi, colorspace=pymupdf.csGRAY)
+    page = doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+    page.insert_image(page.rect, stream=pixmap.tobytes("png"))
+    return page
+
+
+def make_pdf(path, kinds, seed=0, dpi=150):
+    """Writes a PDF with one page per entry of kinds ('digital' or 'scanned')."""
+    rng = random.Random(seed)
+    with pymupdf.open() as doc:
+        for page_number, kind in enumerate(kinds):
+            lines = kyc_lines(rng, page_number)
+            if kind == "digital":
+                _text_page(doc, lines)
+            else:
+                _scanned_page(doc, lines, dpi)
+        doc.save(path, garbage=3, deflate=True)
+    return path
+
+
+def make_image(path, seed=0, dpi=150):
+    """Writes a photographed-document style image (PNG or JPEG, by extension)."""
+    rng = random.Random(seed)
+    with pymupdf.open() as scratch:
+        pixmap = _text_page(scratch, kyc_lines(rng)).get_pixmap(dpi=dpi)
+    if path.lower().endswith((".jpg", ".jpeg")):
+        pixmap.save(path, jpg_quality=85)
+    else:
+        pixmap.save(path)
+    return path
+
+
+def card_image(seed=0, dpi=200):
+    """A small ID card holding the first few KYC lines, as a grayscale PIL image."""
+    lines = kyc_lines(random.Random(seed))[1:6]
+    with pymupdf.open() as doc:
+        page = doc.new_page(width=CARD_WIDTH, height=CARD_HEIGHT)
+        page.insert_text((12, 24), "\n".join(lines), fontsize=8)
+        pix = page.get_pixmap(dpi=dpi, colorspace=pymupdf.csGRAY)
+    return Image.frombytes("L", (pix.width, pix.height), pix.samples)
+
+
+def make_card(path, seed=0, dpi=200):
+    """Writes an ID card image (PNG or JPEG, by extension)."""
+    card_image(seed, dpi).save(path, quality=85)
+    return path
+
+
+def make_text(path, seed=0, rows=50):
+    """Writes KYC records as CSV or plain text, by extension."""
+    rng = random.Random(seed)
+    records = [kyc_lines(rng)[1:6] for _ in range(rows)]
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        if path.lower().endswith(".csv"):
+            writer = csv.writer(f)
+            writer.writerow([line.split(":", 1)[0] for line in records[0]])
+            for record in records:
+                writer.writerow([line.split(":", 1)[1].strip() for line in record])
+        else:
+            f.write("\n\n".join("\n".join(record) for record in records))
+    return path
+
+
+def pdf_lines(kinds, seed=0):
+    """The text lines of each page of make_pdf(path, kinds, seed), for scoring OCR output."""
+    rng = random.Random(seed)
+    return [kyc_lines(rng, page_number) for page_number in range(len(kinds))]
+
+
+def image_lines(seed=0):
+    """The text lines of make_image(path, seed)."""
+    return kyc_lines(random.Random(seed))
+
+
+# name -> page kinds of each PDF in the default corpus
+PDF_LAYOUTS = {
+    "digital": ["digital"] * 4,
+    "scanned": ["scanned"] * 4,
+    "mixed": ["digital", "scanned", "digital", "scanned"],
+}
+
+
+# (extension, DPI) of the ID card images in the default corpus
+CARD_FORMATS = [("png", 150), ("png", 300), ("jpg", 300), ("jpg", 600)]
+
+
+def build_corpus(directory, copies=3, images=3, dpi=150, cards=None, texts=None):
+    """Generates the default corpus in directory. Returns a list of (file class, path).
+
+    Files that already exist are reused, so repeated runs measure the same
+    bytes. cards and texts default to copies.
+    """
+    cards = copies if cards is None else cards
+    texts = copies if texts is None else texts
+    os.makedirs(directory, exist_ok=True)
+    corpus = []
+
+    def add(file_class, name, make):
+        path = os.path.join(directory, name)
+        if not os.path.exists(path):
+            make(path)
+        corpus.append((file_class, path))
+
+    for kind, layout in PDF_LAYOUTS.items():
+        for copy in range(copies):
+            add(f"pdf-{kind}", f"{kind}_{copy}.pdf", lambda path: make_pdf(path, layout, seed=copy, dpi=dpi))
+    for copy in range(images):
+        for extension in ("png", "jpg"):
+            add(f"image-{extension}", f"image_{copy}.{extension}", lambda path: make_image(path, seed=copy, dpi=dpi))
+    for copy in range(cards):
+        for extension, card_dpi in CARD_FORMATS:
+            add(
+                f"card-{extension}-{card_dpi}",
+                f"card_{card_dpi}_{copy}.{extension}",
+                lambda path: make_card(path, seed=copy, dpi=card_dpi),
+            )
+    for copy in range(texts):
+        for extension in ("csv", "txt"):
+            add(f"text-{extension}", f"records_{copy}.{extension}", lambda path: make_text(path, seed=copy))
+    return corpus
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the synthetic KYC benchmark corpus.")
+    parser.add_argument("directory")
+    parser.add_argument("--copies", type=int, default=3, help="PDFs per layout")
+    parser.add_argument("--images", type=int, default=3, help="Page-sized images per format")
+    parser.add_argument("--dpi", type=int, default=150, help="Resolution of scanned pages and images")
+    args = parser.parse_args(argv)
+
+    for kind, path in build_corpus(args.directory, args.copies, args.images, args.dpi):
+        print(f"{kind:14} {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""Throughput, latency and memory of every text extractor on the synthetic corpus.
+
+    python benchmarks/extraction.py                   # compare with the saved baseline
+    python benchmarks/extraction.py --save-baseline   # record this run as the baseline
+    python benchmarks/extraction.py --fail-on-regression --tolerance 0.2
+
+Each (extractor, file class) pair runs in its own interpreter, so peak RSS
+belongs to that pair alone. Caches are bypassed. Baselines are only
+comparable on the same machine; the machine details are stored with them.
+"""
+import argparse
+import inspect
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCHMARKS_DIR)
+DEFAULT_BASELINE = os.path.join(BENCHMARKS_DIR, "baselines", "extraction.json")
+BASELINE_VERSION = 2  # Version 1 baselines timed extraction cache hits and can't be compared
+
+# Extractor -> (module, function, file classes it accepts)
+EXTRACTORS = {
+    "process.extract_text_from_file": ("process", "extract_text_from_file", ("pdf-", "image-", "card-", "text-")),
+    "kyc.extract_text_from_image": ("extractors", "extract_text_from_image", ("image-", "card-")),
+    "kyc.extract_text_from_pdf": ("extractors", "extract_text_from_pdf", ("pdf-",)),
+}
+
+
+def page_count(path):
+    if path.lower().endswith(".pdf"):
+        import pymupdf
+        with pymupdf.open(path) as doc:
+            return doc.page_count
+    return 1
+
+
+def peak_rss_kb():
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak // 1024 if sys.platform == "darwin" else peak
+    except ImportError:
+        import psutil
+        return psutil.Process().memory_info().peak_wset // 1024
+
+
+def run_child(extractor, paths, repeat):
+    """Runs in the child interpreter: times extractor over paths and prints JSON."""
+    sys.path.insert(0, ROOT)
+    module_name, function_name, _ = EXTRACTORS[extractor]
+    function = getattr(__import__(module_name), function_name)
+    function = inspect.unwrap(function)  # Skip the timing and extraction cache wrappers
+
+    def call(path):
+        if module_name == "process":
+            return function(path, path.rsplit(".", 1)[-1])
+        return function(path)
+
+    call(paths[0])  # Warm up imports and worker pools outside the measurement
+
+    latencies, pages, errors = [], 0, 0
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for path in paths:
+            call_started = time.perf_counter()
+            text = call(path)
+            latencies.append(time.perf_counter() - call_started)
+            pages += page_count(path)
+            errors += isinstance(text, str) and text.startswith(("Error", "Unsupported file type"))
+    elapsed = time.perf_counter() - started
+
+    print(json.dumps({"latencies": latencies, "pages": pages, "seconds": elapsed, "errors": errors, "peak_rss_kb": peak_rss_kb()}))
+
+
+def measure(extractor, paths, repeat):
+    command = [sys.executable, os.path.abspath(__file__), "--child", extractor, "--repeat", str(repeat), *paths]
+    # A fresh cache directory as well, so nothing the extractor calls can reuse earlier results
+    with tempfile.TemporaryDirectory(prefix="kyc-bench-cache-") as cache_dir:
+        env = {**os.environ, "KYC_CACHE_DIR": cache_dir}
+        result = subprocess.run(command, cwd=ROOT, capture_output=True, text=True, env=env)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "failed")
+    raw = json.loads(result.stdout.strip().splitlines()[-1])
+
+    latencies = sorted(raw["latencies"])
+
+    def percentile(fraction):
+        return latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] * 1000
+
+    return {
+        "pages_per_second": raw["pages"] / raw["seconds"] if raw["seconds"] else 0.0,
+        "p50_ms": percentile(0.5),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+        "mean_ms": statistics.mean(latencies) * 1000,
+        "peak_rss_mb": raw["peak_rss_kb"] / 1024,
+        "errors": raw["errors"],
+    }
+
+
+def machine():
+    return {"platform": platform.platform(), "python": platform.python_version(), "cpus": os.cpu_count()}
+
+
+def regressions(current, baseline, tolerance):
+    """Metrics that got worse than baseline by more than tolerance (a fraction)."""
+    found = []
+    for key, metrics in current.items():
+        before = baseline.get(key)
+        if not before:
+            continue
+        if metrics["pages_per_second"] < before["pages_per_second"] * (1 - tolerance):
+            found.append(f"{key}: pages/s {before['pages_per_second']:.2f} -> {metrics['pages_per_second']:.2f}")
+        for metric in ("p95_ms", "peak_rss_mb"):
+            if metrics[metric] > before[metric] * (1 + tolerance):
+                found.append(f"{key}: {metric} {before[metric]:.1f} -> {metrics[metric]:.1f}")
+    return found
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the text extractors on a synthetic KYC corpus.")
+    parser.add_argument("--corpus", default=os.path.join(tempfile.gettempdir(), "kyc-corpus"))
+    parser.add_argument("--copies", type=int, default=3, help="Files per class")
+    parser.add_argument("--repeat", type=int, default=2, help="Passes over each file class")
+    parser.add_argument("--extractor", action="append", choices=sorted(EXTRACTORS), help="Only these extractors")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Write this run to --baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown before a regression is reported")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit with status 1 on regressions")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("paths", nargs="*", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        run_child(args.child, args.paths, args.repeat)
+        return 0
+
+    sys.path.insert(0, BENCHMARKS_DIR)
+    from corpus import build_corpus
+
+    by_class = {}
+    for file_class, path in build_corpus(args.corpus, args.copies, images=args.copies):
+        by_class.setdefault(file_class, []).append(path)
+
+    results = {}
+    print(f"{'extractor':32} {'file class':13} {'pages/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'RSS MB':>7} {'errors':>6}")
+    for extractor in args.extractor or EXTRACTORS:
+        prefixes = EXTRACTORS[extractor][2]
+        for file_class, paths in sorted(by_class.items()):
+            if not file_class.startswith(prefixes):
+                continue
+            try:
+                metrics = measure(extractor, paths, args.repeat)
+            except Exception as e:
+                print(f"{extractor:32} {file_class:13} failed: {e}")
+                continue
+            results[f"{extractor} {file_class}"] = metrics
+            print(
+                f"{extractor:32} {file_class:13} {metrics['pages_per_second']:8.2f} {metrics['p50_ms']:8.1f} "
+                f"{metrics['p95_ms']:8.1f} {metrics['p99_ms']:8.1f} {metrics['peak_rss_mb']:7.0f} {metrics['errors']:6d}"
+            )
+
+    status = 0
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("version", 1) != BASELINE_VERSION:
+            print(f"\nBaseline {args.baseline} is from an older version of this benchmark; re-record it with --save-baseline")
+        else:
+            if baseline.get("machine") != machine():
+                print(f"\nNote: baseline was recorded on {baseline.get('machine')}")
+            found = regressions(results, baseline["results"], args.tolerance)
+            print(f"\n{len(found)} regressions against {args.baseline}")
+            for line in found:
+                print(f"  {line}")
+            status = 1 if found and args.fail_on_regression else 0
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"version": BASELINE_VERSION, "machine": machine(), "recorded": time.strftime("%Y-%m-%d %H:%M:%S"), "results": results}, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
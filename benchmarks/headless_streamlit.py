@@ -0,0 +1,234 @@
+"""A stand-in for the streamlit module that runs pages without a browser.
+
+Install it before any page module is imported, then run page functions
+inside a session:
+
+    st = install()
+    session = HeadlessSession(username="alice", choices={"Select a User": "alice"}, clicks={"Process Documents"})
+    with st.use(session):
+        kyc.know_your_customer()
+
+Each thread has its own current session, as in a Streamlit server. Widgets
+return what the session scripts for their label: choices for select boxes
+and other inputs, clicks for buttons, uploads for file uploaders and chat
+for chat inputs. Everything else is accepted and ignored.
+"""
+import io
+import sys
+import threading
+import types
+import uuid
+from contextlib import contextmanager
+
+
+class RerunRequested(Exception):
+    """Raised by st.rerun(); the page asked to be run again."""
+
+
+class StopRequested(Exception):
+    """Raised by st.stop()."""
+
+
+class SessionState(dict):
+    """st.session_state: a dict that also allows attribute access."""
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __setattr__(self, name, value):
+        self[name] = value
+
+    def __delattr__(self, name):
+        del self[name]
+
+
+class UploadedFile(io.BytesIO):
+    """Looks like the files returned by st.file_uploader."""
+
+    def __init__(self, name, data, file_id=None):
+        super().__init__(data)
+        self.name = name
+        self.size = len(data)
+        self.file_id = file_id or uuid.uuid4().hex
+
+
+class HeadlessSession:
+    def __init__(self, username=None, choices=None, clicks=(), uploads=None, chat=None):
+        self.session_state = SessionState()
+        if username:
+            self.session_state.update({"user_logged_in": True, "username": username, "page": "home"})
+        self.choices = dict(choices or {})
+        self.clicks = set(clicks)
+        self.uploads = list(uploads or [])
+        self.chat = list(chat or [])
+        self.messages = []  # (kind, text) from st.error, st.warning, st.success and st.info
+
+    def errors(self):
+        return [text for kind, text in self.messages if kind == "error"]
+
+
+class _Block:
+    """Returned by containers (expander, chat_message, columns, ...) and st.progress."""
+
+    def __init__(self, st):
+        self._st = st
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def progress(self, *args, **kwargs):
+        pass
+
+    def __getattr__(self, name):
+        return getattr(self._st, name)
+
+
+def _ignore(*args, **kwargs):
+    return None
+
+
+class HeadlessStreamlit(types.ModuleType):
+    def __init__(self):
+        super().__init__("streamlit")
+        self._local = threading.local()
+
+    @contextmanager
+    def use(self, session):
+        """Makes session current for this thread while the block runs."""
+        previous = getattr(self._local, "session", None)
+        self._local.session = session
+        try:
+            yield session
+        finally:
+            self._local.session = previous
+
+    @property
+    def session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            raise RuntimeError("No headless session is active in this thread")
+        return session
+
+    @property
+    def session_state(self):
+        return self.session.session_state
+
+    @property
+    def sidebar(self):
+        return self
+
+    # -- widgets ------------------------------------------------------------
+
+    def _choice(self, label, default, options=None):
+        choice = self.session.choices.get(label, default)
+        return choice(options) if callable(choice) else choice
+
+    def selectbox(self, label, options, index=0, **kwargs):
+        options = list(options)
+        return self._choice(label, options[index] if options else None, options)
+
+    def multiselect(self, label, options, default=None, **kwargs):
+        return self._choice(label, list(default or []), list(options))
+
+    def radio(self, label, options, index=0, **kwargs):
+        return self.selectbox(label, options, index)
+
+    def checkbox(self, label, value=False, **kwargs):
+        return self._choice(label, value)
+
+    def text_input(self, label, value="", **kwargs):
+        return self._choice(label, value)
+
+    def number_input(self, label, min_value=None, max_value=None, value=None, **kwargs):
+        return self._choice(label, min_value if value is None else value)
+
+    def button(self, label, **kwargs):
+        return label in self.session.clicks
+
+    def file_uploader(self, label, accept_multiple_files=False, **kwargs):
+        uploads = self.session.uploads
+        if accept_multiple_files:
+            return list(uploads)
+        return uploads[0] if uploads else None
+
+    def chat_input(self, placeholder=None, **kwargs):
+        return self.session.chat.pop(0) if self.session.chat else None
+
+    # -- messages and control flow -------------------------------------------
+
+    def _message(self, kind, body):
+        self.session.messages.append((kind, str(body)))
+
+    def error(self, body, **kwargs):
+        self._message("error", body)
+
+    def warning(self, body, **kwargs):
+        self._message("warning", body)
+
+    def success(self, body, **kwargs):
+        self._message("success", body)
+
+    def info(self, body, **kwargs):
+        self._message("info", body)
+
+    def write_stream(self, stream, **kwargs):
+        """Consumes the stream like st.write_stream and returns the text it produced."""
+        return "".join(str(piece) for piece in stream)
+
+    def rerun(self, **kwargs):
+        raise RerunRequested()
+
+    def stop(self):
+        raise StopRequested()
+
+    # -- layout ---------------------------------------------------------------
+
+    def progress(self, *args, **kwargs):
+        return _Block(self)
+
+    def columns(self, spec, **kwargs):
+        return [_Block(self) for _ in range(spec if isinstance(spec, int) else len(spec))]
+
+    def tabs(self, labels):
+        return [_Block(self) for _ in labels]
+
+    def expander(self, *args, **kwargs):
+        return _Block(self)
+
+    def chat_message(self, *args, **kwargs):
+        return _Block(self)
+
+    def spinner(self, *args, **kwargs):
+        return _Block(self)
+
+    def container(self, *args, **kwargs):
+        return _Block(self)
+
+    def empty(self):
+        return _Block(self)
+
+    def cache_data(self, func=None, **kwargs):
+        return func if func is not None else (lambda f: f)
+
+    cache_resource = cache_data
+
+    def __getattr__(self, name):
+        # title, write, markdown, dataframe, text_area, set_page_config, ...
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return _ignore
+
+
+def install():
+    """Registers the headless module as 'streamlit' and returns it."""
+    module = sys.modules.get("streamlit")
+    if not isinstance(module, HeadlessStreamlit):
+        module = HeadlessStreamlit()
+        sys.modules["streamlit"] = module
+    return module
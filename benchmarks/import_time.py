@@ -0,0 +1,107 @@
+"""Measures the start-up cost of each page of the app.
+
+Every page module is imported in a fresh interpreter, the way a new Streamlit
+replica would first load it, and the wall time, peak memory and heaviest
+imports are reported relative to the base app (streamlit + database):
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --repeat 5 --top 8
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Page name in app.py -> modules imported to show it
+PAGES = {
+    "home": [],
+    "signin": ["login_page"],
+    "signup": ["signup_page"],
+    "upload_documents / fetch_documents": ["document_management"],
+    "see_user_documents": ["see_user_docs"],
+    "know_your_customer": ["kyc"],
+    "KYC (Easy KYC)": ["easy_kyc"],
+    "process_documents": ["process"],
+}
+
+BASE_MODULES = ["streamlit", "database"]
+
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+for name in sys.argv[1:]:
+    __import__(name)
+elapsed = time.perf_counter() - start
+try:
+    import resource
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        peak_kb //= 1024
+except ImportError:
+    import psutil
+    peak_kb = psutil.Process().memory_info().peak_wset // 1024
+print(json.dumps({"seconds": elapsed, "peak_kb": peak_kb}))
+"""
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure(modules):
+    """Imports modules in a fresh interpreter; returns (seconds, peak KB, slowest top-level imports)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD, *BASE_MODULES, *modules],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {modules} failed:\n{result.stderr[-2000:]}")
+
+    stats = json.loads(result.stdout.strip().splitlines()[-1])
+
+    # Cumulative time of packages imported directly (least indentation) by our code
+    cumulative = {}
+    for match in IMPORTTIME_LINE.finditer(result.stderr):
+        micros, indent, name = int(match.group(2)), len(match.group(3)), match.group(4)
+        if indent <= 2:
+            cumulative[name.split(".")[0]] = cumulative.get(name.split(".")[0], 0) + micros
+    return stats["seconds"], stats["peak_kb"], cumulative
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report import-time cost per app page.")
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh interpreters per page (median is reported)")
+    parser.add_argument("--top", type=int, default=5, help="Heaviest imports listed per page")
+    args = parser.parse_args(argv)
+
+    rows = []
+    for page, modules in PAGES.items():
+        runs = [measure(modules) for _ in range(args.repeat)]
+        seconds = statistics.median(run[0] for run in runs)
+        peak_kb = statistics.median(run[1] for run in runs)
+        rows.append((page, seconds, peak_kb, runs[-1][2]))
+
+    base_seconds, base_kb = rows[0][1], rows[0][2]
+    print(f"{'page':38} {'import s':>9} {'+ vs home':>10} {'peak MB':>8} {'+ vs home':>10}")
+    for page, seconds, peak_kb, _ in rows:
+        print(
+            f"{page:38} {seconds:9.2f} {seconds - base_seconds:10.2f} "
+            f"{peak_kb / 1024:8.0f} {(peak_kb - base_kb) / 1024:10.0f}"
+        )
+
+    base_imports = rows[0][3]
+    print()
+    for page, _, _, cumulative in rows[1:]:
+        extra = {name: micros for name, micros in cumulative.items() if name not in base_imports}
+        heaviest = sorted(extra.items(), key=lambda item: item[1], reverse=True)[: args.top]
+        listed = ", ".join(f"{name} {micros / 1e6:.2f}s" for name, micros in heaviest) or "nothing beyond home"
+        print(f"{page}: {listed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""Load test for one app replica, with simulated sessions and in-process backends.
+
+    python benchmarks/load_test.py --uploaders 8 --admins 2 --duration 60
+    python benchmarks/load_test.py --admins 4 --db-latency 0.05 --llm-latency 1.5 --json results.json
+
+Pages run headlessly (see headless_streamlit.py) in one thread per session,
+the way Streamlit runs sessions, against LocalSupabaseClient and
+FakeGeminiModel from local_backend.py with the given latencies. Uploaders
+alternate between "Upload Documents" (one new PDF per run) and "Fetch
+Documents"; admins alternate between "Generate KYC Details" for a seeded
+user and an Easy KYC question. Uploads queue extraction jobs, which
+--job-workers background workers run as in the app. The report gives
+throughput, latency percentiles per page, the per-stage time breakdown from
+metrics.py and the state of the job queue.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+sys.path.insert(0, BENCHMARKS_DIR)
+
+QUESTIONS = [
+    "What is the customer's date of birth?",
+    "Which address is on file?",
+    "What is the phone number?",
+    "Summarise the identity documents.",
+]
+
+
+def configure_environment(args):
+    """Points every setting at throwaway local resources; must run before app modules are imported."""
+    workdir = tempfile.mkdtemp(prefix="kyc-load-")
+    os.environ["KYC_CACHE_DIR"] = workdir
+    os.environ["JOB_QUEUE_PATH"] = os.path.join(workdir, "jobs.sqlite3")
+    os.environ["KYC_EMBED_BACKEND"] = "local"
+    os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+    os.environ.setdefault("SUPABASE_KEY", "local-load-test")
+    os.environ.setdefault("GEMINI_API_KEY", "local-load-test")
+    os.environ["LLM_REQUESTS_PER_MINUTE"] = str(args.llm_rpm)
+    return workdir
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+
+class LoadTest:
+    def __init__(self, args, pdf_bytes):
+        import headless_streamlit
+        from local_backend import FakeGeminiModel, LocalSupabaseClient
+
+        self.args = args
+        self.pdf_bytes = pdf_bytes
+        self.st = headless_streamlit.install()
+        self.headless = headless_streamlit
+
+        self.client = LocalSupabaseClient(latency=args.db_latency)
+        self.client.define_table("admin")
+        self.client.define_table("kyc_data")
+        self.model = FakeGeminiModel(
+            response="The customer's details match the documents on file.",
+            latency=args.llm_latency,
+            rate_limit_ratio=args.llm_rate_limit_ratio,
+        )
+
+        # Pages bind supabase_client at import, so swap it in first
+        import database
+        database.supabase_client = self.client
+        import document_management, easy_kyc, kyc
+        kyc.supabase_client = self.client
+        easy_kyc.supabase_client = self.client
+        easy_kyc.get_gemini_model = lambda name: self.model
+
+        self.pages = {
+            "upload_documents": document_management.upload_documents,
+            "fetch_documents": document_management.fetch_documents,
+            "know_your_customer": kyc.know_your_customer,
+            "easy_kyc": easy_kyc.easy_kyc,
+        }
+        self.samples = []  # (page, seconds, ok)
+        self.lock = threading.Lock()
+        self.upload_counter = 0
+
+    def seed(self, users):
+        """Uploads a few documents per user and runs their extraction jobs, so admin pages have data."""
+        import job_queue
+
+        for user in users:
+            session = self.headless.HeadlessSession(
+                username=user,
+                uploads=[self._upload(user) for _ in range(self.args.seed_documents)],
+                choices={"Select Document Type": "ID Proof"},
+            )
+            with self.st.use(session):
+                self.pages["upload_documents"]()
+            if session.errors():
+                raise RuntimeError(f"Seeding {user} failed: {session.errors()[0]}")
+
+        job_queue.work(idle_exit=True)
+        failed = job_queue.job_queue.counts()["failed"]
+        if failed:
+            raise RuntimeError(f"Seeding failed: {failed} extraction jobs failed")
+
+    def _upload(self, user):
+        with self.lock:
+            self.upload_counter += 1
+            number = self.upload_counter
+        # A trailing comment makes each file's bytes unique, so uploads aren't deduplicated
+        return self.headless.UploadedFile(f"{user}_doc_{number}.pdf", self.pdf_bytes + f"\n% {number}\n".encode())
+
+    def run_page(self, page, session):
+        started = time.perf_counter()
+        ok = True
+        with self.st.use(session):
+            try:
+                self.pages[page]()
+            except self.headless.RerunRequested:
+                pass
+            except Exception as e:
+                ok = False
+                print(f"{page} raised {type(e).__name__}: {e}", file=sys.stderr)
+        elapsed = time.perf_counter() - started
+        ok = ok and not session.errors()
+        with self.lock:
+            self.samples.append((page, elapsed, ok))
+
+    def uploader(self, user, deadline):
+        state = None  # Kept across runs, like a browser tab's session state
+        while time.monotonic() < deadline:
+            session = self.headless.HeadlessSession(
+                username=user, uploads=[self._upload(user)], choices={"Select Document Type": "ID Proof"}
+            )
+            if state is not None:
+                session.session_state.update(state)
+            self.run_page("upload_documents", session)
+            state = session.session_state
+
+            session = self.headless.HeadlessSession(username=user)
+            session.session_state.update(state)
+            self.run_page("fetch_documents", session)
+
+    def admin(self, users, deadline, rng):
+        state = None
+        while time.monotonic() < deadline:
+            user = rng.choice(users)
+            session = self.headless.HeadlessSession(
+                username="admin",
+                choices={"Select a User": user, "Select Folders": ["ID Proof"]},
+                clicks={"Process Documents"},
+            )
+            self.run_page("know_your_customer", session)
+
+            session = self.headless.HeadlessSession(
+                username="admin", choices={"Select a user:": user}, chat=[rng.choice(QUESTIONS)]
+            )
+            if state is not None:
+                session.session_state.update(state)
+            self.run_page("easy_kyc", session)
+            state = session.session_state
+
+    def run(self):
+        users = [f"user{i:03d}" for i in range(max(self.args.uploaders, self.args.seed_users))]
+        self.seed(users[: self.args.seed_users])
+
+        import job_queue
+        import metrics
+        metrics_before = metrics.snapshot()
+        job_queue.start_workers(self.args.job_workers)
+        deadline = time.monotonic() + self.args.duration
+        threads = [
+            threading.Thread(target=self.uploader, args=(users[i], deadline), name=f"uploader-{i}")
+            for i in range(self.args.uploaders)
+        ]
+        threads += [
+            threading.Thread(
+                target=self.admin, args=(users[: self.args.seed_users], deadline, random.Random(i)), name=f"admin-{i}"
+            )
+            for i in range(self.args.admins)
+        ]
+
+        started = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.monotonic() - started
+
+        return self.report(wall, metrics_before)
+
+    def report(self, wall, metrics_before):
+        import metrics
+
+        pages = {}
+        for page, seconds, ok in self.samples:
+            entry = pages.setdefault(page, {"latencies": [], "errors": 0})
+            entry["latencies"].append(seconds)
+            entry["errors"] += not ok
+
+        result = {
+            "settings": {key: value for key, value in vars(self.args).items() if key != "json"},
+            "wall_seconds": wall,
+            "runs_per_second": len(self.samples) / wall if wall else 0.0,
+            "pages": {},
+            "stages": [],
+        }
+
+        print(
+            f"\n{self.args.uploaders} uploaders, {self.args.admins} admins, {wall:.1f}s: "
+            f"{len(self.samples)} page runs, {result['runs_per_second']:.2f} runs/s"
+        )
+        print(f"\n{'page':20} {'runs':>6} {'errors':>6} {'runs/s':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+        for page, entry in sorted(pages.items()):
+            latencies = entry["latencies"]
+            row = {
+                "runs": len(latencies),
+                "errors": entry["errors"],
+                "runs_per_second": len(latencies) / wall,
+                "p50_ms": percentile(latencies, 0.5) * 1000,
+                "p95_ms": percentile(latencies, 0.95) * 1000,
+                "p99_ms": percentile(latencies, 0.99) * 1000,
+                "mean_ms": statistics.mean(latencies) * 1000,
+            }
+            result["pages"][page] = row
+            print(
+                f"{page:20} {row['runs']:6d} {row['errors']:6d} {row['runs_per_second']:7.2f} "
+                f"{row['p50_ms']:9.1f} {row['p95_ms']:9.1f} {row['p99_ms']:9.1f}"
+            )
+
+        # Stage breakdown for the measured period only, seeding excluded
+        before = metrics_before["histograms"]
+        print(f"\n{'stage':22} {'calls':>7} {'errors':>6} {'mean ms':>9} {'total s':>9}")
+        for stage, h in sorted(metrics.snapshot()["histograms"].items(), key=lambda item: -item[1]["sum"]):
+            old = before.get(stage, {"count": 0, "sum": 0.0, "errors": 0})
+            calls, total, errors = h["count"] - old["count"], h["sum"] - old["sum"], h["errors"] - old["errors"]
+            if not calls:
+                continue
+            result["stages"].append({"stage": stage, "calls": calls, "errors": errors, "total_s": total})
+            print(f"{stage:22} {calls:7d} {errors:6d} {total / calls * 1000:9.1f} {total:9.2f}")
+
+        import job_queue
+        result["jobs"] = job_queue.job_queue.counts()
+        print(f"\nGemini: {self.model.calls} calls, {self.model.rate_limited} rate limited")
+        print(f"Extraction jobs: {', '.join(f'{n} {status}' for status, n in result['jobs'].items())}")
+        return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate concurrent sessions against one app replica.")
+    parser.add_argument("--uploaders", type=int, default=4, help="Sessions uploading and listing documents")
+    parser.add_argument("--admins", type=int, default=1, help="Sessions running KYC extraction and Easy KYC")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to run")
+    parser.add_argument("--db-latency", type=float, default=0.02, help="Seconds added to each Supabase call")
+    parser.add_argument("--llm-latency", type=float, default=1.0, help="Seconds per Gemini call")
+    parser.add_argument("--llm-rate-limit-ratio", type=float, default=0.0, help="Fraction of Gemini calls answering 429")
+    parser.add_argument("--llm-rpm", type=float, default=600, help="LLM_REQUESTS_PER_MINUTE for the replica")
+    parser.add_argument("--seed-users", type=int, default=4, help="Users with documents before the test starts")
+    parser.add_argument("--seed-documents", type=int, default=3, help="Documents per seeded user")
+    parser.add_argument("--job-workers", type=int, default=2, help="Background extraction workers")
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args(argv)
+
+    workdir = configure_environment(args)
+
+    from corpus import make_pdf
+    pdf_path = make_pdf(os.path.join(workdir, "load_test.pdf"), ["digital", "digital"], seed=1)
+    with open(pdf_path, "rb") as f:
+        pdf_bytes = f.read()
+
+    result = LoadTest(args, pdf_bytes).run()
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Per-image OCR latency of each engine on a batch of small ID-card images.
+
+    python benchmarks/ocr_engines.py --images 50
+    python benchmarks/ocr_engines.py --tesseract-cmd /usr/bin/tesseract
+
+"first" is the first image, which includes any model loading; the other
+columns cover the rest of the batch. Engines that cannot be created here
+(e.g. tesserocr not installed) are reported and skipped.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pytesseract
+from corpus import card_image
+import ocr_engine
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark OCR engines on small images.")
+    parser.add_argument("--images", type=int, default=30)
+    parser.add_argument("--tesseract-cmd", help="Path to the tesseract binary")
+    args = parser.parse_args(argv)
+
+    if args.tesseract_cmd:
+        pytesseract.pytesseract.tesseract_cmd = args.tesseract_cmd
+
+    cards = [card_image(seed) for seed in range(args.images)]
+    print(f"{len(cards)} images of {cards[0].width}x{cards[0].height}\n")
+    print(f"{'engine':12} {'first ms':>9} {'mean ms':>8} {'p50 ms':>8} {'p95 ms':>8} {'images/s':>9}")
+
+    for name in ("pytesseract", "tesserocr"):
+        started = time.perf_counter()
+        try:
+            engine = ocr_engine.create_engine(name)
+            engine.image_to_string(cards[0])
+        except Exception as e:
+            print(f"{name:12} unavailable: {e}")
+            continue
+        first = time.perf_counter() - started
+
+        latencies = []
+        for card in cards[1:]:
+            started = time.perf_counter()
+            engine.image_to_string(card)
+            latencies.append(time.perf_counter() - started)
+
+        if not latencies:
+            latencies = [first]
+        print(
+            f"{name:12} {first * 1000:9.1f} {statistics.mean(latencies) * 1000:8.1f} "
+            f"{percentile(latencies, 0.5) * 1000:8.1f} {percentile(latencies, 0.95) * 1000:8.1f} "
+            f"{len(latencies) / sum(latencies):9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""OCR time and accuracy for each image preparation setting.
+
+    python benchmarks/ocr_prep.py --tesseract-cmd /usr/bin/tesseract
+    python benchmarks/ocr_prep.py --no-ocr   # preparation time only
+
+Scanned PDF pages (150 DPI scans) and a phone-photo sized JPEG are prepared
+each way, OCR'd once per repeat, and scored against the text they were
+generated from. Accuracy is the word-level similarity to that text (1.0 is
+a perfect read).
+"""
+import argparse
+import difflib
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pymupdf
+import pytesseract
+from PIL import Image
+from corpus import image_lines, make_image, make_pdf, pdf_lines
+import image_prep
+
+SCANNED_LAYOUT = ["scanned"] * 3
+
+
+def accuracy(text, lines):
+    expected = " ".join(lines).split()
+    return difflib.SequenceMatcher(None, expected, text.split(), autojunk=False).ratio()
+
+
+# Each setting turns (pdf page) or (image path) into a PIL image
+def png_roundtrip_72(page):
+    pix = page.get_pixmap()
+    return Image.open(io.BytesIO(pix.tobytes("png")))
+
+
+PAGE_SETTINGS = {
+    "png round trip, 72 DPI (old)": png_roundtrip_72,
+    "direct, 72 DPI, RGB": lambda page: image_prep.render_page(page, dpi=72, grayscale=False),
+    "direct, 300 DPI, gray": lambda page: image_prep.render_page(page, dpi=300),
+    "direct, adaptive DPI, gray": lambda page: image_prep.render_page(page),
+    "adaptive DPI, gray, binarized": lambda page: image_prep.binarize(image_prep.render_page(page)),
+}
+
+PHOTO_SETTINGS = {
+    "full decode (old)": lambda path: Image.open(path).convert("RGB"),
+    "draft + downscale, gray": lambda path: image_prep.load_image(path),
+    "draft + downscale, binarized": lambda path: image_prep.binarize(image_prep.load_image(path)),
+    "draft + downscale, 1 MP": lambda path: image_prep.load_image(path, max_pixels=1_000_000),
+}
+
+
+def run_setting(name, prepare, items, repeat, ocr):
+    prep_times, ocr_times, scores = [], [], []
+    for source, lines in items:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            image = prepare(source)
+            image.load()
+            prep_times.append(time.perf_counter() - started)
+            if ocr:
+                started = time.perf_counter()
+                text = pytesseract.image_to_string(image)
+                ocr_times.append(time.perf_counter() - started)
+                scores.append(accuracy(text, lines))
+
+    size = f"{image.width}x{image.height}"
+    ocr_s = f"{statistics.median(ocr_times):8.3f}" if ocr_times else f"{'-':>8}"
+    score = f"{statistics.mean(scores):8.3f}" if scores else f"{'-':>8}"
+    print(f"{name:34} {size:>11} {statistics.median(prep_times):8.3f} {ocr_s} {score}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark image preparation settings for OCR.")
+    parser.add_argument("--corpus", default=os.path.join(tempfile.gettempdir(), "kyc-corpus"))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--tesseract-cmd", help="Path to the tesseract binary")
+    parser.add_argument("--no-ocr", action="store_true", help="Only time preparation")
+    args = parser.parse_args(argv)
+
+    if args.tesseract_cmd:
+        pytesseract.pytesseract.tesseract_cmd = args.tesseract_cmd
+    ocr = not args.no_ocr
+
+    os.makedirs(args.corpus, exist_ok=True)
+    pdf_path = os.path.join(args.corpus, "prep_scanned.pdf")
+    photo_path = os.path.join(args.corpus, "prep_photo.jpg")
+    if not os.path.exists(pdf_path):
+        make_pdf(pdf_path, SCANNED_LAYOUT, seed=7, dpi=150)
+    if not os.path.exists(photo_path):
+        make_image(photo_path, seed=7, dpi=400)  # About 3300x4700, like a phone camera
+
+    header = f"{'setting':34} {'size':>11} {'prep s':>8} {'ocr s':>8} {'accuracy':>8}"
+    with pymupdf.open(pdf_path) as doc:
+        pages = list(zip(doc, pdf_lines(SCANNED_LAYOUT, seed=7)))
+        print("Scanned PDF pages")
+        print(header)
+        for name, prepare in PAGE_SETTINGS.items():
+            run_setting(name, prepare, pages, args.repeat, ocr)
+
+    print("\nPhone photo (JPEG)")
+    print(header)
+    for name, prepare in PHOTO_SETTINGS.items():
+        run_setting(name, prepare, [(photo_path, image_lines(seed=7))], args.repeat, ocr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Compares the hybrid PDF engine with the two PDF paths it replaced.
+
+    python benchmarks/pdf_extraction.py --corpus /tmp/kyc-corpus
+    python benchmarks/pdf_extraction.py --tesseract-cmd /usr/bin/tesseract --workers 4
+
+"pdfminer+ocr" is the old kyc path: pdfminer over the whole file, and OCR of
+every page only if that found no text. "pdfplumber" is the old process path,
+which has no OCR at all. The extraction caches are bypassed throughout.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pdfplumber
+import pytesseract
+from pdfminer.high_level import extract_text
+from corpus import build_corpus
+from ocr import ocr_pdf_pages
+from pdf_engine import extract_pdf_text
+
+
+def pdfminer_then_ocr(file_path, workers):
+    text = extract_text(file_path).strip()
+    if text:
+        return text
+    return "\n".join(ocr_pdf_pages(file_path, workers=workers)).strip()
+
+
+def pdfplumber_only(file_path, workers):
+    extracted_text = ""
+    with pdfplumber.open(file_path) as pdf:
+        for page in pdf.pages:
+            extracted_text += page.extract_text() + "\n"
+    return extracted_text.strip()
+
+
+def hybrid(file_path, workers):
+    return extract_pdf_text(file_path, workers=workers)
+
+
+ENGINES = {"pdfminer+ocr": pdfminer_then_ocr, "pdfplumber": pdfplumber_only, "hybrid": hybrid}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark PDF text extraction engines.")
+    parser.add_argument("--corpus", default=os.path.join(tempfile.gettempdir(), "kyc-corpus"))
+    parser.add_argument("--copies", type=int, default=3, help="PDFs per layout")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per file (median is reported)")
+    parser.add_argument("--workers", type=int, default=None, help="OCR processes (default OCR_WORKERS)")
+    parser.add_argument("--tesseract-cmd", help="Path to the tesseract binary")
+    args = parser.parse_args(argv)
+
+    if args.tesseract_cmd:
+        pytesseract.pytesseract.tesseract_cmd = args.tesseract_cmd
+
+    corpus = [(kind, path) for kind, path in build_corpus(args.corpus, args.copies, images=0, cards=0, texts=0) if kind.startswith("pdf")]
+    kinds = sorted({kind for kind, _ in corpus})
+
+    print(f"{'engine':14} {'layout':12} {'median s':>9} {'chars':>7} {'errors':>7}")
+    for name, engine in ENGINES.items():
+        for kind in kinds:
+            timings, chars, errors = [], [], 0
+            for _, path in (entry for entry in corpus if entry[0] == kind):
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    try:
+                        text = engine(path, args.workers)
+                    except Exception:
+                        errors += 1
+                        continue
+                    timings.append(time.perf_counter() - started)
+                    chars.append(len(text))
+            median = f"{statistics.median(timings):9.3f}" if timings else f"{'-':>9}"
+            print(f"{name:14} {kind:12} {median} {int(statistics.mean(chars)) if chars else 0:7d} {errors:7d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+import functools
+import hashlib
+import json
+import os
+import threading
+import time
+from dotenv import load_dotenv
+from metrics import register_gauge
+
+# Load environment variables
+load_dotenv()
+
+CACHE_DIR = os.getenv("KYC_CACHE_DIR", ".kyc_cache")
+EXTRACTION_CACHE_MAX_BYTES = int(os.getenv("EXTRACTION_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", 7 * 24 * 60 * 60))  # Seconds
+READ_CACHE_TTL = float(os.getenv("READ_CACHE_TTL", "60"))  # Default seconds a backend read is reused
+READ_CACHE_MAX_ENTRIES = int(os.getenv("READ_CACHE_MAX_ENTRIES", "1024"))
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class DiskCache:
+    """On-disk key/value store with size-bounded LRU eviction and hit/miss counters.
+
+    Entries older than ttl seconds (if given) are treated as misses and removed.
+    """
+
+    def __init__(self, directory, max_bytes, ttl=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._size = None  # Lazily measured on first write
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".json")
+
+    def get(self, key):
+        """Returns the cached value for key, or None on a miss."""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            if self.ttl and time.time() - entry.get("created", 0) > self.ttl:
+                self._remove(path)
+                raise KeyError(key)
+            value = entry["value"]
+            os.utime(path)  # Mark as recently used for LRU eviction
+        except (OSError, ValueError, KeyError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return value
+
+    def set(self, key, value):
+        """Stores value under key, evicting least recently used entries if over budget."""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"value": value, "created": time.time()}, f)
+        written = os.path.getsize(tmp_path)
+        try:
+            replaced = os.path.getsize(path)  # An overwritten entry no longer counts
+        except OSError:
+            replaced = 0
+        os.replace(tmp_path, path)  # Atomic, so readers never see a partial entry
+
+        with self._lock:
+            if self._size is None:
+                self._size = self._disk_usage()
+            else:
+                self._size += written - replaced
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _remove(self, path):
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except OSError:
+            return  # Already removed by another process
+        with self._lock:
+            if self._size is not None:
+                self._size -= size
+
+    def _entries(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".json"):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue  # Removed by another process
+                    yield path, stat.st_size, stat.st_mtime
+
+    def _disk_usage(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self):
+        # Drop the oldest entries until we are back under 90% of the budget
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        for path, size, _ in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+        self._size = total
+
+    def stats(self):
+        """Returns hit/miss counters for display or logging."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "bytes": self._size,
+            }
+
+
+extraction_cache = DiskCache(os.path.join(CACHE_DIR, "extraction"), EXTRACTION_CACHE_MAX_BYTES)
+llm_cache = DiskCache(os.path.join(CACHE_DIR, "llm"), LLM_CACHE_MAX_BYTES, ttl=LLM_CACHE_TTL)
+
+
+def file_digest(file):
+    """SHA-256 of a file given as a path or a file-like object."""
+    digest = hashlib.sha256()
+
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+    elif hasattr(file, "getvalue"):
+        digest.update(file.getvalue())
+    else:
+        position = file.tell()
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+        file.seek(position)
+
+    return digest.hexdigest()
+
+
+def extraction_key(content_hash, extractor, version, settings=None):
+    """Cache key for one extractor run over one file's content."""
+    material = json.dumps(
+        {"content": content_hash, "extractor": extractor, "version": version, "settings": settings},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def llm_key(text, prompt_version, model_name):
+    """Cache key for one LLM call; whitespace differences in the input don't matter."""
+    normalized = " ".join(text.split())
+    material = json.dumps({"text": normalized, "prompt": prompt_version, "model": model_name}, sort_keys=True)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+# The extractors report failures as text starting with one of these
+EXTRACTION_ERROR_PREFIXES = ("Error", "Unsupported file type")
+
+
+def is_extraction_error(text):
+    """True if an extractor returned an error message instead of document text."""
+    return isinstance(text, str) and text.startswith(EXTRACTION_ERROR_PREFIXES)
+
+
+def _is_cacheable(text):
+    """Errors are returned as text by the extractors; never cache those."""
+    return isinstance(text, str) and not is_extraction_error(text)
+
+
+def cached_extractor(extractor, version, settings=None):
+    """Caches a text extractor's output by file content, extractor version and settings.
+
+    The wrapped function must take the file (path or file-like) as its first argument.
+    Any further arguments are treated as extra settings and become part of the key.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(file, *args, **kwargs):
+            key = extraction_key(
+                file_digest(file), extractor, version, {"settings": settings, "args": args, "kwargs": kwargs}
+            )
+
+            text = extraction_cache.get(key)
+            if text is not None:
+                return text
+
+            text = func(file, *args, **kwargs)
+            if _is_cacheable(text):
+                extraction_cache.set(key, text)
+            return text
+
+        return wrapper
+
+    return decorator
+
+
+class MemoryCache:
+    """In-process key/value store with a TTL per entry and hit/miss counters.
+
+    Every key belongs to a tag (e.g. "kyc_data"), so a write can drop all the
+    reads it affects with invalidate(tag). The cache is shared by every session
+    in the process, which is what lets a Streamlit rerun skip the backend.
+    """
+
+    def __init__(self, max_entries=READ_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}  # (tag, key) -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, tag, key):
+        """Returns (True, value) on a hit, or (False, None) if missing or expired."""
+        with self._lock:
+            entry = self._entries.get((tag, key))
+            if entry is None or entry[0] < time.monotonic():
+                self._entries.pop((tag, key), None)
+                self.misses += 1
+                return False, None
+            self.hits += 1
+            return True, entry[1]
+
+    def set(self, tag, key, value, ttl):
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._evict()
+            self._entries[(tag, key)] = (time.monotonic() + ttl, value)
+
+    def _evict(self):
+        # Expired entries first, then whichever expires soonest
+        now = time.monotonic()
+        for entry_key in [k for k, (expires_at, _) in self._entries.items() if expires_at < now]:
+            del self._entries[entry_key]
+        while len(self._entries) >= self.max_entries:
+            del self._entries[min(self._entries, key=lambda k: self._entries[k][0])]
+
+    def invalidate(self, *tags):
+        """Drops every entry under the given tags."""
+        with self._lock:
+            for entry_key in [k for k in self._entries if k[0] in tags]:
+                del self._entries[entry_key]
+
+    def stats(self):
+        """Returns hit/miss counters for display or logging."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+            }
+
+
+read_cache = MemoryCache()
+
+
+def cached_read(tag, ttl=None):
+    """Caches a backend read for ttl seconds, keyed by the function and its arguments.
+
+    Callers share the returned value, so they must not modify it. Writes that
+    change what the function reads should call invalidate(tag).
+    """
+
+    def decorator(func):
+        name = f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = json.dumps([name, args, kwargs], sort_keys=True, default=str)
+            hit, value = read_cache.get(tag, key)
+            if hit:
+                return value
+
+            value = func(*args, **kwargs)
+            read_cache.set(tag, key, value, READ_CACHE_TTL if ttl is None else ttl)
+            return value
+
+        return wrapper
+
+    return decorator
+
+
+def invalidate(*tags):
+    """Forgets cached reads under the given tags after a write."""
+    read_cache.invalidate(*tags)
+
+
+register_gauge("cache_hits", lambda: {"extraction": extraction_cache.hits, "llm": llm_cache.hits, "read": read_cache.hits})
+register_gauge("cache_misses", lambda: {"extraction": extraction_cache.misses, "llm": llm_cache.misses, "read": read_cache.misses})
@@ -1,8 +1,17 @@
 import supabase
 from supabase import create_client
 from supabase import Client
+import mimetypes
 import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from spool import spool_url
+from cache import cached_read, file_digest, invalidate
+from storage_manifest import StorageManifest
+from resumable_upload import RESUMABLE_UPLOAD_THRESHOLD, upload_resumable
+from metrics import count, span, timed
 
 # Load environment variables
 load_dotenv()
@@ -17,44 +26,176 @@ if not SUPABASE_URL or not SUPABASE_KEY:
 supabase_client: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 
 BUCKET_NAME = "kyc-documents"  # Name of the storage bucket
+SIGNED_URL_EXPIRY = 300  # Seconds a download link stays valid
+DOCUMENT_ID_BLOCK_SIZE = int(os.getenv("DOCUMENT_ID_BLOCK_SIZE", "20"))  # IDs reserved per database round trip
+UPLOAD_WORKERS = int(os.getenv("UPLOAD_WORKERS", "8"))  # Concurrent storage uploads per batch
+DOCUMENTS_CACHE_TTL = 30  # Seconds document listings are reused across reruns
+
+# Cached listing of the bucket; looked up lazily so a swapped-in client is honoured
+kyc_manifest = StorageManifest(lambda: supabase_client.storage.from_(BUCKET_NAME))
+
+
+def find_document_by_hash(user, content_hash):
+    """The user's stored document with this content, or None."""
+    try:
+        documents = query_documents({"user": user, "content_hash": content_hash}, "document_id,url,storage_path", limit=1)
+    except Exception as e:
+        print(f"Error looking up document by content hash: {e}")
+        return None
+    return documents[0] if documents and documents[0].get("storage_path") else None
+
+
+def _is_referenced(file_url):
+    """True if a stored document points at file_url, or if that can't be checked."""
+    try:
+        with span("db.query", table="documents"):
+            rows = supabase_client.table("documents").select("document_id").eq("url", file_url).limit(1).execute().data
+        return bool(rows)
+    except Exception as e:
+        print(f"Error checking references to {file_url}: {e}")
+        return True
+
+
+def _file_size(file):
+    size = getattr(file, "size", None)
+    if size is None:
+        position = file.tell()
+        size = file.seek(0, os.SEEK_END)
+        file.seek(position)
+    return size
 
 
 # Function to upload file to Supabase Storage
-def upload_to_supabase(file, user, doc_type):
+def upload_to_supabase(file, user, doc_type, content_hash=None):
+    """Upload a file unless the user already has the same bytes stored.
+
+    Returns (stored, error); stored has the url, storage_path and
+    content_hash to record, and deduplicated is True when an existing
+    object is referenced instead of a new one being written.
+    """
     file_name = f"{user}/{doc_type}/{file.name}"
+    content_hash = content_hash or file_digest(file)
+
+    existing = find_document_by_hash(user, content_hash)
+    if existing:
+        count("upload_dedup_hits")
+        return {
+            "url": existing["url"],
+            "storage_path": existing["storage_path"],
+            "content_hash": content_hash,
+            "deduplicated": True,
+        }, None
+
+    size = _file_size(file)
+    bucket = supabase_client.storage.from_(BUCKET_NAME)
+    file_url = bucket.get_public_url(file_name)
+
+    # An object no document points at was left by an upload whose metadata
+    # save failed; replace it so that save can be retried
+    upsert = not _is_referenced(file_url)
+
+    # Upload file to Supabase Storage; large scans go up in resumable chunks
+    with span("storage.upload", bytes=size) as attrs:
+        if size > RESUMABLE_UPLOAD_THRESHOLD:
+            content_type = mimetypes.guess_type(file.name)[0] or "application/octet-stream"
+            attrs["chunks"] = upload_resumable(
+                f"{str(supabase_client.storage_url).rstrip('/')}/upload/resumable",
+                supabase_client.supabase_key,
+                BUCKET_NAME,
+                file_name,
+                file,
+                size,
+                content_hash,
+                content_type,
+                upsert=upsert,
+            )
+        else:
+            # Read file as binary
+            response = bucket.upload(file_name, file.getvalue(), {"upsert": "true" if upsert else "false"})
+            if response is None:
+                return None, "Error uploading file to Supabase"
+
+    kyc_manifest.record_upload(file_name, size)
+
+    return {"url": file_url, "storage_path": file_name, "content_hash": content_hash, "deduplicated": False}, None
+
+
+def upload_many_to_supabase(files, user, doc_type, max_workers=UPLOAD_WORKERS):
+    """Upload several files concurrently. Returns (file, stored, error) per file, in input order.
+
+    Files with the same content are uploaded once and share the result.
+    """
+
+    def upload_one(item):
+        content_hash, file = item
+        try:
+            return upload_to_supabase(file, user, doc_type, content_hash)
+        except Exception as e:
+            return None, f"Error uploading file to Supabase: {e}"
+
+    if not files:
+        return []
+
+    hashes = [file_digest(file) for file in files]
+    unique = {}
+    for content_hash, file in zip(hashes, files):
+        unique.setdefault(content_hash, file)
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(unique))) as pool:
+        results = dict(zip(unique, pool.map(upload_one, unique.items())))
+
+    output = []
+    for content_hash, file in zip(hashes, files):
+        stored, error = results[content_hash]
+        if stored and unique[content_hash] is not file:
+            stored = {**stored, "deduplicated": True}
+            count("upload_dedup_hits")
+        output.append((file, stored, error))
+    return output
+
+
+class DocumentIdAllocator:
+    """Hands out unique document IDs from blocks reserved on the database sequence.
+
+    reserve_document_ids() (see supabase/migrations) draws from a Postgres
+    sequence, so blocks never overlap between processes or sessions. IDs left
+    unused in a block when the process exits are simply skipped.
+    """
+
+    def __init__(self, block_size=DOCUMENT_ID_BLOCK_SIZE):
+        self.block_size = block_size
+        self._reserved = deque()
+        self._lock = threading.Lock()
 
-    # Read file as binary
-    file_content = file.getvalue()
+    def _reserve(self, count):
+        with span("db.reserve_ids", ids=count):
+            response = supabase_client.rpc("reserve_document_ids", {"block_size": count}).execute()
+        numbers = response.data or []
+        if isinstance(numbers, int):
+            numbers = [numbers]
+        return [int(number) for number in numbers]
 
-    # Upload file to Supabase Storage
-    response = supabase_client.storage.from_(BUCKET_NAME).upload(file_name, file_content)
+    def next_ids(self, count):
+        """Returns count new IDs, reserving another block only when the current one runs out."""
+        with self._lock:
+            if len(self._reserved) < count:
+                self._reserved.extend(self._reserve(max(self.block_size, count - len(self._reserved))))
+            return [f"DOC{self._reserved.popleft():03d}" for _ in range(count)]
 
-    if response is None:
-        return None, "Error uploading file to Supabase"
+    def next_id(self):
+        return self.next_ids(1)[0]
 
-    # Get public URL of uploaded file
-    file_url = supabase_client.storage.from_(BUCKET_NAME).get_public_url(file_name)
 
-    return file_url, None
+document_ids = DocumentIdAllocator()
 
 
 # Function to generate unique document ID
 def generate_document_id():
-    docs = get_all_documents()
-    
-    if not docs:
-        return "DOC001"
-    
-    last_doc_id = sorted(docs, key=lambda x: x["document_id"], reverse=True)[0]["document_id"]
-    
-    last_number = int(last_doc_id.replace("DOC", ""))
-    new_id = f"DOC{last_number + 1:03d}"
-    
-    return new_id
+    return document_ids.next_id()
 
 
 # Function to save document metadata in Supabase Database
-def save_document_metadata(user, doc_type, file_name, file_url):
+def save_document_metadata(user, doc_type, file_name, file_url, content_hash=None, storage_path=None):
     doc_id = generate_document_id()  # Generate unique ID
 
     data = {
@@ -65,48 +206,179 @@ def save_document_metadata(user, doc_type, file_name, file_url):
         "url": file_url,
         "timestamp": "now()"
     }
+    if content_hash:
+        data.update({"content_hash": content_hash, "storage_path": storage_path})
 
-    response = supabase_client.table("documents").insert(data).execute()
+    with span("db.insert", table="documents", rows=1):
+        response = supabase_client.table("documents").insert(data).execute()
 
     # 🔹 Correct way to check for errors
     if response.data is None:  # If there's no data, something went wrong
         return None, "Error saving document metadata to database"
 
+    invalidate("documents")
     return doc_id, None
 
+
+def insert_rows(table, rows):
+    """Insert rows with one request. Returns one error (or None) per row.
+
+    If the batch is rejected, the rows are retried one at a time so a single
+    bad row doesn't fail the others.
+    """
+    if not rows:
+        return []
+
+    try:
+        with span("db.insert", table=table, rows=len(rows)):
+            response = supabase_client.table(table).insert(rows).execute()
+        if response.data is not None:
+            return [None] * len(rows)
+    except Exception:
+        pass
+
+    errors = []
+    with span("db.insert_fallback", table=table, rows=len(rows)):
+        for row in rows:
+            try:
+                response = supabase_client.table(table).insert(row).execute()
+                errors.append(None if response.data is not None else f"Error saving row to {table}")
+            except Exception as e:
+                errors.append(f"Error saving row to {table}: {e}")
+    return errors
+
+
+def save_documents_metadata(user, doc_type, uploads):
+    """Save metadata for several uploaded files with a single insert.
+
+    uploads is a list of (file_name, stored) with stored as returned by
+    upload_to_supabase. Returns (doc_id, error) per upload.
+    """
+    doc_ids = document_ids.next_ids(len(uploads))
+
+    rows = [
+        {
+            "document_id": doc_id,
+            "user": user,
+            "type": doc_type,
+            "filename": file_name,
+            "url": stored["url"],
+            "content_hash": stored["content_hash"],
+            "storage_path": stored["storage_path"],
+            "timestamp": "now()"
+        }
+        for doc_id, (file_name, stored) in zip(doc_ids, uploads)
+    ]
+
+    errors = insert_rows("documents", rows)
+    invalidate("documents")
+    return [(None, error) if error else (doc_id, None) for doc_id, error in zip(doc_ids, errors)]
+
 # Function to retrieve all documents from Supabase
 def get_all_documents():
     response = supabase_client.table("documents").select("*").execute()
     return response.data if response.data else []
 
-def download_file_from_supabase(document_id):
-    """Download file from Supabase storage and return file bytes."""
+
+def _apply_filters(query, filters):
+    """Adds equality filters to a query; list values become IN filters."""
+    for column, value in (filters or {}).items():
+        if isinstance(value, (list, tuple, set)):
+            query = query.in_(column, list(value))
+        else:
+            query = query.eq(column, value)
+    return query
+
+
+@cached_read("documents", ttl=DOCUMENTS_CACHE_TTL)
+def query_documents(filters=None, columns="*", order_by="document_id", descending=False, limit=None, offset=0):
+    """Fetch documents with filtering, ordering, paging and column selection done by Supabase."""
+    query = _apply_filters(supabase_client.table("documents").select(columns), filters)
+
+    if order_by:
+        query = query.order(order_by, desc=descending)
+    if limit is not None:
+        query = query.range(offset, offset + limit - 1)
+
+    with span("db.query", table="documents") as attrs:
+        response = query.execute()
+        attrs["rows"] = len(response.data or []) if response else 0
+    return response.data if response and response.data else []
+
+
+@cached_read("documents", ttl=DOCUMENTS_CACHE_TTL)
+def count_documents(filters=None):
+    """Count documents matching filters without fetching them."""
+    query = _apply_filters(supabase_client.table("documents").select("document_id", count="exact"), filters)
+    with span("db.count", table="documents"):
+        response = query.limit(1).execute()
+    return response.count or 0
+
+
+def get_documents_for_user(user, columns="*", limit=None, offset=0):
+    """Fetch one user's documents, newest first."""
+    return query_documents({"user": user}, columns, order_by="timestamp", descending=True, limit=limit, offset=offset)
+
+def download_file_from_supabase(document_id, bucket="documents"):
+    """Stream a file from Supabase storage into the local spool and return its path."""
     try:
-        response = supabase_client.storage.from_("documents").download(document_id)
-        return response  # Returns file bytes
+        signed = supabase_client.storage.from_(bucket).create_signed_url(document_id, SIGNED_URL_EXPIRY)
+        file_url = signed.get("signedURL") or signed.get("signedUrl")
+        _, extension = os.path.splitext(document_id)
+        return spool_url(file_url, suffix=extension.lower())  # Returns local file path
     except Exception as e:
         print(f"Error downloading file: {e}")
         return None
 
+def _stored_object(doc_id, default_path):
+    """(storage path, shared) for a document; shared objects are still referenced by other documents."""
+    try:
+        with span("db.query", table="documents"):
+            rows = supabase_client.table("documents").select("storage_path").eq("document_id", doc_id).execute().data
+        file_path = (rows[0].get("storage_path") if rows else None) or default_path
+        with span("db.count", table="documents"):
+            others = (
+                supabase_client.table("documents")
+                .select("document_id", count="exact")
+                .eq("storage_path", file_path)
+                .neq("document_id", doc_id)
+                .limit(1)
+                .execute()
+            )
+        return file_path, bool(others.count)
+    except Exception as e:
+        print(f"Error checking references to document {doc_id}: {e}")
+        return default_path, False
+
+
 # Function to delete a document from Supabase
 def delete_document(doc_id, user, doc_type, filename):
-    file_path = f"{user}/{doc_type}/{filename}"
+    # Deduplicated uploads share one stored object, which goes with its last document
+    file_path, shared = _stored_object(doc_id, f"{user}/{doc_type}/{filename}")
 
     # Delete file from Supabase Storage
-    storage_response = supabase_client.storage.from_("kyc-documents").remove([file_path])
+    if not shared:
+        with span("storage.delete"):
+            storage_response = supabase_client.storage.from_("kyc-documents").remove([file_path])
 
-    # 🔹 Correct way to check for errors
-    if isinstance(storage_response, list) and len(storage_response) > 0 and "error" in storage_response[0]:
-        return False, f"Error deleting file from storage: {storage_response[0]['error']}"
+        # 🔹 Correct way to check for errors
+        if isinstance(storage_response, list) and len(storage_response) > 0 and "error" in storage_response[0]:
+            return False, f"Error deleting file from storage: {storage_response[0]['error']}"
 
     # Remove document metadata from Supabase Database
-    response = supabase_client.table("documents").delete().eq("document_id", doc_id).execute()
+    with span("db.delete", table="documents"):
+        response = supabase_client.table("documents").delete().eq("document_id", doc_id).execute()
+    if not shared:
+        kyc_manifest.record_delete(file_path)
+    invalidate("documents")
 
     if hasattr(response, "error") and response.error:
         return False, f"Error deleting document from database: {response.error.message}"
 
     return True, None
 
+@cached_read("documents", ttl=DOCUMENTS_CACHE_TTL)
+@timed("db.query_all")
 def get_all_documents():
     """Fetch all documents from the database."""
     response = supabase_client.table("documents").select("*").execute()
@@ -1,5 +1,8 @@
 import streamlit as st
-from database import upload_to_supabase, save_document_metadata, get_all_documents, delete_document
+from database import upload_many_to_supabase, save_documents_metadata, get_documents_for_user, count_documents, delete_document
+from job_queue import job_queue
+
+DOCUMENTS_PAGE_SIZE = 50
 
 def upload_documents():
     st.title("Upload Documents")
@@ -16,15 +19,34 @@ def upload_documents():
         # Upload file
         uploaded_files = st.file_uploader("Upload your documents", type=["pdf", "png", "jpg", "jpeg"], accept_multiple_files=True)
         
-        if uploaded_files:
-            for file in uploaded_files:
-                file_url, error = upload_to_supabase(file, user, doc_type)
-                
+        # The uploader keeps its files across reruns; only send each one once
+        if "uploaded_file_ids" not in st.session_state:
+            st.session_state["uploaded_file_ids"] = set()
+        new_files = [file for file in uploaded_files or [] if file.file_id not in st.session_state["uploaded_file_ids"]]
+
+        if new_files:
+            uploaded = []
+            for file, stored, error in upload_many_to_supabase(new_files, user, doc_type):
                 if error:
                     st.error(f"Failed to upload {file.name}")
                     continue
-                
-                save_document_metadata(user, doc_type, file.name, file_url)
+                uploaded.append((file, stored))
+
+            results = save_documents_metadata(user, doc_type, [(file.name, stored) for file, stored in uploaded])
+            for (file, stored), (doc_id, error) in zip(uploaded, results):
+                if error:
+                    st.error(f"Failed to save details for {file.name}: {error}")
+                    continue
+                st.session_state["uploaded_file_ids"].add(file.file_id)
+                if stored["deduplicated"]:
+                    st.success(f"Uploaded {file.name} (already stored, linked to the existing copy)")
+                    continue
+
+                # Extract in the background so the text is ready before an admin looks
+                try:
+                    job_queue.enqueue(user, stored["storage_path"].split("/", 1)[1], stored["content_hash"])
+                except Exception as e:
+                    print(f"Error queueing extraction for {file.name}: {e}")
                 st.success(f"Uploaded {file.name}")
 
     else:
@@ -36,8 +58,17 @@ def fetch_documents():
     if st.session_state.get("user_logged_in", False):
         user = st.session_state.get("username", "Guest")
 
-        # Fetch documents from Supabase
-        user_docs = [doc for doc in get_all_documents() if doc["user"] == user]
+        # Fetch one page of the user's documents from Supabase
+        total_docs = count_documents({"user": user})
+        page_count = max(1, -(-total_docs // DOCUMENTS_PAGE_SIZE))
+        page = st.number_input("Page", min_value=1, max_value=page_count, value=1) if page_count > 1 else 1
+
+        user_docs = get_documents_for_user(
+            user,
+            columns="document_id,user,type,filename,url,timestamp",
+            limit=DOCUMENTS_PAGE_SIZE,
+            offset=(page - 1) * DOCUMENTS_PAGE_SIZE,
+        )
 
         if user_docs:
             st.write("Uploaded Documents:")
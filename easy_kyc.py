@@ -1,16 +1,30 @@
+import json
+import os
+import time
+from urllib.parse import unquote
 import streamlit as st
 from database import supabase_client
-import google.generativeai as genai
-import os
+from cache import cached_read
+from kyc_fields import FIELD_LABELS, age_on, extract_fields, filter_id_numbers, lookup_field
+from metrics import observe, span
+from kyc_index import retrieve_context, sync_user_index
+from llm_client import get_gemini_model, get_llm_client
 
-# Configure Gemini API from environment variables
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-genai.configure(api_key=GEMINI_API_KEY)
+# The Gemini model is built on first use and reused for every chat turn
+GEMINI_MODEL_NAME = "gemini-1.5-pro"
+KYC_DATA_CACHE_TTL = 60  # Seconds kyc_data reads are reused across chat turns; saves invalidate them
 
-# Load Gemini model
-model = genai.GenerativeModel(model_name="gemini-1.5-pro")
+# Chat history is kept per customer. Recent messages stay verbatim within these
+# limits; older turns are folded into a short summary that is itself capped.
+EASY_KYC_HISTORY_MESSAGES = int(os.getenv("EASY_KYC_HISTORY_MESSAGES", "12"))
+EASY_KYC_HISTORY_CHARS = int(os.getenv("EASY_KYC_HISTORY_CHARS", "6000"))
+EASY_KYC_SUMMARY_CHARS = int(os.getenv("EASY_KYC_SUMMARY_CHARS", "2000"))
+MAX_CHAT_HISTORIES = 20  # Customers whose conversations a session keeps
+SUMMARY_QUESTION_CHARS = 120
+SUMMARY_ANSWER_CHARS = 200
 
 
+@cached_read("kyc_data", ttl=KYC_DATA_CACHE_TTL)
 def fetch_usernames():
     """Fetch unique usernames from the kyc_data table."""
     response = supabase_client.table("kyc_data").select("username").execute()
@@ -19,32 +33,186 @@ def fetch_usernames():
     return []
 
 
+@cached_read("kyc_data", ttl=KYC_DATA_CACHE_TTL)
 def fetch_extracted_text(username):
     """Fetch all extracted_data for a given username."""
     response = supabase_client.table("kyc_data").select("extracted_data").eq("username", username).execute()
     return [entry["extracted_data"] for entry in response.data] if response.data else []
 
 
-def generate_ai_response(user_input, kyc_texts):
-    """Use Gemini-1.5-Pro to chat with the KYC data."""
+@cached_read("kyc_data", ttl=KYC_DATA_CACHE_TTL)
+def fetch_fields(username):
+    """Structured fields for each of a user's documents, with the document they came from.
+
+    Rows saved before the fields column existed are parsed from their text here.
+    """
+    try:
+        response = (
+            supabase_client.table("kyc_data")
+            .select("document_type,original_file_url,fields,extracted_data")
+            .eq("username", username)
+            .execute()
+        )
+    except Exception as e:
+        print(f"Error fetching KYC fields for {username}: {e}")
+        return []
+
+    documents = []
+    for entry in response.data or []:
+        fields = entry.get("fields")
+        if not fields:
+            try:
+                fields = extract_fields(json.loads(entry.get("extracted_data") or '""'))
+            except (TypeError, ValueError):
+                fields = extract_fields(entry.get("extracted_data"))
+        if fields:
+            documents.append(
+                {"document_type": entry.get("document_type"), "source": entry.get("original_file_url"), "fields": fields}
+            )
+    return documents
+
+
+def _source_label(document):
+    file_name = unquote(os.path.basename((document.get("source") or "").split("?")[0]))
+    return " - ".join(part for part in (document.get("document_type"), file_name) if part) or "unknown document"
+
+
+def answer_from_fields(user_input, documents):
+    """Answers a direct lookup ("What is the DOB?") from stored fields, or returns None."""
+    field = lookup_field(user_input)
+    if field is None:
+        return None
+
+    values = {}  # value -> sources, so agreeing documents are listed once
+    for document in documents:
+        fields = document["fields"]
+        if field == "age":
+            value = f"{age_on(fields['dob'])} (born {fields['dob']})" if fields.get("dob") else None
+        elif field == "id_numbers":
+            matching = filter_id_numbers(user_input, fields.get("id_numbers") or [])
+            value = ", ".join(f"{item['type']}: {item['value']}" for item in matching)
+        else:
+            value = fields.get(field)
+        if not value:
+            continue
+        values.setdefault(value, []).append(_source_label(document))
+    if not values:
+        return None
+
+    label = FIELD_LABELS[field]
+    if len(values) == 1:
+        value, sources = next(iter(values.items()))
+        return f"{label}: {value} (from {', '.join(sources)})"
+    lines = [f"{label} differs between documents:"]
+    lines += [f"- {value} (from {', '.join(sources)})" for value, sources in values.items()]
+    return "\n".join(lines)
+
+
+def get_history(username):
+    """The selected customer's conversation in this session, created on first use."""
+    histories = st.session_state.setdefault("chat_histories", {})
+    history = histories.pop(username, None) or {"messages": [], "summary": [], "compacted_turns": 0}
+    histories[username] = history  # Most recently used last
+    while len(histories) > MAX_CHAT_HISTORIES:
+        histories.pop(next(iter(histories)))
+    return history
+
+
+def _shorten(text, limit):
+    text = " ".join(str(text).split())
+    return text if len(text) <= limit else text[: limit - 1] + "…"
+
+
+def compact_history(history):
+    """Folds the oldest turns into the summary until the recent messages fit the limits.
+
+    The most recent turn always stays as messages, truncated if it is too long by itself.
+    """
+    messages = history["messages"]
+    while len(messages) > 2 and (
+        len(messages) > EASY_KYC_HISTORY_MESSAGES
+        or sum(len(message["content"]) for message in messages) > EASY_KYC_HISTORY_CHARS
+    ):
+        question = messages.pop(0)
+        answer = messages.pop(0) if messages and messages[0]["role"] != "user" else None
+        line = f"Q: {_shorten(question['content'], SUMMARY_QUESTION_CHARS)}"
+        if answer:
+            line += f" A: {_shorten(answer['content'], SUMMARY_ANSWER_CHARS)}"
+        history["summary"].append(line)
+        history["compacted_turns"] += 1
+
+    # The latest turn is kept, but cut down if it alone is over the budget
+    if sum(len(message["content"]) for message in messages) > EASY_KYC_HISTORY_CHARS:
+        limit = EASY_KYC_HISTORY_CHARS // len(messages)
+        for message in messages:
+            message["content"] = _shorten(message["content"], limit)
+
+    summary = history["summary"]
+    while summary and sum(len(line) + 1 for line in summary) > EASY_KYC_SUMMARY_CHARS:
+        summary.pop(0)
+
+
+def build_prompt(user_input, kyc_texts, history=None):
+    """The chat prompt: conversation so far, the relevant KYC text and the question."""
+    parts = []
+    if history and history["summary"]:
+        parts.append("Earlier conversation (summarized):\n" + "\n".join(history["summary"]))
+    if history and history["messages"]:
+        parts.append(
+            "Recent conversation:\n"
+            + "\n".join(
+                f"{'User' if message['role'] == 'user' else 'Assistant'}: {message['content']}"
+                for message in history["messages"]
+            )
+        )
     combined_text = "\n".join(kyc_texts)
-    prompt = f"User's KYC Information:\n{combined_text}\n\nUser Query: {user_input}\n\nAnswer:"
+    parts.append(f"User's KYC Information:\n{combined_text}\n\nUser Query: {user_input}\n\nAnswer:")
+    return "\n\n".join(parts)
+
+
+def stream_ai_response(user_input, kyc_texts, documents=None, history=None):
+    """Answer a question about the KYC data, yielding the text as it is produced.
+
+    Direct field lookups are answered from documents (see fetch_fields)
+    without calling the LLM; anything else is streamed from Gemini-1.5-Pro.
+    kyc_texts should be the chunks relevant to the question, not every document.
+    """
+    if documents:
+        with span("easy_kyc.fields") as attrs:
+            answer = answer_from_fields(user_input, documents)
+            attrs["hits"] = int(answer is not None)
+        if answer is not None:
+            yield answer
+            return
 
+    prompt = build_prompt(user_input, kyc_texts, history)
+    response_chars = 0
     try:
-        response = model.generate_content(prompt)
-        return response.text.strip() if response and hasattr(response, "text") else "I'm unable to generate a response."
+        with span("llm.chat", prompt_chars=len(prompt)) as attrs:
+            started = time.perf_counter()
+            for text in get_llm_client().generate_stream(prompt, get_gemini_model(GEMINI_MODEL_NAME)):
+                if not response_chars:
+                    observe("llm.first_chunk", time.perf_counter() - started)
+                response_chars += len(text)
+                yield text
+            attrs["response_chars"] = response_chars
     except Exception as e:
-        return f"Error in AI response: {str(e)}"
+        yield f"{chr(10) * 2 if response_chars else ''}Error in AI response: {str(e)}"
+        return
+
+    if not response_chars:
+        yield "I'm unable to generate a response."
+
+
+def generate_ai_response(user_input, kyc_texts, documents=None, history=None):
+    """Blocking form of stream_ai_response that returns the whole answer."""
+    return "".join(stream_ai_response(user_input, kyc_texts, documents, history)).strip()
 
 
 def easy_kyc():
     """Streamlit UI for Easy KYC."""
     st.title("🔍 Easy KYC - AI Chatbot for KYC Data")
 
-    # Ensure conversation history exists
-    if "messages" not in st.session_state:
-        st.session_state.messages = []
-
     # Step 1: Select a username
     usernames = fetch_usernames()
     if not usernames:
@@ -57,6 +225,12 @@ def easy_kyc():
     if selected_user:
         kyc_texts = fetch_extracted_text(selected_user)
 
+        # Embed any documents processed since the last visit
+        try:
+            sync_user_index(selected_user)
+        except Exception as e:
+            print(f"Error updating KYC index for {selected_user}: {e}")
+
         if not kyc_texts:
             st.warning("No extracted text found for this user.")
             return
@@ -69,8 +243,14 @@ def easy_kyc():
         # Step 3: Chatbot Interaction
         st.subheader("💬 AI-Powered KYC Assistant")
 
+        # Each customer has their own conversation
+        history = get_history(selected_user)
+        if history["compacted_turns"]:
+            with st.expander(f"Earlier conversation ({history['compacted_turns']} turns, summarized)"):
+                st.text("\n".join(history["summary"]))
+
         # Display message history
-        for msg in st.session_state.messages:
+        for msg in history["messages"]:
             with st.chat_message(msg["role"]):
                 st.markdown(msg["content"])
 
@@ -78,15 +258,23 @@ def easy_kyc():
         user_query = st.chat_input("Ask about this user's KYC details...")
 
         if user_query:
-            # Add user message to session state
-            st.session_state.messages.append({"role": "user", "content": user_query})
+            with st.chat_message("user"):
+                st.markdown(user_query)
 
-            # Get AI response
-            ai_response = generate_ai_response(user_query, kyc_texts)
+            # Send only the chunks relevant to the question, falling back to everything
+            try:
+                context = retrieve_context(selected_user, user_query) or kyc_texts
+            except Exception as e:
+                print(f"Error retrieving KYC context for {selected_user}: {e}")
+                context = kyc_texts
 
-            # Add AI response to session state
-            st.session_state.messages.append({"role": "bot", "content": ai_response})
-
-            # Display the latest AI response
+            # Stream the AI response as it arrives; field lookups are answered from stored data
             with st.chat_message("bot"):
-                st.markdown(ai_response)
+                ai_response = st.write_stream(
+                    stream_ai_response(user_query, context, fetch_fields(selected_user), history)
+                )
+
+            # Add both messages to this customer's history, summarizing old turns past the limits
+            history["messages"].append({"role": "user", "content": user_query})
+            history["messages"].append({"role": "bot", "content": ai_response})
+            compact_history(history)
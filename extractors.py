@@ -0,0 +1,68 @@
+import os
+import pytesseract
+from dotenv import load_dotenv
+from cache import cached_extractor
+from image_prep import load_image, prep_settings, prepare_for_ocr
+from ocr_engine import image_to_string
+from metrics import timed
+from ocr import OCR_MAX_PAGES
+from pdf_engine import PDF_MIN_PAGE_CHARS, extract_pdf_text
+
+# Load environment variables
+load_dotenv()
+
+# Set Tesseract OCR Path
+pytesseract.pytesseract.tesseract_cmd = os.getenv("TESSERACT_CMD", r"C:\Program Files\Tesseract-OCR\tesseract.exe")
+
+IMAGE_EXTENSIONS = ["png", "jpg", "jpeg", "tiff", "bmp", "webp"]
+
+
+@timed("extract.image")
+@cached_extractor("kyc.image", version=2, settings={"engine": "tesseract", "prep": prep_settings()})
+def extract_text_from_image(file_path):
+    """Extracts text from an image file, downscaled and cleaned up for OCR first."""
+    image = prepare_for_ocr(load_image(file_path))
+    text = image_to_string(image)
+    return text.strip()
+
+
+@timed("extract.pdf")
+@cached_extractor(
+    "kyc.pdf",
+    version=3,
+    settings={
+        "text_layer": "pymupdf",
+        "ocr": "tesseract",
+        "max_pages": OCR_MAX_PAGES,
+        "min_chars": PDF_MIN_PAGE_CHARS,
+        "prep": prep_settings(),
+    },
+)
+def extract_text_from_pdf(file_path):
+    """Extract text from a PDF. Pages with a text layer are read directly; scanned pages are OCR'd with Tesseract."""
+    try:
+        extracted_text = extract_pdf_text(file_path)
+        return extracted_text if extracted_text else "No extractable text found in the PDF."
+
+    except Exception as e:
+        return f"Error extracting text from PDF: {str(e)}"
+
+
+def document_type(file_name):
+    """Returns 'image' or 'pdf' for supported files, None otherwise."""
+    file_extension = file_name.split(".")[-1].lower()
+    if file_extension in IMAGE_EXTENSIONS:
+        return "image"
+    if file_extension == "pdf":
+        return "pdf"
+    return None
+
+
+def extract_document(file_path, file_name):
+    """Extracts text from a downloaded document, returning (document_type, text)."""
+    doc_type = document_type(file_name)
+    if doc_type == "image":
+        return doc_type, extract_text_from_image(file_path)
+    if doc_type == "pdf":
+        return doc_type, extract_text_from_pdf(file_path)
+    raise ValueError(f"Unsupported file format: {file_name}")
@@ -0,0 +1,131 @@
+import os
+import pymupdf
+from PIL import Image, ImageOps
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Tesseract reads best around 300 DPI; rendering finer only costs time
+OCR_TARGET_DPI = int(os.getenv("OCR_TARGET_DPI", "300"))
+OCR_MIN_DPI = int(os.getenv("OCR_MIN_DPI", "150"))
+# Largest image handed to Tesseract; bigger renders and photos are scaled down to fit
+OCR_MAX_PIXELS = int(os.getenv("OCR_MAX_PIXELS", 3000 * 3000))
+OCR_GRAYSCALE = os.getenv("OCR_GRAYSCALE", "1") == "1"
+OCR_BINARIZE = os.getenv("OCR_BINARIZE", "0") == "1"
+
+
+def prep_settings():
+    """The settings that change OCR input, for use in extraction cache keys."""
+    return {
+        "target_dpi": OCR_TARGET_DPI,
+        "min_dpi": OCR_MIN_DPI,
+        "max_pixels": OCR_MAX_PIXELS,
+        "grayscale": OCR_GRAYSCALE,
+        "binarize": OCR_BINARIZE,
+    }
+
+
+def pixmap_to_image(pix):
+    """Wraps a PyMuPDF pixmap's samples in a PIL image without an encode/decode round trip."""
+    mode = {1: "L", 3: "RGB", 4: "RGBA"}[pix.n]
+    return Image.frombuffer(mode, (pix.width, pix.height), pix.samples, "raw", mode, pix.stride, 1)
+
+
+def page_dpi(page, target_dpi=None, min_dpi=None, max_pixels=None):
+    """Picks the render resolution for a PDF page.
+
+    A scanned page is rendered at the resolution of its scan (anything finer
+    is interpolation), clamped to [min_dpi, target_dpi], and never so fine
+    that the render exceeds max_pixels.
+    """
+    target_dpi = target_dpi or OCR_TARGET_DPI
+    min_dpi = min_dpi or OCR_MIN_DPI
+    max_pixels = max_pixels or OCR_MAX_PIXELS
+
+    dpi = target_dpi
+    scan_dpis = []
+    for image in page.get_images():
+        xref, width = image[0], image[2]
+        for rect in page.get_image_rects(xref):
+            if rect.width > 0:
+                scan_dpis.append(width / (rect.width / 72))
+    if scan_dpis:
+        dpi = max(min_dpi, min(target_dpi, max(scan_dpis)))
+
+    # Page size is in points (1/72 inch)
+    area_inches = (page.rect.width / 72) * (page.rect.height / 72)
+    if area_inches > 0:
+        dpi = min(dpi, (max_pixels / area_inches) ** 0.5)
+    return int(dpi)
+
+
+def render_page(page, dpi=None, grayscale=None):
+    """Renders a PDF page straight into a PIL image."""
+    grayscale = OCR_GRAYSCALE if grayscale is None else grayscale
+    colorspace = pymupdf.csGRAY if grayscale else pymupdf.csRGB
+    pix = page.get_pixmap(dpi=dpi or page_dpi(page), colorspace=colorspace, alpha=False)
+    return pixmap_to_image(pix)
+
+
+def load_image(file_path, max_pixels=None, grayscale=None):
+    """Opens an image file, upright and no larger than max_pixels.
+
+    JPEGs are decoded at reduced size by the decoder itself (draft mode),
+    so a 12-megapixel phone photo is never fully decoded just to be shrunk.
+    """
+    max_pixels = max_pixels or OCR_MAX_PIXELS
+    grayscale = OCR_GRAYSCALE if grayscale is None else grayscale
+
+    image = Image.open(file_path)
+    width, height = image.size
+    scale = min(1.0, (max_pixels / (width * height)) ** 0.5)
+
+    if image.format == "JPEG":
+        # draft() picks the largest 1/2, 1/4 or 1/8 scale still at least this size
+        image.draft("L" if grayscale else "RGB", (int(width * scale), int(height * scale)))
+
+    image = ImageOps.exif_transpose(image)  # Phone photos are often stored sideways
+    image = image.convert("L" if grayscale else "RGB")
+
+    if image.width * image.height > max_pixels:
+        scale = (max_pixels / (image.width * image.height)) ** 0.5
+        image = image.resize((int(image.width * scale), int(image.height * scale)), Image.BILINEAR)
+    return image
+
+
+def otsu_threshold(image):
+    """Grey level that best separates ink from paper in a grayscale image."""
+    histogram = image.histogram()[:256]
+    total = sum(histogram)
+    weighted_total = sum(level * count for level, count in enumerate(histogram))
+
+    best_level, best_variance = 127, -1.0
+    background = background_weighted = 0
+    for level, count in enumerate(histogram):
+        background += count
+        if background == 0:
+            continue
+        foreground = total - background
+        if foreground == 0:
+            break
+        background_weighted += level * count
+        mean_background = background_weighted / background
+        mean_foreground = (weighted_total - background_weighted) / foreground
+        variance = background * foreground * (mean_background - mean_foreground) ** 2
+        if variance > best_variance:
+            best_level, best_variance = level, variance
+    return best_level
+
+
+def binarize(image, threshold=None):
+    """Converts to pure black and white at threshold (Otsu's method by default)."""
+    image = image.convert("L")
+    threshold = otsu_threshold(image) if threshold is None else threshold
+    return image.point(lambda level: 255 if level > threshold else 0, mode="1")
+
+
+def prepare_for_ocr(image, binarize_image=None):
+    """Applies the optional final clean-up before an image goes to Tesseract."""
+    binarize_image = OCR_BINARIZE if binarize_image is None else binarize_image
+    return binarize(image) if binarize_image else image
@@ -0,0 +1,254 @@
+"""Durable queue of extraction jobs, drained by background workers.
+
+Uploads enqueue one job per new stored file; workers download, extract and
+save it to kyc_data the same way the "Process Documents" button does, so
+the text is ready before an admin opens the customer. Jobs live in SQLite
+(JOB_QUEUE_PATH), which several processes can share: the app's own workers
+and any `python kyc_worker.py --jobs` processes claim jobs without
+overlapping. A job whose worker dies is picked up again once its lease runs
+out, and failed jobs are retried up to JOB_MAX_ATTEMPTS times.
+"""
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import closing
+from dotenv import load_dotenv
+from cache import CACHE_DIR, is_extraction_error
+from metrics import register_gauge, span
+
+# Load environment variables
+load_dotenv()
+
+JOB_QUEUE_PATH = os.getenv("JOB_QUEUE_PATH", os.path.join(CACHE_DIR, "jobs.sqlite3"))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))  # Background workers per app process; 0 leaves jobs to kyc_worker.py
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "900"))  # After this a running job counts as abandoned
+JOB_POLL_INTERVAL = 2.0  # Seconds an idle worker waits before checking the queue again
+JOB_RETRY_DELAY = 30  # Seconds before a failed job's next attempt, times the attempts so far
+
+STATUSES = ("queued", "running", "done", "failed")
+
+SCHEMA = """
+create table if not exists jobs (
+    id integer primary key autoincrement,
+    username text not null,
+    file_path text not null,
+    content_hash text,
+    status text not null default 'queued',
+    attempts integer not null default 0,
+    error text,
+    worker text,
+    enqueued_at real not null,
+    run_after real not null default 0,
+    started_at real,
+    finished_at real,
+    lease_until real,
+    unique (username, file_path)
+);
+create index if not exists jobs_status_idx on jobs (status, id);
+"""
+
+
+class JobQueue:
+    def __init__(self, path=JOB_QUEUE_PATH, max_attempts=JOB_MAX_ATTEMPTS, lease_seconds=JOB_LEASE_SECONDS):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self.wakeup = threading.Event()  # Set on enqueue so idle workers in this process start at once
+        self._ready = False
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        connection.row_factory = sqlite3.Row
+        if not self._ready:
+            with self._lock:
+                if not self._ready:
+                    os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                    connection.execute("pragma journal_mode=wal")
+                    connection.executescript(SCHEMA)
+                    self._ready = True
+        return connection
+
+    def enqueue(self, username, file_path, content_hash=None):
+        """Queues file_path (relative to the user's folder). Returns the job id.
+
+        A file that is already queued or running keeps its job; one that
+        finished or failed is queued again, since its content may have changed.
+        """
+        now = time.time()
+        with closing(self._connect()) as connection:
+            connection.execute(
+                """
+                insert into jobs (username, file_path, content_hash, enqueued_at) values (?, ?, ?, ?)
+                on conflict (username, file_path) do update set
+                    content_hash = excluded.content_hash, status = 'queued', attempts = 0, error = null,
+                    enqueued_at = excluded.enqueued_at, run_after = 0, started_at = null, finished_at = null,
+                    lease_until = null
+                where jobs.status in ('done', 'failed')
+                """,
+                (username, file_path, content_hash, now),
+            )
+            job_id = connection.execute(
+                "select id from jobs where username = ? and file_path = ?", (username, file_path)
+            ).fetchone()["id"]
+        self.wakeup.set()
+        return job_id
+
+    def claim(self, worker):
+        """Marks the oldest runnable job as running for worker and returns it, or None."""
+        now = time.time()
+        with closing(self._connect()) as connection:
+            connection.execute("begin immediate")  # One claimer at a time across processes
+            try:
+                # A job whose workers keep dying (e.g. OOM) has used its attempts too
+                connection.execute(
+                    """
+                    update jobs set status = 'failed', error = 'Worker stopped before finishing', finished_at = ?,
+                        lease_until = null
+                    where status = 'running' and lease_until < ? and attempts >= ?
+                    """,
+                    (now, now, self.max_attempts),
+                )
+                row = connection.execute(
+                    """
+                    select * from jobs
+                    where (status = 'queued' and run_after <= ?)
+                        or (status = 'running' and lease_until < ? and attempts < ?)
+                    order by id limit 1
+                    """,
+                    (now, now, self.max_attempts),
+                ).fetchone()
+                if row is None:
+                    connection.execute("commit")
+                    return None
+                connection.execute(
+                    """
+                    update jobs set status = 'running', attempts = attempts + 1, worker = ?,
+                        started_at = ?, lease_until = ? where id = ?
+                    """,
+                    (worker, now, now + self.lease_seconds, row["id"]),
+                )
+                connection.execute("commit")
+            except BaseException:
+                connection.execute("rollback")
+                raise
+        return {**dict(row), "status": "running", "attempts": row["attempts"] + 1, "worker": worker}
+
+    def complete(self, job_id):
+        with closing(self._connect()) as connection:
+            connection.execute(
+                "update jobs set status = 'done', error = null, finished_at = ?, lease_until = null where id = ?",
+                (time.time(), job_id),
+            )
+
+    def fail(self, job_id, error):
+        """Records error; the job is queued again, after a delay, unless it has used all its attempts."""
+        now = time.time()
+        with closing(self._connect()) as connection:
+            connection.execute(
+                """
+                update jobs set error = ?, finished_at = ?, lease_until = null, run_after = ? + attempts * ?,
+                    status = case when attempts < ? then 'queued' else 'failed' end
+                where id = ?
+                """,
+                (str(error), now, now, JOB_RETRY_DELAY, self.max_attempts, job_id),
+            )
+
+    def jobs_for_user(self, username):
+        """The user's jobs, newest first."""
+        with closing(self._connect()) as connection:
+            rows = connection.execute("select * from jobs where username = ? order by id desc", (username,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def counts(self, username=None):
+        """Jobs per status, for one user or the whole queue."""
+        query = "select status, count(*) as n from jobs"
+        params = ()
+        if username is not None:
+            query += " where username = ?"
+            params = (username,)
+        with closing(self._connect()) as connection:
+            rows = connection.execute(query + " group by status", params).fetchall()
+        counts = dict.fromkeys(STATUSES, 0)
+        counts.update({row["status"]: row["n"] for row in rows})
+        return counts
+
+
+job_queue = JobQueue()
+
+
+def run_job(job):
+    """Downloads, extracts and saves one queued file, then updates the user's Easy KYC index."""
+    from kyc import download_file, save_kyc_data
+    from extractors import extract_document
+    from kyc_index import sync_user_index
+    from spool import release
+
+    username, file_path = job["username"], job["file_path"]
+    with span("job.extract"):
+        local_path, file_url = download_file(username, file_path)
+        try:
+            document_type, extracted_text = extract_document(local_path, file_path)
+        finally:
+            release(local_path)
+        if is_extraction_error(extracted_text):
+            raise RuntimeError(extracted_text)  # Extractors report failures as text; retry instead of saving it
+        save_kyc_data(username, document_type, extracted_text, file_url)
+
+    try:
+        sync_user_index(username)
+    except Exception as e:
+        print(f"Error updating KYC index for {username}: {e}")
+
+
+def work(queue=job_queue, stop=None, idle_exit=False, worker=None):
+    """Claims and runs jobs until stop is set, or the queue is empty when idle_exit is True.
+
+    Returns the number of jobs run.
+    """
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}"
+    stop = stop or threading.Event()
+    ran = 0
+    while not stop.is_set():
+        try:
+            job = queue.claim(worker)
+        except sqlite3.Error as e:
+            print(f"Error claiming extraction job: {e}", file=sys.stderr)
+            job = None
+        if job is None:
+            if idle_exit:
+                break
+            queue.wakeup.wait(JOB_POLL_INTERVAL)
+            queue.wakeup.clear()
+            continue
+
+        try:
+            run_job(job)
+            queue.complete(job["id"])
+        except Exception as e:
+            print(f"Extraction job {job['id']} ({job['username']}/{job['file_path']}) failed: {e}", file=sys.stderr)
+            queue.fail(job["id"], f"{type(e).__name__}: {e}")
+        ran += 1
+    return ran
+
+
+_workers = []
+_workers_lock = threading.Lock()
+
+
+def start_workers(count=None, queue=job_queue):
+    """Starts count daemon workers (JOB_WORKERS by default) once per process. Safe to call on every rerun."""
+    count = JOB_WORKERS if count is None else count
+    with _workers_lock:
+        while len(_workers) < count:
+            thread = threading.Thread(target=work, args=(queue,), name=f"job-worker-{len(_workers)}", daemon=True)
+            thread.start()
+            _workers.append(thread)
+    return len(_workers)
+
+
+register_gauge("jobs", lambda: job_queue.counts())
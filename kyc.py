@@ -1,147 +1,186 @@
-import pytesseract
-from PIL import Image
 import streamlit as st
 import json
-import tempfile
 import os
-import io
-import pymupdf
-fitz = pymupdf
-from pdfminer.high_level import extract_text
-import requests
+import functools
+from urllib.parse import unquote
 from dotenv import load_dotenv
-from llama_index.llms.gemini import Gemini
-from llama_index.embeddings.gemini import GeminiEmbedding
-from llama_index.core import Document, Settings, SimpleDirectoryReader, VectorStoreIndex
-from database import supabase_client  # Ensure this is properly configured
+from database import supabase_client, insert_rows, kyc_manifest  # Ensure this is properly configured
+from extractors import document_type, extract_document, extract_text_from_image, extract_text_from_pdf
+from kyc_pipeline import run_pipeline
+from spool import release, spool_url
+from cache import cached_read, invalidate, is_extraction_error
+from job_queue import job_queue
+from kyc_fields import extract_fields
+from metrics import span
 
 # Load environment variables
 load_dotenv()
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-
-# Configure Gemini
-llm = Gemini(api_key=GEMINI_API_KEY)
-embed_model = GeminiEmbedding(api_key=GEMINI_API_KEY)
-Settings.embed_model = embed_model
-
-# Set Tesseract OCR Path
-pytesseract.pytesseract.tesseract_cmd = "C:\Program Files\Tesseract-OCR\\tesseract.exe"
 
 # Supabase bucket name
 BUCKET_NAME = "kyc-documents"
+KYC_DATA_CACHE_TTL = 30  # Seconds saved extractions are reused; this process's saves invalidate them
 
 
 def list_users():
     """Fetches user folders inside the 'kyc-documents' bucket."""
-    response = supabase_client.storage.from_(BUCKET_NAME).list()
-    if response:
-        return [folder["name"] for folder in response if folder["name"] != ".emptyFolder"]
-    return []
+    return kyc_manifest.users()
 
 
 def list_subfolders(username):
     """Lists subfolders inside a user's folder (e.g., 'Address Proof', 'ID Proof')."""
-    response = supabase_client.storage.from_(BUCKET_NAME).list(username + "/")
-    if response:
-        return [folder["name"] for folder in response if folder["name"] != ".emptyFolder"]
-    return []
+    return kyc_manifest.folders(username)
 
 
 def list_files_in_subfolders(username, subfolders):
-    """Fetches all actual files inside the selected subfolders."""
-    files_to_process = []
-    for folder in subfolders:
-        folder_path = f"{username}/{folder}/"
-        response = supabase_client.storage.from_(BUCKET_NAME).list(folder_path)
-        if response:
-            for file in response:
-                files_to_process.append(f"{folder}/{file['name']}")  # Store relative path
-    return files_to_process
+    """Fetches all actual files inside the selected subfolders, including nested ones."""
+    entries = kyc_manifest.objects([username], subfolders)
+    return [entry["path"].split("/", 1)[1] for entry in entries]  # Store relative path
 
 
 def download_file(username, file_path):
-    """Downloads a file from the selected user's subfolder in Supabase Storage."""
+    """Downloads a file from the selected user's subfolder in Supabase Storage.
+
+    The file is streamed into the local spool directory, which cleans up after
+    itself once the path is passed to spool.release().
+    """
     full_path = f"{username}/{file_path}"
     file_url = supabase_client.storage.from_(BUCKET_NAME).get_public_url(full_path)
 
-    response = requests.get(file_url, stream=True)
-    if response.status_code == 200:
-        temp_file = tempfile.NamedTemporaryFile(delete=False)
-        temp_file.write(response.content)
-        temp_file.close()
-        return temp_file.name, file_url  # Return local file path and file URL
-    else:
-        raise Exception(f"Failed to download file: {file_url}")
-
+    _, extension = os.path.splitext(file_path)
+    local_path = spool_url(file_url, suffix=extension.lower())
+    return local_path, file_url  # Return local file path and file URL
 
-def extract_text_from_image(file_path):
-    """Extracts text from an image file."""
-    image = Image.open(file_path)
-    text = pytesseract.image_to_string(image)
-    return text.strip()
 
+def process_selected_documents(username, file_list):
+    """Processes selected documents for a user, showing each result as soon as it is saved."""
+    supported_files = []
+    for file_name in file_list:
+        if document_type(file_name) is None:
+            st.error(f"❌ Unsupported file format: {file_name}")
+        else:
+            supported_files.append(file_name)
 
-def extract_text_from_pdf(file_path):
-    """Extract text from a PDF. Uses pdfminer.six for digital PDFs and Tesseract OCR for scanned PDFs."""
-    try:
-        # Try extracting text normally
-        text = extract_text(file_path).strip()
-        if text:
-            return text  # ✅ Return if text is found
-
-        # If no text is found, apply OCR using PyMuPDF
-        doc = fitz.open(file_path)
-        ocr_text = []
-
-        for page in doc:
-            pix = page.get_pixmap()  # Render page as an image
-            img = Image.open(io.BytesIO(pix.tobytes("png"))) # Convert to PIL image
-            ocr_text.append(pytesseract.image_to_string(img))  # Perform OCR
+    if not supported_files:
+        return
 
-        extracted_text = "\n".join(ocr_text).strip()
-        return extracted_text if extracted_text else "No extractable text found in the PDF."
+    progress = st.progress(0.0, text="Processing documents...")
+    results = run_pipeline(
+        supported_files,
+        download=functools.partial(download_file, username),
+        extract=extract_document,
+        save_batch=functools.partial(save_kyc_data_batch, username),
+        release=release,
+    )
+
+    for done, result in enumerate(results, start=1):
+        file_name = result["file_name"]
+        if result["error"]:
+            st.error(f"❌ {file_name}: {result['error']}")
+        else:
+            st.success(f"✅ {file_name} processed successfully!")
+            st.subheader(f"Extracted Data from {file_name}:")
+            st.write(result["extracted_text"])
+        progress.progress(done / len(supported_files), text=f"Processed {done} of {len(supported_files)} documents")
 
+    # Embed the new text now so Easy KYC doesn't have to on its first question
+    from kyc_index import sync_user_index
+    try:
+        sync_user_index(username)
     except Exception as e:
-        return f"Error extracting text from PDF: {str(e)}"
+        st.warning(f"Extracted text was saved but could not be indexed for Easy KYC: {e}")
 
 
-def process_selected_documents(username, file_list):
-    """Processes selected documents for a user."""
-    for file_name in file_list:
-        local_file_path, file_url = download_file(username, file_name)
-        file_extension = file_name.split(".")[-1].lower()
-
-        st.write(f"📂 Processing: {file_name} (Type: {file_extension})")  # Debug log
+@cached_read("kyc_data", ttl=KYC_DATA_CACHE_TTL)
+def fetch_saved_documents(username):
+    """The user's documents already extracted into kyc_data."""
+    with span("db.query", table="kyc_data") as attrs:
+        response = (
+            supabase_client.table("kyc_data")
+            .select("document_type,original_file_url,extracted_data")
+            .eq("username", username)
+            .execute()
+        )
+        attrs["rows"] = len(response.data or [])
+    return response.data or []
 
-        if file_extension in ["png", "jpg", "jpeg", "tiff", "bmp", "webp"]:
-            extracted_text = extract_text_from_image(local_file_path)
-            document_type = "image"
-        elif file_extension == "pdf":
-            extracted_text = extract_text_from_pdf(local_file_path)  # ✅ Calls correct function
-            document_type = "pdf"
-        else:
-            st.error(f"❌ Unsupported file format: {file_name}")
-            continue  # Skip unsupported files
 
-        save_kyc_data(username, document_type, extracted_text, file_url)
-        st.success(f"✅ {file_name} processed successfully!")
-        st.subheader(f"Extracted Data from {file_name}:")
-        st.write(extracted_text)
+def _saved_text(row):
+    try:
+        return json.loads(row["extracted_data"])
+    except (TypeError, ValueError):
+        return row["extracted_data"]
 
 
+def show_job_status(username):
+    """Shows how far background extraction of the user's uploads has got."""
+    counts = job_queue.counts(username)
+    if not any(counts.values()):
+        return
 
-def save_kyc_data(username, document_type, extracted_data, file_url):
-    """Saves extracted KYC details into Supabase."""
-    data = {
+    st.info(
+        f"Background extraction: {counts['done']} done, {counts['running']} running, "
+        f"{counts['queued']} queued, {counts['failed']} failed"
+    )
+    if counts["failed"]:
+        with st.expander("Failed extraction jobs"):
+            for job in job_queue.jobs_for_user(username):
+                if job["status"] == "failed":
+                    st.write(f"❌ {job['file_path']}: {job['error']}")
+    if counts["queued"] or counts["running"]:
+        st.button("Refresh status")  # Clicking reruns the page
+
+
+def pending_files(username, file_list):
+    """Files neither saved in kyc_data nor queued or running in the background."""
+    extracted_urls = {row["original_file_url"] for row in fetch_saved_documents(username)}
+    statuses = {job["file_path"]: job["status"] for job in job_queue.jobs_for_user(username)}
+    bucket = supabase_client.storage.from_(BUCKET_NAME)
+    return [
+        file_path
+        for file_path in file_list
+        if statuses.get(file_path) not in ("queued", "running", "done")
+        and bucket.get_public_url(f"{username}/{file_path}") not in extracted_urls
+    ]
+
+
+def _kyc_row(username, document_type, extracted_data, file_url):
+    return {
         "username": username,
         "document_type": document_type,
         "extracted_data": json.dumps(extracted_data),
+        "fields": extract_fields(extracted_data),
         "original_file_url": file_url,
     }
-    response = supabase_client.table("kyc_data").insert(data).execute()
+
+
+def save_kyc_data(username, document_type, extracted_data, file_url):
+    """Saves extracted KYC details into Supabase."""
+    data = _kyc_row(username, document_type, extracted_data, file_url)
+    with span("db.insert", table="kyc_data", rows=1):
+        response = supabase_client.table("kyc_data").insert(data).execute()
+    invalidate("kyc_data")
     return response
 
 
+def save_kyc_data_batch(username, results):
+    """Saves several extracted documents for a user with a single insert.
+
+    Returns one error (or None) per result. Results whose text is an
+    extractor's error message are reported as errors, not saved.
+    """
+    errors = [result["extracted_text"] if is_extraction_error(result["extracted_text"]) else None for result in results]
+    to_save = [i for i, error in enumerate(errors) if error is None]
+    if to_save:
+        rows = [
+            _kyc_row(username, results[i]["document_type"], results[i]["extracted_text"], results[i]["file_url"])
+            for i in to_save
+        ]
+        for i, error in zip(to_save, insert_rows("kyc_data", rows)):
+            errors[i] = error
+        invalidate("kyc_data")
+    return errors
+
+
 def know_your_customer():
     st.title("Know Your Customer (KYC)")
 
@@ -154,6 +193,19 @@ def know_your_customer():
     selected_user = st.selectbox("Select a User", users)
 
     if selected_user:
+        # Uploads are extracted in the background; show what is already done
+        try:
+            show_job_status(selected_user)
+        except Exception as e:
+            print(f"Error reading extraction jobs for {selected_user}: {e}")
+
+        saved_documents = fetch_saved_documents(selected_user)
+        if saved_documents:
+            with st.expander(f"📄 Extracted documents ({len(saved_documents)})"):
+                for row in saved_documents:
+                    st.subheader(os.path.basename(unquote((row["original_file_url"] or "").split("?")[0])))
+                    st.write(_saved_text(row))
+
         # **Step 2: Select Multiple Folders**
         subfolders = list_subfolders(selected_user)
         if not subfolders:
@@ -170,5 +222,20 @@ def know_your_customer():
                 st.warning("No files found inside selected folders.")
                 return
 
+            try:
+                pending = pending_files(selected_user, files_to_process)
+            except Exception as e:
+                print(f"Error checking extracted documents for {selected_user}: {e}")
+                pending = files_to_process
+            done = len(files_to_process) - len(pending)
+            if done:
+                st.caption(f"{done} of {len(files_to_process)} documents are extracted or being extracted in the background.")
+            reprocess = st.checkbox("Reprocess extracted documents")
+
             if st.button("Process Documents"):
-                process_selected_documents(selected_user, files_to_process)
+                if reprocess:
+                    process_selected_documents(selected_user, files_to_process)
+                elif pending:
+                    process_selected_documents(selected_user, pending)
+                else:
+                    st.info("All selected documents are already extracted.")
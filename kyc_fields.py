@@ -0,0 +1,174 @@
+import re
+from datetime import date
+
+# Labelled lines as they appear on ID and address proofs, e.g. "Date of Birth: 02/05/1982"
+NAME_LINE = re.compile(r"^\s*(?:full\s+)?name\s*[:\-]\s*(.+)$", re.IGNORECASE | re.MULTILINE)
+DOB_LINE = re.compile(r"(?:date\s+of\s+birth|d\.?\s?o\.?\s?b\.?|birth\s*date)\s*[:\-]?\s*(.+)", re.IGNORECASE)
+ADDRESS_LINE = re.compile(
+    r"^\s*(?:permanent\s+|residential\s+|current\s+)?address\s*[:\-]\s*(.+)$", re.IGNORECASE | re.MULTILINE
+)
+PHONE_LINE = re.compile(
+    r"(?:phone|mobile|mob\.?|tel\.?|contact(?:\s+no\.?|\s+number)?)\s*[:\-]?\s*(\+?[\d][\d\s\-()]{7,})", re.IGNORECASE
+)
+ID_LINE = re.compile(
+    r"((?:document|id|card|passport|licen[cs]e|voter\s+id)\s*(?:number|no\.?|#))\s*[:\-]?\s*([A-Z0-9][A-Z0-9\-]{4,19})",
+    re.IGNORECASE,
+)
+PAN = re.compile(r"\b[A-Z]{5}\d{4}[A-Z]\b")
+AADHAAR = re.compile(r"\b\d{4}\s\d{4}\s\d{4}\b")
+
+MONTHS = {name: number for number, name in enumerate(
+    ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"], start=1
+)}
+NUMERIC_DATE = re.compile(r"\b(\d{1,4})[/\-.](\d{1,2})[/\-.](\d{2,4})\b")
+TEXT_DATE = re.compile(r"\b(\d{1,2})\s+([A-Za-z]{3})[A-Za-z]*\.?,?\s+(\d{4})\b")
+
+
+def _clean(value):
+    return " ".join(value.split()).strip(" ,;:-")
+
+
+def normalize_date(text):
+    """ISO date (YYYY-MM-DD) from the first date in text, or None. Dates are read day first."""
+    match = NUMERIC_DATE.search(text)
+    if match:
+        first, second, third = (int(part) for part in match.groups())
+        if len(match.group(1)) == 4:
+            year, month, day = first, second, third
+        else:
+            day, month, year = first, second, third
+            if month > 12 and day <= 12:
+                day, month = month, day  # Month-first, e.g. 05/23/1990
+            if year < 100:
+                year += 1900 if year > date.today().year % 100 else 2000
+    else:
+        match = TEXT_DATE.search(text)
+        if not match or match.group(2).lower()[:3] not in MONTHS:
+            return None
+        day, month, year = int(match.group(1)), MONTHS[match.group(2).lower()[:3]], int(match.group(3))
+
+    try:
+        return date(year, month, day).isoformat()
+    except ValueError:
+        return None
+
+
+def normalize_phone(text):
+    """Digits of a phone number, keeping a leading +; None if it is too short to be one."""
+    digits = re.sub(r"\D", "", text)
+    if not 8 <= len(digits) <= 15:
+        return None
+    return ("+" if text.strip().startswith("+") else "") + digits
+
+
+def extract_fields(text):
+    """Pulls name, dob, address, phone and ID numbers out of OCR'd document text.
+
+    Only fields that were found are returned. Values are normalized so the
+    same detail from two documents compares equal.
+    """
+    if not isinstance(text, str) or not text.strip():
+        return {}
+
+    fields = {}
+
+    match = NAME_LINE.search(text)
+    if match and _clean(match.group(1)):
+        fields["name"] = _clean(match.group(1)).title()
+
+    for match in DOB_LINE.finditer(text):
+        dob = normalize_date(match.group(1))
+        if dob:
+            fields["dob"] = dob
+            break
+
+    match = ADDRESS_LINE.search(text)
+    if match and _clean(match.group(1)):
+        fields["address"] = _clean(match.group(1))
+
+    for match in PHONE_LINE.finditer(text):
+        phone = normalize_phone(match.group(1))
+        if phone:
+            fields["phone"] = phone
+            break
+
+    id_numbers = []
+    for match in ID_LINE.finditer(text):
+        id_numbers.append({"type": _clean(match.group(1)).title(), "value": match.group(2).upper()})
+    for match in PAN.finditer(text):
+        id_numbers.append({"type": "PAN", "value": match.group(0)})
+    for match in AADHAAR.finditer(text):
+        id_numbers.append({"type": "Aadhaar", "value": match.group(0).replace(" ", "")})
+
+    unique = []
+    for id_number in id_numbers:
+        if id_number["value"] not in {existing["value"] for existing in unique}:
+            unique.append(id_number)
+    if unique:
+        fields["id_numbers"] = unique
+
+    return fields
+
+
+# Field asked about -> words that ask for it
+FIELD_QUESTIONS = {
+    "dob": re.compile(r"\b(date of birth|dob|birth ?date|birthday|born)\b", re.IGNORECASE),
+    "age": re.compile(r"\b(age|how old)\b", re.IGNORECASE),
+    "phone": re.compile(r"\b(phone|mobile|contact number|telephone)\b", re.IGNORECASE),
+    "address": re.compile(r"\b(address|lives?|resides?|residence)\b", re.IGNORECASE),
+    "name": re.compile(r"\b(name|called|who is)\b", re.IGNORECASE),
+    "id_numbers": re.compile(
+        r"\b(id numbers?|pan|aadhaar|aadhar|passport|document numbers?|licen[cs]e numbers?|voter id)\b", re.IGNORECASE
+    ),
+}
+
+# Questions that need reasoning over the documents, not a lookup
+OPEN_QUESTION = re.compile(
+    r"\b(why|how(?! old)|explain|summari[sz]e|summary|compare|verify|valid|match|consistent|discrepanc\w*|mismatch\w*|"
+    r"risk|fraud|expir\w*|describe|tell me about|all details|everything)\b",
+    re.IGNORECASE,
+)
+# Details of other people on the documents; stored fields only describe the customer
+RELATION = re.compile(r"\b(father|mother|parents?|spouse|husband|wife|guardian|nominee)('s)?\b", re.IGNORECASE)
+MAX_LOOKUP_WORDS = 15
+
+# ID kind asked about -> pattern matching the stored ID types of that kind
+ID_KINDS = {
+    "pan": re.compile(r"\bpan\b", re.IGNORECASE),
+    "aadhaar": re.compile(r"\baadha?ar\b", re.IGNORECASE),
+    "passport": re.compile(r"\bpassport\b", re.IGNORECASE),
+    "licence": re.compile(r"\blicen[cs]e\b", re.IGNORECASE),
+    "voter": re.compile(r"\bvoter\b", re.IGNORECASE),
+}
+
+FIELD_LABELS = {
+    "name": "Name",
+    "dob": "Date of birth",
+    "age": "Age",
+    "address": "Address",
+    "phone": "Phone",
+    "id_numbers": "ID numbers",
+}
+
+
+def lookup_field(question):
+    """The one field a direct question asks for, or None if it needs the LLM."""
+    if len(question.split()) > MAX_LOOKUP_WORDS or OPEN_QUESTION.search(question) or RELATION.search(question):
+        return None
+    fields = [field for field, pattern in FIELD_QUESTIONS.items() if pattern.search(question)]
+    return fields[0] if len(fields) == 1 else None
+
+
+def filter_id_numbers(question, id_numbers):
+    """The stored ID numbers of the kinds the question names (PAN, passport, ...), or all of them."""
+    kinds = [pattern for pattern in ID_KINDS.values() if pattern.search(question)]
+    if not kinds:
+        return list(id_numbers)
+    return [item for item in id_numbers if any(pattern.search(item["type"]) for pattern in kinds)]
+
+
+def age_on(dob, today=None):
+    """Whole years between an ISO date of birth and today."""
+    born = date.fromisoformat(dob)
+    today = today or date.today()
+    return today.year - born.year - ((today.month, today.day) < (born.month, born.day))
@@ -0,0 +1,166 @@
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+from dotenv import load_dotenv
+from llama_index.core import Document, StorageContext, VectorStoreIndex, load_index_from_storage
+from llama_index.core.embeddings import BaseEmbedding
+from llama_index.core.node_parser import SentenceSplitter
+from cache import CACHE_DIR
+import database
+
+# Load environment variables
+load_dotenv()
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+
+KYC_INDEX_DIR = os.getenv("KYC_INDEX_DIR", os.path.join(CACHE_DIR, "index"))
+KYC_EMBED_BACKEND = os.getenv("KYC_EMBED_BACKEND", "gemini")  # "gemini" or "local"
+KYC_INDEX_TOP_K = int(os.getenv("KYC_INDEX_TOP_K", "5"))
+KYC_INDEX_CHUNK_SIZE = int(os.getenv("KYC_INDEX_CHUNK_SIZE", "512"))  # Tokens per chunk
+
+
+class HashEmbedding(BaseEmbedding):
+    """Deterministic bag-of-words embedding that needs no network access.
+
+    Words are hashed into a fixed number of buckets, so texts sharing words
+    end up close together. Good enough for tests and offline development.
+    """
+
+    dimensions: int = 256
+
+    def _embed(self, text):
+        vector = [0.0] * self.dimensions
+        for word in re.findall(r"\w+", text.lower()):
+            bucket = int(hashlib.md5(word.encode("utf-8")).hexdigest(), 16)
+            vector[bucket % self.dimensions] += 1.0
+        norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+        return [value / norm for value in vector]
+
+    def _get_query_embedding(self, query):
+        return self._embed(query)
+
+    async def _aget_query_embedding(self, query):
+        return self._embed(query)
+
+    def _get_text_embedding(self, text):
+        return self._embed(text)
+
+
+_embed_model = None
+_indexes = {}  # username -> VectorStoreIndex
+_lock = threading.Lock()
+_user_locks = {}  # Embedding calls for one user never block another
+
+
+def set_embed_model(model, backend="custom"):
+    """Replaces the embedding backend, e.g. with HashEmbedding() in tests."""
+    global _embed_model, KYC_EMBED_BACKEND
+    with _lock:
+        _embed_model = model
+        KYC_EMBED_BACKEND = backend
+        _indexes.clear()  # Indexes built with another embedder can't be queried with this one
+
+
+def get_embed_model():
+    """Returns the configured embedding model, building it on first use."""
+    global _embed_model
+    if _embed_model is None:
+        if KYC_EMBED_BACKEND == "local":
+            _embed_model = HashEmbedding()
+        else:
+            from llama_index.embeddings.gemini import GeminiEmbedding
+            _embed_model = GeminiEmbedding(api_key=GEMINI_API_KEY)
+    return _embed_model
+
+
+def _user_lock(username):
+    with _lock:
+        return _user_locks.setdefault(username, threading.Lock())
+
+
+def _persist_dir(username):
+    # Keep one directory per backend so switching embedders never mixes vectors
+    safe_name = re.sub(r"[^\w.-]", "_", username)
+    return os.path.join(KYC_INDEX_DIR, KYC_EMBED_BACKEND, safe_name)
+
+
+def _get_index(username):
+    """Loads the user's index from disk, or starts an empty one."""
+    if username in _indexes:
+        return _indexes[username]
+
+    persist_dir = _persist_dir(username)
+    embed_model = get_embed_model()
+    transformations = [SentenceSplitter(chunk_size=KYC_INDEX_CHUNK_SIZE, chunk_overlap=KYC_INDEX_CHUNK_SIZE // 8)]
+
+    if os.path.exists(os.path.join(persist_dir, "docstore.json")):
+        storage_context = StorageContext.from_defaults(persist_dir=persist_dir)
+        index = load_index_from_storage(storage_context, embed_model=embed_model, transformations=transformations)
+    else:
+        index = VectorStoreIndex([], embed_model=embed_model, transformations=transformations)
+
+    _indexes[username] = index
+    return index
+
+
+def _row_doc_id(row_id):
+    return f"kyc-{row_id}"
+
+
+def _indexed_row_ids(index):
+    return {int(doc_id.split("-", 1)[1]) for doc_id in index.ref_doc_info if doc_id.startswith("kyc-")}
+
+
+def _row_text(row):
+    # extracted_data is stored with json.dumps, so undo that where we can
+    try:
+        text = json.loads(row["extracted_data"])
+    except (TypeError, ValueError):
+        text = row["extracted_data"]
+    return text if isinstance(text, str) else json.dumps(text)
+
+
+def sync_user_index(username):
+    """Embeds any kyc_data rows for the user that the index hasn't seen yet.
+
+    Returns the number of rows added. Only rows newer than the last indexed
+    one are fetched, so calling this on every page load is cheap.
+    """
+    with _user_lock(username):
+        index = _get_index(username)
+        indexed = _indexed_row_ids(index)
+
+        query = (
+            database.supabase_client.table("kyc_data")
+            .select("id,document_type,extracted_data,original_file_url")
+            .eq("username", username)
+        )
+        if indexed:
+            query = query.gt("id", max(indexed))
+        rows = query.order("id").execute().data or []
+
+        for row in rows:
+            index.insert(
+                Document(
+                    text=_row_text(row),
+                    doc_id=_row_doc_id(row["id"]),
+                    metadata={"document_type": row.get("document_type"), "source": row.get("original_file_url")},
+                    excluded_embed_metadata_keys=["source"],
+                )
+            )
+
+        if rows:
+            index.storage_context.persist(persist_dir=_persist_dir(username))
+        return len(rows)
+
+
+def retrieve_context(username, query, top_k=None):
+    """Returns the chunks of the user's KYC text most relevant to query, best first."""
+    with _user_lock(username):
+        index = _get_index(username)
+        if not index.ref_doc_info:
+            return []
+        retriever = index.as_retriever(similarity_top_k=top_k or KYC_INDEX_TOP_K)
+        return [node.get_content() for node in retriever.retrieve(query)]
@@ -0,0 +1,168 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dotenv import load_dotenv
+import metrics
+
+# Load environment variables
+load_dotenv()
+
+PIPELINE_DOWNLOAD_WORKERS = int(os.getenv("PIPELINE_DOWNLOAD_WORKERS", "8"))
+PIPELINE_EXTRACT_WORKERS = int(os.getenv("PIPELINE_EXTRACT_WORKERS", os.cpu_count() or 1))
+PIPELINE_BATCH_SIZE = int(os.getenv("PIPELINE_BATCH_SIZE", "10"))
+
+# Seconds a finished file may wait for its batch to fill before it is written anyway
+PIPELINE_FLUSH_INTERVAL = float(os.getenv("PIPELINE_FLUSH_INTERVAL", "1.0"))
+
+
+def _init_extract_worker():
+    """Each extraction process OCRs its own file serially, so page-level OCR
+    parallelism would only oversubscribe the cores already in use."""
+    import ocr
+    from ocr_engine import get_ocr_engine
+    ocr.OCR_WORKERS = 1
+    get_ocr_engine()  # Load the OCR engine once per worker, not per file
+
+
+_pools = {}  # extract_workers -> shared process pool
+_pools_lock = threading.Lock()
+
+
+def _get_extract_pool(workers):
+    """Returns the shared extraction pool for workers processes, creating it on first use.
+
+    Workers are spawned, not forked: the app is multi-threaded, and a forked
+    child can inherit a lock (e.g. metrics._lock) that another thread held.
+    """
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            pool = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn"), initializer=_init_extract_worker
+            )
+            _pools[workers] = pool
+        return pool
+
+
+def _discard_extract_pool(workers, pool):
+    """Drops a pool whose worker died, so the next run starts a fresh one."""
+    with _pools_lock:
+        if _pools.get(workers) is pool:
+            del _pools[workers]
+    pool.shutdown(wait=False)
+
+
+def _extract_and_capture(extract, local_path, file_name):
+    """Runs extract in a worker process and returns its metrics along with the result."""
+    with metrics.capture() as delta:
+        value = extract(local_path, file_name)
+    return value, delta
+
+
+def _result(file_name, file_url=None, document_type=None, extracted_text=None, error=None):
+    return {
+        "file_name": file_name,
+        "file_url": file_url,
+        "document_type": document_type,
+        "extracted_text": extracted_text,
+        "error": error,
+    }
+
+
+def run_pipeline(
+    file_list,
+    download,
+    extract,
+    save_batch,
+    download_workers=None,
+    extract_workers=None,
+    batch_size=None,
+    max_in_flight=None,
+    release=None,
+):
+    """Runs download -> extract -> save over file_list with the stages overlapping.
+
+    download(file_name) returns (local_path, file_url) and runs on a thread pool.
+    extract(local_path, file_name) returns (document_type, text) and runs on a
+    process pool, so it must be a picklable module-level function.
+    save_batch(results) writes a list of result dicts in one call and may
+    return one error (or None) per result to report rows that failed.
+    release(local_path), if given, is called once a file's extract has
+    finished or failed, so its download can be cleaned up.
+
+    At most max_in_flight files are between download and save at any time.
+    Yields one result dict per file once it has been saved, or failed; a
+    failing file never stops the rest of the batch.
+    """
+    download_workers = download_workers or PIPELINE_DOWNLOAD_WORKERS
+    extract_workers = extract_workers or PIPELINE_EXTRACT_WORKERS
+    batch_size = batch_size or PIPELINE_BATCH_SIZE
+    max_in_flight = max_in_flight or (download_workers + 2 * extract_workers)
+
+    pending_files = list(file_list)
+    futures = {}  # future -> (stage, file_name, file_url, local_path)
+    extract_pools = {}  # extract future -> the pool it runs on
+    batch = []
+    batch_started = None
+
+    def flush():
+        nonlocal batch, batch_started
+        to_save, batch, batch_started = batch, [], None
+        try:
+            errors = save_batch(to_save) or [None] * len(to_save)
+        except Exception as e:
+            errors = [f"Error saving extracted data: {e}"] * len(to_save)
+        for result, error in zip(to_save, errors):
+            result["error"] = error
+        return to_save
+
+    with ThreadPoolExecutor(max_workers=download_workers) as io_pool:
+        while pending_files or futures or batch:
+            # Backpressure: only start new downloads while there is room downstream
+            while pending_files and len(futures) + len(batch) < max_in_flight:
+                file_name = pending_files.pop(0)
+                futures[io_pool.submit(download, file_name)] = ("download", file_name, None, None)
+
+            if futures:
+                timeout = PIPELINE_FLUSH_INTERVAL if batch else None
+                done, _ = wait(futures, timeout=timeout, return_when=FIRST_COMPLETED)
+            else:
+                done = set()
+
+            for future in done:
+                stage, file_name, file_url, local_path = futures.pop(future)
+                pool = extract_pools.pop(future, None)
+                if stage == "extract" and release:
+                    release(local_path)
+                try:
+                    value = future.result()
+                except BrokenProcessPool as e:
+                    _discard_extract_pool(extract_workers, pool)
+                    yield _result(file_name, file_url, error=f"Error during {stage}: {e}")
+                    continue
+                except Exception as e:
+                    yield _result(file_name, file_url, error=f"Error during {stage}: {e}")
+                    continue
+
+                if stage == "download":
+                    local_path, file_url = value
+                    cpu_pool = _get_extract_pool(extract_workers)
+                    extract_future = cpu_pool.submit(_extract_and_capture, extract, local_path, file_name)
+                    futures[extract_future] = ("extract", file_name, file_url, local_path)
+                    extract_pools[extract_future] = cpu_pool
+                else:
+                    (document_type, extracted_text), delta = value
+                    metrics.merge(delta)  # Spans recorded in the worker process
+                    batch.append(_result(file_name, file_url, document_type, extracted_text))
+                    batch_started = batch_started or time.monotonic()
+
+            batch_is_due = batch and (
+                len(batch) >= batch_size
+                or not futures
+                or time.monotonic() - batch_started >= PIPELINE_FLUSH_INTERVAL
+            )
+            if batch_is_due:
+                yield from flush()
@@ -0,0 +1,188 @@
+"""Headless KYC extraction for whole users or the whole bucket.
+
+Runs the same download -> extract -> save pipeline as the "Process Documents"
+button, without a browser session. Progress is checkpointed after every saved
+batch, so an interrupted run picks up where it stopped:
+
+    python kyc_worker.py --all --workers 16
+    python kyc_worker.py --user alice --user bob --checkpoint alice_bob.ckpt
+
+It can also drain the extraction job queue that uploads fill (job_queue.py),
+on a machine of its own; --follow keeps it waiting for new jobs:
+
+    python kyc_worker.py --jobs --workers 4 --follow
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from database import kyc_manifest
+from kyc import list_users, download_file, pending_files, save_kyc_data_batch
+from extractors import document_type, extract_document
+from kyc_pipeline import PIPELINE_EXTRACT_WORKERS, run_pipeline
+from spool import release
+import job_queue
+import metrics
+
+DEFAULT_CHECKPOINT = "kyc_worker.checkpoint"
+PROGRESS_INTERVAL = 10  # Seconds between progress lines
+
+
+def load_checkpoint(path):
+    """Returns the set of 'user/path' keys already processed."""
+    if not os.path.exists(path):
+        return set()
+    with open(path, "r", encoding="utf-8") as f:
+        return {line.rstrip("\n") for line in f if line.strip()}
+
+
+def collect_files(usernames, folders=None):
+    """Lists every supported file for the given users as 'user/folder/file' keys.
+
+    All users' folders are listed concurrently through the bucket manifest.
+    """
+    entries = kyc_manifest.objects(usernames, folders)
+    return [entry["path"] for entry in entries if document_type(entry["path"]) is not None]
+
+
+def _split_key(key):
+    username, file_path = key.split("/", 1)
+    return username, file_path
+
+
+def skip_extracted(keys):
+    """Drops keys whose file is already saved in kyc_data, or queued for the job workers.
+
+    Files can be extracted by the "Process Documents" button or an upload's
+    job as well as by this worker, so the checkpoint alone doesn't cover them.
+    """
+    by_user = {}
+    for key in keys:
+        username, file_path = _split_key(key)
+        by_user.setdefault(username, []).append(file_path)
+
+    pending = set()
+    for username, file_paths in by_user.items():
+        pending.update(f"{username}/{file_path}" for file_path in pending_files(username, file_paths))
+    return [key for key in keys if key in pending]
+
+
+def _download(key):
+    return download_file(*_split_key(key))
+
+
+def _save_batch(results):
+    """Writes a batch that may span users, one insert per user."""
+    errors = {}
+    by_user = {}
+    for result in results:
+        by_user.setdefault(_split_key(result["file_name"])[0], []).append(result)
+
+    for username, user_results in by_user.items():
+        for result, error in zip(user_results, save_kyc_data_batch(username, user_results)):
+            errors[id(result)] = error
+    return [errors[id(result)] for result in results]
+
+
+def run(usernames, folders=None, workers=None, checkpoint=DEFAULT_CHECKPOINT, restart=False, index=False):
+    """Processes all files for usernames, skipping those recorded in checkpoint or already extracted.
+
+    Returns the failure count.
+    """
+    if restart and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+
+    done_keys = load_checkpoint(checkpoint)
+    all_keys = collect_files(usernames, folders)
+    todo = skip_extracted([key for key in all_keys if key not in done_keys])
+    print(f"{len(all_keys)} files for {len(usernames)} users; {len(all_keys) - len(todo)} already done, {len(todo)} to go")
+
+    processed = failed = 0
+    started = last_report = time.monotonic()
+
+    with open(checkpoint, "a", encoding="utf-8") as checkpoint_file:
+        results = run_pipeline(todo, download=_download, extract=extract_document, save_batch=_save_batch, extract_workers=workers, release=release)
+        for result in results:
+            if result["error"]:
+                failed += 1
+                print(f"FAILED {result['file_name']}: {result['error']}", file=sys.stderr)
+            else:
+                processed += 1
+                checkpoint_file.write(result["file_name"] + "\n")
+                checkpoint_file.flush()
+
+            now = time.monotonic()
+            if now - last_report >= PROGRESS_INTERVAL:
+                last_report = now
+                finished = processed + failed
+                rate = finished / (now - started)
+                eta = (len(todo) - finished) / rate if rate else 0
+                print(f"{finished}/{len(todo)} files ({failed} failed), {rate:.2f} files/s, ETA {eta:.0f}s", flush=True)
+
+    elapsed = time.monotonic() - started
+    print(f"Done: {processed} processed, {failed} failed in {elapsed:.1f}s")
+    for row in metrics.stage_summary():
+        print(f"  {row['stage']:20} {row['count']:6d} calls {row['mean_ms']:9.1f} ms mean {row['total_s']:9.1f} s total")
+
+    if index:
+        from kyc_index import sync_user_index
+        for username in usernames:
+            print(f"Indexed {sync_user_index(username)} new documents for {username}")
+
+    return failed
+
+
+def run_jobs(workers, follow=False):
+    """Runs queued extraction jobs on workers threads until the queue is empty, or forever with follow."""
+    stop = threading.Event()
+    ran = []
+
+    def drain():
+        ran.append(job_queue.work(stop=stop, idle_exit=not follow))
+
+    threads = [threading.Thread(target=drain, name=f"job-worker-{i}", daemon=True) for i in range(workers)]
+    for thread in threads:
+        thread.start()
+    try:
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(PROGRESS_INTERVAL)
+                if thread.is_alive():
+                    print(f"Jobs: {job_queue.job_queue.counts()}", flush=True)
+    except KeyboardInterrupt:
+        print("Stopping after the jobs in progress...")
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+    counts = job_queue.job_queue.counts()
+    print(f"Done: ran {sum(ran)} jobs; queue now {counts}")
+    return counts["failed"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract KYC text for whole users or the whole bucket.")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--user", action="append", dest="users", help="User folder to process (repeatable)")
+    target.add_argument("--all", action="store_true", help="Process every user in the bucket")
+    target.add_argument("--jobs", action="store_true", help="Run the extraction jobs queued by uploads")
+    parser.add_argument("--folder", action="append", dest="folders", help="Only these document-type folders (repeatable)")
+    parser.add_argument("--workers", type=int, default=PIPELINE_EXTRACT_WORKERS, help="Extraction processes (threads with --jobs)")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="File recording finished documents")
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint; files already in kyc_data are still skipped")
+    parser.add_argument("--index", action="store_true", help="Update the Easy KYC indexes afterwards")
+    parser.add_argument("--follow", action="store_true", help="With --jobs, keep waiting for new jobs")
+    args = parser.parse_args(argv)
+
+    metrics.start_metrics_server()
+    if args.jobs:
+        return 1 if run_jobs(args.workers, args.follow) else 0
+
+    usernames = list_users() if args.all else args.users
+    failed = run(usernames, args.folders, args.workers, args.checkpoint, args.restart, args.index)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
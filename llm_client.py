@@ -0,0 +1,214 @@
+import asyncio
+import functools
+import os
+import queue
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from metrics import count
+
+# Load environment variables
+load_dotenv()
+
+LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "60"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "120"))  # Seconds per call, retries included
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "1.0"))  # Seconds before the first retry
+
+# HTTP statuses worth retrying: rate limited, server error, unavailable, gateway timeout
+RETRYABLE_STATUS_CODES = {429, 500, 503, 504}
+
+
+class TokenBucket:
+    """Allows `rate` acquisitions per second on average, with bursts up to `capacity`."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+def is_retryable(error):
+    """True for rate limits, transient server errors and timeouts."""
+    if isinstance(error, asyncio.TimeoutError):
+        return True
+    # google.api_core errors carry the HTTP status in .code, HTTP clients in .status_code
+    status = getattr(error, "code", None) or getattr(error, "status_code", None)
+    return status in RETRYABLE_STATUS_CODES or "429" in str(error)
+
+
+class LLMClient:
+    """Runs model calls on a shared background event loop.
+
+    Every call in the process goes through the same token-bucket rate limiter
+    and concurrency cap, and retryable errors are retried with exponential
+    backoff inside the call's deadline. Synchronous callers such as Streamlit
+    pages use generate() and generate_batch(); async code can await agenerate().
+    """
+
+    def __init__(
+        self,
+        requests_per_minute=LLM_REQUESTS_PER_MINUTE,
+        max_concurrency=LLM_MAX_CONCURRENCY,
+        max_retries=LLM_MAX_RETRIES,
+        timeout=LLM_TIMEOUT,
+        backoff_base=LLM_BACKOFF_BASE,
+    ):
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.backoff_base = backoff_base
+        self.calls = 0
+        self.retries = 0
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="llm-client", daemon=True)
+        self._thread.start()
+
+        rate = requests_per_minute / 60
+        self._bucket = TokenBucket(rate, capacity=max(1, max_concurrency))
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_concurrency), thread_name_prefix="llm-call")
+
+    async def _in_slot(self, func, *args, **kwargs):
+        """Runs a blocking call on the client's threads while holding a concurrency slot.
+
+        A timeout cancels the waiting task but can't stop the thread, so the
+        slot is only given back once the thread has actually returned.
+        """
+        await self._semaphore.acquire()
+        try:
+            future = self._executor.submit(func, *args, **kwargs)
+        except BaseException:
+            self._semaphore.release()
+            raise
+        future.add_done_callback(lambda _: self._loop.call_soon_threadsafe(self._semaphore.release))
+        return await asyncio.wrap_future(future)
+
+    async def _call(self, model, prompt, **kwargs):
+        if hasattr(model, "generate_content_async"):
+            async with self._semaphore:
+                return await model.generate_content_async(prompt, **kwargs)
+        return await self._in_slot(model.generate_content, prompt, **kwargs)
+
+    async def _attempts(self, model, prompt, **kwargs):
+        for attempt in range(self.max_retries + 1):
+            await self._bucket.acquire()
+            try:
+                self.calls += 1
+                count("llm_calls")
+                return await self._call(model, prompt, **kwargs)
+            except Exception as e:
+                if attempt == self.max_retries or not is_retryable(e):
+                    raise
+            self.retries += 1
+            count("llm_retries")
+            # Jitter keeps a burst of failed callers from retrying in lockstep
+            await asyncio.sleep(self.backoff_base * (2 ** attempt) * random.uniform(0.5, 1.5))
+
+    async def _stream_attempts(self, model, prompt, emit, **kwargs):
+        """Like _attempts, passing each piece of text to emit as it arrives.
+
+        A call that fails after emitting text is not retried, since the
+        reader has already seen part of its answer.
+        """
+        emitted = False
+
+        def consume():
+            nonlocal emitted
+            for chunk in model.generate_content(prompt, stream=True, **kwargs):
+                try:
+                    text = getattr(chunk, "text", "")
+                except ValueError:
+                    continue  # Blocked or empty chunk, which has no text to read
+                if text:
+                    emitted = True
+                    emit(text)
+
+        for attempt in range(self.max_retries + 1):
+            await self._bucket.acquire()
+            try:
+                self.calls += 1
+                count("llm_calls")
+                return await self._in_slot(consume)
+            except Exception as e:
+                if emitted or attempt == self.max_retries or not is_retryable(e):
+                    raise
+            self.retries += 1
+            count("llm_retries")
+            await asyncio.sleep(self.backoff_base * (2 ** attempt) * random.uniform(0.5, 1.5))
+
+    async def agenerate(self, prompt, model, timeout=None, **kwargs):
+        """Calls model.generate_content(prompt) with rate limiting, retries and a deadline."""
+        return await asyncio.wait_for(self._attempts(model, prompt, **kwargs), timeout or self.timeout)
+
+    async def agenerate_batch(self, prompts, model, timeout=None, **kwargs):
+        tasks = [self.agenerate(prompt, model, timeout, **kwargs) for prompt in prompts]
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    def generate(self, prompt, model, timeout=None, **kwargs):
+        """Blocking version of agenerate for synchronous callers."""
+        future = asyncio.run_coroutine_threadsafe(self.agenerate(prompt, model, timeout, **kwargs), self._loop)
+        return future.result()
+
+    def generate_stream(self, prompt, model, timeout=None, **kwargs):
+        """Yields the response text in pieces as the model produces them.
+
+        Rate limiting, retries and the deadline work as in generate(); errors
+        are raised from the generator after any text already received.
+        """
+        pieces = queue.Queue()
+        finished = object()
+        future = asyncio.run_coroutine_threadsafe(
+            asyncio.wait_for(self._stream_attempts(model, prompt, pieces.put, **kwargs), timeout or self.timeout),
+            self._loop,
+        )
+        future.add_done_callback(lambda _: pieces.put(finished))
+        while True:
+            piece = pieces.get()
+            if piece is finished:
+                break
+            yield piece
+        future.result()
+
+    def generate_batch(self, prompts, model, timeout=None, **kwargs):
+        """Submits all prompts at once; returns a response or an exception per prompt, in order."""
+        future = asyncio.run_coroutine_threadsafe(self.agenerate_batch(prompts, model, timeout, **kwargs), self._loop)
+        return future.result()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=None)
+def get_gemini_model(model_name):
+    """Builds a Gemini model once per process, importing google.generativeai on first use."""
+    import google.generativeai as genai
+
+    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+    return genai.GenerativeModel(model_name)
+
+
+def get_llm_client():
+    """Returns the process-wide LLM client, creating it on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = LLMClient()
+        return _client
@@ -0,0 +1,454 @@
+"""In-memory stand-ins for the Supabase client and Gemini models this app uses.
+
+Useful for trying changes to database.py and the pages without a live project:
+
+    import database
+    from local_backend import LocalSupabaseClient
+    database.supabase_client = LocalSupabaseClient()
+
+Storage calls (upload, list, get_public_url, remove, ...) go to LocalStorage,
+which serves stored files over HTTP on localhost so downloads work too, as
+well as the resumable (TUS) upload endpoint under storage_url. Setting
+fail_every_nth_chunk drops every nth chunk request to exercise resuming.
+LocalSupabaseClient(latency=0.05) delays every call to mimic the network.
+
+The Gemini stand-in exercises the LLM code paths offline:
+
+    import process
+    from local_backend import FakeGeminiModel
+    model = FakeGeminiModel(response='{"name": "Jane Doe"}')
+    process.analyze_text("...", model=model)
+    assert model.calls == 1
+"""
+import base64
+import copy
+import itertools
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from urllib.parse import quote, unquote
+
+
+class LocalQuery:
+    """Mimics the postgrest query builder returned by client.table(name)."""
+
+    def __init__(self, table, latency=0.0):
+        self._table = table
+        self._latency = latency
+        self._action = "select"
+        self._columns = None
+        self._count = None
+        self._filters = []
+        self._order = []
+        self._range = None
+        self._payload = None
+
+    # -- actions ----------------------------------------------------------
+
+    def select(self, columns="*", count=None):
+        self._action = "select"
+        self._columns = None if columns.strip() == "*" else [c.strip() for c in columns.split(",")]
+        self._count = count
+        return self
+
+    def insert(self, rows):
+        self._action = "insert"
+        self._payload = rows
+        return self
+
+    def update(self, values):
+        self._action = "update"
+        self._payload = values
+        return self
+
+    def delete(self):
+        self._action = "delete"
+        return self
+
+    # -- filters and modifiers --------------------------------------------
+
+    def _filter(self, predicate):
+        self._filters.append(predicate)
+        return self
+
+    def eq(self, column, value):
+        return self._filter(lambda row: row.get(column) == value)
+
+    def neq(self, column, value):
+        return self._filter(lambda row: row.get(column) != value)
+
+    def gt(self, column, value):
+        return self._filter(lambda row: row.get(column) is not None and row[column] > value)
+
+    def gte(self, column, value):
+        return self._filter(lambda row: row.get(column) is not None and row[column] >= value)
+
+    def lt(self, column, value):
+        return self._filter(lambda row: row.get(column) is not None and row[column] < value)
+
+    def lte(self, column, value):
+        return self._filter(lambda row: row.get(column) is not None and row[column] <= value)
+
+    def in_(self, column, values):
+        values = list(values)
+        return self._filter(lambda row: row.get(column) in values)
+
+    def order(self, column, desc=False):
+        self._order.append((column, desc))
+        return self
+
+    def range(self, start, end):
+        self._range = (start, end + 1)
+        return self
+
+    def limit(self, size):
+        start = self._range[0] if self._range else 0
+        self._range = (start, start + size)
+        return self
+
+    # -- execution --------------------------------------------------------
+
+    def _matches(self, row):
+        return all(predicate(row) for predicate in self._filters)
+
+    def execute(self):
+        time.sleep(self._latency)  # Network round trip
+        with self._table.lock:
+            if self._action == "insert":
+                data = self._table.insert(self._payload)
+                return SimpleNamespace(data=data, count=None)
+
+            matched = [row for row in self._table.rows if self._matches(row)]
+
+            if self._action == "update":
+                for row in matched:
+                    row.update(self._payload)
+                return SimpleNamespace(data=copy.deepcopy(matched), count=None)
+
+            if self._action == "delete":
+                self._table.rows = [row for row in self._table.rows if not self._matches(row)]
+                return SimpleNamespace(data=copy.deepcopy(matched), count=None)
+
+            for column, desc in reversed(self._order):
+                matched.sort(key=lambda row: (row.get(column) is None, row.get(column)), reverse=desc)
+            count = len(matched) if self._count else None
+            if self._range:
+                matched = matched[self._range[0]:self._range[1]]
+            if self._columns is not None:
+                matched = [{column: row.get(column) for column in self._columns} for row in matched]
+            return SimpleNamespace(data=copy.deepcopy(matched), count=count)
+
+
+class LocalTable:
+    def __init__(self, name, unique=None):
+        self.name = name
+        self.rows = []
+        self.lock = threading.RLock()
+        self.unique = unique or []  # Columns with a unique constraint
+        self._next_id = 1
+
+    def insert(self, rows):
+        rows = copy.deepcopy(rows if isinstance(rows, list) else [rows])
+        for index, row in enumerate(rows):
+            for column in self.unique:
+                if any(existing.get(column) == row.get(column) for existing in self.rows + rows[:index]):
+                    raise Exception(f'duplicate key value violates unique constraint "{self.name}_{column}_key"')
+            row.setdefault("id", self._next_id)
+            self._next_id += 1
+        self.rows.extend(rows)
+        return copy.deepcopy(rows)
+
+
+class LocalRpc:
+    def __init__(self, function, params, latency=0.0):
+        self._function = function
+        self._params = params
+        self._latency = latency
+
+    def execute(self):
+        time.sleep(self._latency)
+        return SimpleNamespace(data=self._function(**self._params), count=None)
+
+
+class LocalBucket:
+    """Mimics the storage3 bucket API returned by client.storage.from_(name)."""
+
+    def __init__(self, storage, name):
+        self._storage = storage
+        self.name = name
+        self.files = {}  # path -> (content, metadata)
+
+    def upload(self, path, file, file_options=None):
+        time.sleep(self._storage.latency)
+        content = file if isinstance(file, bytes) else open(file, "rb").read()
+        with self._storage.lock:
+            if path in self.files and str((file_options or {}).get("upsert", "false")).lower() != "true":
+                raise Exception('{"statusCode": 409, "error": "Duplicate", "message": "The resource already exists"}')
+            metadata = {"size": len(content), "lastModified": datetime.now(timezone.utc).isoformat()}
+            self.files[path] = (content, metadata)
+        return SimpleNamespace(path=path, full_path=f"{self.name}/{path}")
+
+    def download(self, path):
+        time.sleep(self._storage.latency)
+        with self._storage.lock:
+            return self.files[path][0]
+
+    def remove(self, paths):
+        time.sleep(self._storage.latency)
+        removed = []
+        with self._storage.lock:
+            for path in paths:
+                if self.files.pop(path, None) is not None:
+                    removed.append({"name": path, "bucket_id": self.name})
+        return removed
+
+    def list(self, path=None, options=None):
+        """Immediate children of path; folders come back without id or metadata, as in Supabase."""
+        time.sleep(self._storage.latency)
+        options = options or {}
+        prefix = (path or "").strip("/")
+        prefix = prefix + "/" if prefix else ""
+
+        entries = {}
+        with self._storage.lock:
+            for file_path, (_, metadata) in self.files.items():
+                if not file_path.startswith(prefix):
+                    continue
+                name, _, rest = file_path[len(prefix):].partition("/")
+                if rest:
+                    entries.setdefault(name, {"name": name, "id": None, "metadata": None})
+                else:
+                    entries[name] = {"name": name, "id": file_path, "metadata": dict(metadata)}
+
+        items = [entries[name] for name in sorted(entries)]
+        offset = options.get("offset", 0)
+        return items[offset:offset + options.get("limit", 100)]
+
+    def get_public_url(self, path):
+        return f"{self._storage.url()}/{quote(self.name)}/{quote(path)}"
+
+    def create_signed_url(self, path, expires_in, options=None):
+        url = self.get_public_url(path)
+        return {"signedURL": url, "signedUrl": url}
+
+
+RESUMABLE_PATH = "/storage/v1/upload/resumable"
+
+
+class LocalStorage:
+    """Buckets of files held in memory and served over HTTP from a background thread."""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.buckets = {}
+        self.lock = threading.RLock()
+        self.resumable = {}  # upload id -> {bucket, path, length, data}
+        self.fail_every_nth_chunk = 0
+        self.chunk_requests = 0
+        self._server = None
+
+    def from_(self, name):
+        with self.lock:
+            if name not in self.buckets:
+                self.buckets[name] = LocalBucket(self, name)
+            return self.buckets[name]
+
+    def url(self):
+        """Base URL of the file server, which starts on first use."""
+        with self.lock:
+            if self._server is None:
+                storage = self
+
+                class Handler(BaseHTTPRequestHandler):
+                    protocol_version = "HTTP/1.1"
+
+                    def _reply(self, status, headers=None):
+                        self.send_response(status)
+                        for name, value in (headers or {}).items():
+                            self.send_header(name, value)
+                        self.send_header("Content-Length", "0")
+                        self.end_headers()
+
+                    def _body(self):
+                        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+                    def do_POST(self):
+                        # TUS creation: Upload-Length plus base64 bucketName/objectName metadata
+                        self._body()
+                        if self.path.rstrip("/") != RESUMABLE_PATH:
+                            self._reply(404)
+                            return
+                        metadata = {}
+                        for pair in self.headers.get("Upload-Metadata", "").split(","):
+                            key, _, value = pair.strip().partition(" ")
+                            metadata[key] = base64.b64decode(value).decode("utf-8")
+                        time.sleep(storage.latency)
+                        with storage.lock:
+                            bucket = storage.from_(metadata["bucketName"])
+                            upsert = self.headers.get("x-upsert", "false").lower() == "true"
+                            if metadata["objectName"] in bucket.files and not upsert:
+                                self._reply(409)
+                                return
+                            upload_id = uuid.uuid4().hex
+                            storage.resumable[upload_id] = {
+                                "bucket": metadata["bucketName"],
+                                "path": metadata["objectName"],
+                                "length": int(self.headers["Upload-Length"]),
+                                "data": bytearray(),
+                            }
+                        self._reply(201, {"Location": f"{RESUMABLE_PATH}/{upload_id}", "Tus-Resumable": "1.0.0"})
+
+                    def do_HEAD(self):
+                        upload = storage.resumable.get(self.path.rsplit("/", 1)[-1])
+                        if upload is None:
+                            self._reply(404)
+                            return
+                        self._reply(200, {"Upload-Offset": str(len(upload["data"])), "Upload-Length": str(upload["length"])})
+
+                    def do_PATCH(self):
+                        body = self._body()
+                        time.sleep(storage.latency)
+                        with storage.lock:
+                            upload = storage.resumable.get(self.path.rsplit("/", 1)[-1])
+                            storage.chunk_requests += 1
+                            dropped = storage.fail_every_nth_chunk and storage.chunk_requests % storage.fail_every_nth_chunk == 0
+                            if upload is None:
+                                self._reply(404)
+                                return
+                            if dropped:  # Simulates a connection lost mid-chunk; half the bytes arrived
+                                upload["data"].extend(body[: len(body) // 2])
+                                self.close_connection = True
+                                return
+                            if int(self.headers["Upload-Offset"]) != len(upload["data"]):
+                                self._reply(409)
+                                return
+                            upload["data"].extend(body)
+                            offset = len(upload["data"])
+                            if offset >= upload["length"]:
+                                bucket = storage.from_(upload["bucket"])
+                                metadata = {"size": offset, "lastModified": datetime.now(timezone.utc).isoformat()}
+                                bucket.files[upload["path"]] = (bytes(upload["data"]), metadata)
+                        self._reply(204, {"Upload-Offset": str(offset), "Tus-Resumable": "1.0.0"})
+
+                    def do_GET(self):
+                        bucket_name, _, path = unquote(self.path.lstrip("/")).partition("/")
+                        time.sleep(storage.latency)
+                        with storage.lock:
+                            bucket = storage.buckets.get(bucket_name)
+                            entry = bucket.files.get(path) if bucket else None
+                        if entry is None:
+                            self.send_error(404)
+                            return
+                        self.send_response(200)
+                        self.send_header("Content-Length", str(len(entry[0])))
+                        self.end_headers()
+                        self.wfile.write(entry[0])
+
+                    def log_message(self, format, *args):
+                        pass
+
+                self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+                self._server.daemon_threads = True
+                threading.Thread(target=self._server.serve_forever, name="local-storage", daemon=True).start()
+            return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+
+class LocalSupabaseClient:
+    """Drop-in replacement for supabase_client backed by Python lists."""
+
+    supabase_key = "local"
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.tables = {}
+        self.functions = {}
+        self.lock = threading.Lock()
+        self.storage = LocalStorage(latency)
+        self.define_table("documents", unique=["document_id"])
+
+        # Mirrors supabase/migrations/*_document_id_sequence.sql
+        document_id_seq = itertools.count(1)
+        sequence_lock = threading.Lock()
+
+        def reserve_document_ids(block_size=1):
+            with sequence_lock:
+                return [next(document_id_seq) for _ in range(max(block_size, 1))]
+
+        self.define_function("reserve_document_ids", reserve_document_ids)
+
+    @property
+    def storage_url(self):
+        return f"{self.storage.url()}/storage/v1/"
+
+    def define_function(self, name, function):
+        self.functions[name] = function
+
+    def rpc(self, name, params=None):
+        return LocalRpc(self.functions[name], params or {}, self.latency)
+
+    def define_table(self, name, unique=None):
+        with self.lock:
+            self.tables[name] = LocalTable(name, unique)
+        return self.tables[name]
+
+    def table(self, name):
+        with self.lock:
+            if name not in self.tables:
+                self.tables[name] = LocalTable(name)
+            return LocalQuery(self.tables[name], self.latency)
+
+
+class FakeRateLimitError(Exception):
+    """Looks like google.api_core.exceptions.ResourceExhausted to retry logic."""
+
+    code = 429
+
+
+class FakeGeminiModel:
+    """Stands in for genai.GenerativeModel and counts generate_content calls.
+
+    response is either a fixed string or a function of the prompt. Each call
+    sleeps for latency seconds (spread over the pieces when stream=True), and
+    roughly rate_limit_ratio of calls raise FakeRateLimitError (HTTP 429)
+    instead of answering.
+    """
+
+    def __init__(self, response="{}", model_name="fake-gemini", latency=0.0, rate_limit_ratio=0.0, seed=0):
+        self.response = response
+        self.model_name = model_name
+        self.latency = latency
+        self.rate_limit_ratio = rate_limit_ratio
+        self.calls = 0
+        self.rate_limited = 0
+        self.prompts = []
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        with self._lock:
+            self.calls += 1
+            self.prompts.append(prompt)
+            limited = self._random.random() < self.rate_limit_ratio
+            if limited:
+                self.rate_limited += 1
+        if limited:
+            time.sleep(self.latency)
+            raise FakeRateLimitError("429 Resource has been exhausted (e.g. check quota).")
+        text = self.response(prompt) if callable(self.response) else self.response
+        if stream:
+            return self._stream(text)
+        time.sleep(self.latency)
+        return SimpleNamespace(text=text)
+
+    def _stream(self, text, pieces=8):
+        """Yields text in word-aligned pieces, spreading latency evenly across them."""
+        words = text.split(" ")
+        size = max(1, -(-len(words) // pieces))
+        parts = [" ".join(words[i:i + size]) for i in range(0, len(words), size)]
+        for index, part in enumerate(parts):
+            time.sleep(self.latency / len(parts))
+            yield SimpleNamespace(text=part if index == 0 else " " + part)
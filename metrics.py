@@ -0,0 +1,279 @@
+"""Spans and counters for the KYC pipeline.
+
+    with span("download", file=file_path) as attrs:
+        ...
+        attrs["bytes"] = size
+
+Every span adds to a per-stage latency histogram, and numeric attributes
+(bytes, pages, prompt_chars, ...) add to per-stage counters. Spans are also
+written as JSON lines to METRICS_LOG ("-" for stderr), and everything is
+served in Prometheus text format on METRICS_PORT.
+
+Work done in a process pool is recorded in that process. Wrap it in
+capture() and merge() the returned delta in the parent to keep the totals.
+"""
+import bisect
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+METRICS_LOG = os.getenv("METRICS_LOG", "")  # File for JSON span logs, "-" for stderr, empty to disable
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))  # Port for the Prometheus endpoint, 0 to disable
+METRICS_RECENT_SPANS = int(os.getenv("METRICS_RECENT_SPANS", "200"))
+
+# Upper bounds in seconds of the latency histogram buckets
+BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120]
+
+_lock = threading.Lock()
+_histograms = {}  # stage -> {"buckets": [count per bucket + overflow], "sum", "count", "errors"}
+_counters = {}  # (name, stage) -> value
+_recent = deque(maxlen=METRICS_RECENT_SPANS)
+_gauges = {}  # name -> callable returning {label value: number}
+_log_file = None
+
+
+def _histogram(stage):
+    if stage not in _histograms:
+        _histograms[stage] = {"buckets": [0] * (len(BUCKETS) + 1), "sum": 0.0, "count": 0, "errors": 0}
+    return _histograms[stage]
+
+
+def _log(record):
+    global _log_file
+    if not METRICS_LOG:
+        return
+    line = json.dumps(record, default=str) + "\n"
+    with _lock:
+        if METRICS_LOG == "-":
+            sys.stderr.write(line)
+            return
+        if _log_file is None:
+            _log_file = open(METRICS_LOG, "a", encoding="utf-8")
+        _log_file.write(line)
+        _log_file.flush()
+
+
+def observe(stage, seconds, error=False):
+    """Records one timing for stage."""
+    with _lock:
+        histogram = _histogram(stage)
+        histogram["buckets"][bisect.bisect_left(BUCKETS, seconds)] += 1
+        histogram["sum"] += seconds
+        histogram["count"] += 1
+        histogram["errors"] += bool(error)
+
+
+def count(name, value=1, stage=""):
+    """Adds value to a counter such as bytes or pages, optionally per stage."""
+    with _lock:
+        _counters[(name, stage)] = _counters.get((name, stage), 0) + value
+
+
+@contextmanager
+def span(stage, **attrs):
+    """Times the block as stage. Yields a dict the block can add attributes to.
+
+    Numeric attributes are added to counters of the same name for the stage.
+    """
+    started = time.perf_counter()
+    error = None
+    try:
+        yield attrs
+    except BaseException as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        seconds = time.perf_counter() - started
+        observe(stage, seconds, error is not None)
+        for name, value in attrs.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                count(name, value, stage)
+
+        record = {"ts": time.time(), "stage": stage, "duration_ms": round(seconds * 1000, 2), "pid": os.getpid(), **attrs}
+        if error:
+            record["error"] = error
+        with _lock:
+            _recent.append(record)
+        _log(record)
+
+
+def timed(stage):
+    """Decorator form of span() for whole functions."""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def register_gauge(name, read):
+    """Exports read() -> {label: value} as a gauge, e.g. cache hit counts."""
+    _gauges[name] = read
+
+
+def snapshot():
+    """Copy of the histograms and counters recorded in this process."""
+    with _lock:
+        return {
+            "histograms": {stage: {**h, "buckets": list(h["buckets"])} for stage, h in _histograms.items()},
+            "counters": dict(_counters),
+        }
+
+
+@contextmanager
+def capture():
+    """Collects what is recorded inside the block; the yielded dict is filled on exit for merge()."""
+    before = snapshot()
+    delta = {}
+    try:
+        yield delta
+    finally:
+        after = snapshot()
+        delta["counters"] = {
+            key: value - before["counters"].get(key, 0)
+            for key, value in after["counters"].items()
+            if value != before["counters"].get(key, 0)
+        }
+        delta["histograms"] = {}
+        for stage, h in after["histograms"].items():
+            old = before["histograms"].get(stage)
+            if old is None:
+                delta["histograms"][stage] = h
+            elif h["count"] != old["count"]:
+                delta["histograms"][stage] = {
+                    "buckets": [new - prev for new, prev in zip(h["buckets"], old["buckets"])],
+                    "sum": h["sum"] - old["sum"],
+                    "count": h["count"] - old["count"],
+                    "errors": h["errors"] - old["errors"],
+                }
+
+
+def merge(delta):
+    """Adds metrics captured in another process to this one."""
+    if not delta:
+        return
+    with _lock:
+        for stage, h in delta.get("histograms", {}).items():
+            histogram = _histogram(stage)
+            histogram["buckets"] = [a + b for a, b in zip(histogram["buckets"], h["buckets"])]
+            histogram["sum"] += h["sum"]
+            histogram["count"] += h["count"]
+            histogram["errors"] += h["errors"]
+        for key, value in delta.get("counters", {}).items():
+            key = tuple(key)
+            _counters[key] = _counters.get(key, 0) + value
+
+
+def recent_spans(limit=50):
+    """The latest spans recorded in this process, newest first."""
+    with _lock:
+        return list(_recent)[-limit:][::-1]
+
+
+def stage_summary():
+    """Count, error count and mean/total milliseconds per stage, slowest total first."""
+    with _lock:
+        rows = [
+            {
+                "stage": stage,
+                "count": h["count"],
+                "errors": h["errors"],
+                "mean_ms": round(h["sum"] / h["count"] * 1000, 1) if h["count"] else 0.0,
+                "total_s": round(h["sum"], 2),
+            }
+            for stage, h in _histograms.items()
+        ]
+    return sorted(rows, key=lambda row: row["total_s"], reverse=True)
+
+
+def _labels(**labels):
+    pairs = ",".join(f'{key}="{str(value)}"' for key, value in labels.items() if value != "")
+    return "{" + pairs + "}" if pairs else ""
+
+
+def prometheus_text():
+    """All metrics in the Prometheus text exposition format."""
+    lines = ["# TYPE kyc_stage_seconds histogram"]
+    with _lock:
+        histograms = {stage: dict(h) for stage, h in _histograms.items()}
+        counters = dict(_counters)
+
+    for stage, h in sorted(histograms.items()):
+        cumulative = 0
+        for bound, bucket_count in zip(BUCKETS + ["+Inf"], h["buckets"]):
+            cumulative += bucket_count
+            lines.append(f"kyc_stage_seconds_bucket{_labels(stage=stage, le=bound)} {cumulative}")
+        lines.append(f"kyc_stage_seconds_sum{_labels(stage=stage)} {h['sum']}")
+        lines.append(f"kyc_stage_seconds_count{_labels(stage=stage)} {h['count']}")
+
+    lines.append("# TYPE kyc_stage_errors_total counter")
+    for stage, h in sorted(histograms.items()):
+        lines.append(f"kyc_stage_errors_total{_labels(stage=stage)} {h['errors']}")
+
+    for name in sorted({name for name, _ in counters}):
+        lines.append(f"# TYPE kyc_{name}_total counter")
+        for (counter_name, stage), value in sorted(counters.items()):
+            if counter_name == name:
+                lines.append(f"kyc_{name}_total{_labels(stage=stage)} {value}")
+
+    for name, read in sorted(_gauges.items()):
+        lines.append(f"# TYPE kyc_{name} gauge")
+        try:
+            values = read()
+        except Exception as e:
+            print(f"Error reading metric {name}: {e}")
+            continue
+        for label, value in sorted(values.items()):
+            lines.append(f"kyc_{name}{_labels(kind=label)} {value}")
+
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Scrapes every few seconds would flood the console
+
+
+_server = None
+
+
+def start_metrics_server(port=None):
+    """Serves /metrics on port (METRICS_PORT by default) from a daemon thread. Safe to call on every rerun."""
+    global _server
+    port = METRICS_PORT if port is None else port
+    with _lock:
+        if _server is not None or not port:
+            return _server
+        try:
+            _server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+        except OSError as e:
+            print(f"Metrics endpoint not started on port {port}: {e}")
+            return None
+        threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+        return _server
@@ -0,0 +1,69 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+import pymupdf
+import pytesseract
+from dotenv import load_dotenv
+from image_prep import prepare_for_ocr, render_page
+from ocr_engine import get_ocr_engine, image_to_string
+
+# Load environment variables
+load_dotenv()
+
+# Number of processes used to OCR scanned PDF pages (defaults to all cores)
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", os.cpu_count() or 1))
+
+# Maximum number of pages to OCR per PDF; 0 means no limit
+OCR_MAX_PAGES = int(os.getenv("OCR_MAX_PAGES", "0"))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool(workers):
+    """Returns the shared OCR process pool, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Each worker loads the OCR engine once, before its first page. Workers are
+            # spawned, not forked, since forking a threaded process can copy held locks.
+            _pool = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn"), initializer=get_ocr_engine
+            )
+        return _pool
+
+
+def ocr_pdf_page(file_path, page_number, tesseract_cmd=None):
+    """Renders a single PDF page and runs Tesseract over it."""
+    if tesseract_cmd:
+        pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+
+    # Opening the PDF is cheap next to OCR, and keeps each task independent
+    with pymupdf.open(file_path) as doc:
+        img = render_page(doc[page_number])  # Rendered straight into a PIL image
+    return image_to_string(prepare_for_ocr(img))
+
+
+def ocr_pdf_pages(file_path, max_pages=None, workers=None, page_numbers=None):
+    """OCRs the pages of a PDF across a process pool and returns their text in page order.
+
+    Only page_numbers are OCR'd if given (all pages otherwise), and pages past
+    max_pages (OCR_MAX_PAGES by default) are skipped.
+    """
+    max_pages = OCR_MAX_PAGES if max_pages is None else max_pages
+    workers = OCR_WORKERS if workers is None else workers
+
+    if page_numbers is None:
+        with pymupdf.open(file_path) as doc:
+            page_numbers = range(doc.page_count)
+    pages = [page_number for page_number in page_numbers if not max_pages or page_number < max_pages]
+    tesseract_cmd = pytesseract.pytesseract.tesseract_cmd
+
+    if workers <= 1 or len(pages) <= 1:
+        return [ocr_pdf_page(file_path, page_number, tesseract_cmd) for page_number in pages]
+
+    # map() yields results in submission order, so the text comes back in page order
+    pool = _get_pool(workers)
+    return list(pool.map(ocr_pdf_page, repeat(file_path), pages, repeat(tesseract_cmd)))
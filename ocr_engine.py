@@ -0,0 +1,90 @@
+import os
+import threading
+import pytesseract
+from dotenv import load_dotenv
+from metrics import span
+
+# Load environment variables
+load_dotenv()
+
+# "auto" uses tesserocr when it is installed and falls back to pytesseract
+OCR_ENGINE = os.getenv("OCR_ENGINE", "auto")
+OCR_LANG = os.getenv("OCR_LANG", "eng")
+TESSDATA_PREFIX = os.getenv("TESSDATA_PREFIX")
+
+
+class PytesseractEngine:
+    """Runs the tesseract binary once per image, as pytesseract always has."""
+
+    name = "pytesseract"
+
+    def image_to_string(self, image):
+        return pytesseract.image_to_string(image, lang=OCR_LANG)
+
+
+class TesserocrEngine:
+    """Calls the Tesseract library in-process through tesserocr.
+
+    Language data is loaded once per thread and images are passed as PIL
+    objects, so there is no process start, temp file or model load per image.
+    """
+
+    name = "tesserocr"
+
+    def __init__(self):
+        import tesserocr  # Optional dependency; ImportError means fall back
+
+        self._tesserocr = tesserocr
+        self._local = threading.local()
+        self._api()  # Fail now, not on the first image, if the language data is missing
+
+    def _api(self):
+        # A Tesseract API object is not thread-safe, so each thread keeps its own
+        api = getattr(self._local, "api", None)
+        if api is None:
+            kwargs = {"lang": OCR_LANG}
+            if TESSDATA_PREFIX:
+                kwargs["path"] = TESSDATA_PREFIX
+            api = self._local.api = self._tesserocr.PyTessBaseAPI(**kwargs)
+        return api
+
+    def image_to_string(self, image):
+        api = self._api()
+        api.SetImage(image)
+        return api.GetUTF8Text()
+
+
+def create_engine(name=None):
+    """Builds the named engine ('auto', 'tesserocr' or 'pytesseract')."""
+    name = name or OCR_ENGINE
+    if name == "pytesseract":
+        return PytesseractEngine()
+    try:
+        return TesserocrEngine()
+    except Exception as e:
+        if name == "tesserocr":
+            raise
+        if not isinstance(e, ImportError):
+            print(f"tesserocr unavailable, falling back to pytesseract: {e}")
+        return PytesseractEngine()
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_ocr_engine():
+    """Returns this process's OCR engine, creating it on first use."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = create_engine()
+        return _engine
+
+
+def image_to_string(image):
+    """OCRs a PIL image with the process-wide engine."""
+    engine = get_ocr_engine()
+    with span("tesseract", engine=engine.name) as attrs:
+        attrs["pixels"] = image.width * image.height
+        return engine.image_to_string(image)
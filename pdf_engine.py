@@ -0,0 +1,48 @@
+import os
+import pymupdf
+from dotenv import load_dotenv
+from ocr import ocr_pdf_pages
+from metrics import span
+
+# Load environment variables
+load_dotenv()
+
+# Pages whose text layer has fewer visible characters than this are treated as scanned
+PDF_MIN_PAGE_CHARS = int(os.getenv("PDF_MIN_PAGE_CHARS", "20"))
+
+
+def _visible_chars(text):
+    return sum(1 for char in text if not char.isspace())
+
+
+def pdf_page_texts(file_path, min_chars=None, max_pages=None, workers=None):
+    """Returns the text of every page of a PDF, in page order.
+
+    Pages with a usable text layer are read directly with PyMuPDF; only the
+    rest are rendered and OCR'd, in parallel. Scanned pages past max_pages
+    (OCR_MAX_PAGES by default) come back as empty strings.
+    """
+    min_chars = PDF_MIN_PAGE_CHARS if min_chars is None else min_chars
+
+    with span("pdf.text_layer") as attrs, pymupdf.open(file_path) as doc:
+        texts = [page.get_text("text") for page in doc]
+        attrs["pages"] = len(texts)
+
+    scanned = [page_number for page_number, text in enumerate(texts) if _visible_chars(text) < min_chars]
+    if scanned:
+        with span("pdf.ocr") as attrs:
+            ocr_texts = ocr_pdf_pages(file_path, max_pages=max_pages, workers=workers, page_numbers=scanned)
+            attrs["pages"] = len(ocr_texts)
+        # ocr_pdf_pages drops pages past max_pages, so pair results with the pages actually OCR'd
+        for page_number, text in zip(scanned, ocr_texts):
+            # Keep the text layer if OCR found nothing better, e.g. a page with only a page number
+            if _visible_chars(text) > _visible_chars(texts[page_number]):
+                texts[page_number] = text
+
+    return [text.strip() for text in texts]
+
+
+def extract_pdf_text(file_path, min_chars=None, max_pages=None, workers=None):
+    """Extracts the text of a whole PDF, one page per block, choosing text layer or OCR per page."""
+    texts = pdf_page_texts(file_path, min_chars, max_pages, workers)
+    return "\n".join(text for text in texts if text).strip()
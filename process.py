@@ -1,21 +1,37 @@
 import streamlit as st
-import google.generativeai as genai
-from PIL import Image, UnidentifiedImageError
-import pytesseract
-import pdfplumber
-import io
+from PIL import UnidentifiedImageError
 import os
 import json
 import re
-from database import get_all_documents, download_file_from_supabase
-
-# Configure Gemini API
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))  # Fixed closing parenthesis issue
-
-# Initialize the Gemini model
-GEMINI_MODEL = genai.GenerativeModel("gemini-1.5-pro")
-
-
+import textwrap
+from collections import Counter
+from database import get_documents_for_user, download_file_from_supabase
+from cache import cached_extractor, llm_cache, llm_key
+from llm_client import get_gemini_model, get_llm_client
+from pdf_engine import PDF_MIN_PAGE_CHARS, extract_pdf_text
+from image_prep import load_image, prep_settings, prepare_for_ocr
+from metrics import span, timed
+from ocr_engine import image_to_string
+from spool import release
+
+# The Gemini model is built on first use and reused for every call
+GEMINI_MODEL_NAME = "gemini-1.5-pro"
+
+# Bump whenever the analyze_text prompt changes so cached responses are not reused
+ANALYZE_PROMPT_VERSION = 1
+
+# Large inputs are split into chunks of roughly this many tokens and analyzed concurrently
+ANALYZE_CHUNK_TOKENS = int(os.getenv("ANALYZE_CHUNK_TOKENS", "6000"))
+
+EXTRACTION_FIELDS = ["name", "address", "dob", "phone_number"]
+
+
+@timed("extract.file")
+@cached_extractor(
+    "process.file",
+    version=3,
+    settings={"ocr": "tesseract", "pdf": "pymupdf", "min_chars": PDF_MIN_PAGE_CHARS, "prep": prep_settings()},
+)
 def extract_text_from_file(file_path, file_extension):
     """Extracts text from images (PNG/JPEG), PDFs, or text files."""
 
@@ -23,16 +39,12 @@ def extract_text_from_file(file_path, file_extension):
 
     try:
         if file_extension in ["png", "jpg", "jpeg"]:  # Process Image Files
-            image = Image.open(file_path)
-            extracted_text = pytesseract.image_to_string(image)  # OCR for text extraction
+            image = prepare_for_ocr(load_image(file_path))
+            extracted_text = image_to_string(image)  # OCR for text extraction
             return extracted_text.strip()
 
-        elif file_extension == "pdf":  # Process PDFs
-            extracted_text = ""
-            with pdfplumber.open(file_path) as pdf:
-                for page in pdf.pages:
-                    extracted_text += page.extract_text() + "\n"
-            return extracted_text.strip()
+        elif file_extension == "pdf":  # Process PDFs, OCR'ing only pages without a text layer
+            return extract_pdf_text(file_path)
 
         elif file_extension in ["txt", "csv"]:  # Process Plain Text Files
             with open(file_path, "r", encoding="utf-8") as file:
@@ -47,13 +59,9 @@ def extract_text_from_file(file_path, file_extension):
         return f"Error processing {file_path}: {str(e)}"
 
 
-def analyze_text(text):
-    """Analyzes extracted text using Gemini AI and ensures JSON output."""
-
-    model = genai.GenerativeModel("gemini-1.5-pro")
-
-    # Modify the prompt to explicitly request a structured JSON response
-    prompt = f"""
+def _analysis_prompt(text):
+    """Builds the prompt asking Gemini for a structured JSON response."""
+    return f"""
     Extract personal details (name, address, DOB, phone number, etc.) from the text.
     Ensure the response is a valid JSON object with the following keys: 
     - name
@@ -78,7 +86,9 @@ def analyze_text(text):
     - Ensure the response is **valid JSON only**.
     """
 
-    response = model.generate_content(prompt)
+
+def _parse_analysis(response):
+    """Parses a Gemini response into a dict. Returns (data, True) on success, (error, False) otherwise."""
 
     # Ensure the response is a string
     raw_output = response.text if response else ""
@@ -88,11 +98,141 @@ def analyze_text(text):
 
     try:
         # Parse JSON
-        extracted_data = json.loads(cleaned_output)
+        return json.loads(cleaned_output), True
     except json.JSONDecodeError:
-        extracted_data = {"error": "Invalid JSON response from Gemini", "raw_output": raw_output}
+        return {"error": "Invalid JSON response from Gemini", "raw_output": raw_output}, False
+
+
+def analyze_chunks(texts, model=None):
+    """Analyzes several texts, submitting every uncached one to Gemini as a single batch.
+
+    Successfully parsed responses are cached by input text, prompt version and model.
+    """
+    model = model or get_gemini_model(GEMINI_MODEL_NAME)
+    model_name = getattr(model, "model_name", GEMINI_MODEL_NAME)
+
+    cache_keys = [llm_key(text, ANALYZE_PROMPT_VERSION, model_name) for text in texts]
+    results = [llm_cache.get(cache_key) for cache_key in cache_keys]
+    missing = [i for i, result in enumerate(results) if result is None]
+
+    if missing:
+        prompts = [_analysis_prompt(texts[i]) for i in missing]
+        with span("llm.analyze", requests=len(prompts), cached=len(texts) - len(missing)) as attrs:
+            attrs["prompt_chars"] = sum(len(prompt) for prompt in prompts)
+            responses = get_llm_client().generate_batch(prompts, model)
+        for i, response in zip(missing, responses):
+            if isinstance(response, Exception):
+                results[i] = {"error": f"Gemini request failed: {response}"}
+                continue
+
+            results[i], parsed = _parse_analysis(response)
+            if parsed:
+                llm_cache.set(cache_keys[i], results[i])
+
+    return results
+
+
+def analyze_text(text, model=None):
+    """Analyzes extracted text using Gemini AI and ensures JSON output."""
+    return analyze_chunks([text], model=model)[0]
+
+
+def estimate_tokens(text):
+    """Rough token count; Gemini averages about four characters per token."""
+    return len(text) // 4 + 1
+
+
+def chunk_texts(texts, max_tokens=ANALYZE_CHUNK_TOKENS):
+    """Packs document texts into chunks of at most max_tokens.
+
+    Documents are kept whole where they fit; longer ones are split on line
+    boundaries, and a single line over the budget is split between words.
+    """
+    line_width = max(1, (max_tokens - 1) * 4)  # Characters that stay within max_tokens, newlines included
+    pieces = []
+    for text in texts:
+        if estimate_tokens(text) <= max_tokens:
+            pieces.append(text)
+            continue
+        lines = []
+        for line in text.splitlines():
+            lines += textwrap.wrap(line, line_width) if len(line) > line_width else [line]
+        piece = None
+        for line in lines:
+            # Checked with the newline the piece gets when it is packed into a chunk
+            if piece is not None and estimate_tokens(f"{piece}\n{line}\n") > max_tokens:
+                pieces.append(piece)
+                piece = None
+            piece = line if piece is None else f"{piece}\n{line}"
+        if piece is not None:
+            pieces.append(piece)
+
+    chunks = []
+    current = ""
+    for piece in pieces:
+        if current and estimate_tokens(current + piece + "\n") > max_tokens:
+            chunks.append(current)
+            current = ""
+        current += piece + "\n"
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _normalize_value(value):
+    return " ".join(str(value).split()).casefold()
+
+
+def merge_extractions(results):
+    """Reconciles per-chunk JSON results into one.
+
+    For each field the value found in the most chunks wins, with ties going to
+    the more complete (longer) value. Fields with disagreeing values are listed
+    under "conflicts" so they can be checked by hand, and chunks whose
+    analysis failed are counted in "failed_chunks".
+    """
+    valid = [result for result in results if isinstance(result, dict) and "error" not in result]
+    failed = len(results) - len(valid)
+    if not valid:
+        return {**results[0], "failed_chunks": failed} if results else {}
+
+    fields = list(EXTRACTION_FIELDS)
+    fields += [key for result in valid for key in result if key not in fields]
+
+    merged = {}
+    conflicts = {}
+    for field in fields:
+        values = [result[field] for result in valid if result.get(field) not in (None, "", [], {})]
+        if not values:
+            merged[field] = None
+            continue
+
+        counts = Counter(_normalize_value(value) for value in values)
+        best = max(values, key=lambda value: (counts[_normalize_value(value)], len(str(value))))
+        merged[field] = best
+        if len(counts) > 1:
+            conflicts[field] = sorted({str(value) for value in values})
+
+    if conflicts:
+        merged["conflicts"] = conflicts
+    if failed:
+        merged["failed_chunks"] = failed
+    return merged
+
+
+def analyze_texts(texts, model=None):
+    """Map-reduce version of analyze_text for many or long documents.
+
+    Each token-budgeted chunk is analyzed concurrently and the partial results
+    are merged, so wall-clock time follows the slowest chunk, not the total size.
+    """
+    chunks = chunk_texts(texts)
+    if len(chunks) <= 1:
+        return analyze_text("\n".join(texts), model=model)
+
+    return merge_extractions(analyze_chunks(chunks, model=model))
+
 
-    return extracted_data
 def process_documents():
     st.title("Process Documents with AI")
 
@@ -100,7 +240,7 @@ def process_documents():
         user = st.session_state.get("username", "Guest")
 
         # Fetch user's documents from Supabase
-        user_docs = [doc for doc in get_all_documents() if doc["user"] == user]
+        user_docs = get_documents_for_user(user, columns="document_id,filename")
 
         if user_docs:
             st.write("Select documents for processing:")
@@ -111,14 +251,18 @@ def process_documents():
 
                 for doc in user_docs:
                     if doc["filename"] in selected_docs:
-                        file_data = download_file_from_supabase(doc["document_id"])  # Fetch file
-                        file_path = io.BytesIO(file_data)
-
-                        extracted_text = extract_text_from_file(file_path, doc["filename"].split(".")[-1])
+                        file_path = download_file_from_supabase(doc["document_id"])  # Fetch file
+                        if file_path is None:
+                            st.error(f"Failed to download {doc['filename']}")
+                            continue
+
+                        try:
+                            extracted_text = extract_text_from_file(file_path, doc["filename"].split(".")[-1])
+                        finally:
+                            release(file_path)
                         extracted_texts.append(extracted_text)
 
-                combined_text = "\n".join(extracted_texts)
-                response = analyze_text(combined_text)  # Call Gemini API
+                response = analyze_texts(extracted_texts)  # Call Gemini API
 
                 st.write("### Extracted Information:")
                 st.json(response)
@@ -0,0 +1,126 @@
+import base64
+import os
+import threading
+import time
+from urllib.parse import urljoin
+import requests
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Files larger than this go up in resumable chunks instead of one request
+RESUMABLE_UPLOAD_THRESHOLD = int(os.getenv("RESUMABLE_UPLOAD_THRESHOLD", 6 * 1024 * 1024))
+UPLOAD_RETRIES = int(os.getenv("UPLOAD_RETRIES", "5"))  # Consecutive failed chunks before giving up
+
+UPLOAD_CHUNK_SIZE = 6 * 1024 * 1024  # Supabase Storage only accepts 6 MB chunks
+UPLOAD_TIMEOUT = (10, 120)  # (connect, read) seconds per request
+TUS_VERSION = "1.0.0"
+
+# (bucket, path, content hash) -> upload URL, so a retried upload continues where it stopped
+_pending = {}
+_pending_lock = threading.Lock()
+
+
+class UploadError(Exception):
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _encode_metadata(metadata):
+    return ",".join(
+        f"{key} {base64.b64encode(str(value).encode('utf-8')).decode('ascii')}" for key, value in metadata.items()
+    )
+
+
+def _create(session, endpoint, headers, bucket, path, size, content_type):
+    response = session.post(
+        endpoint,
+        headers={
+            **headers,
+            "Upload-Length": str(size),
+            "Upload-Metadata": _encode_metadata(
+                {"bucketName": bucket, "objectName": path, "contentType": content_type, "cacheControl": "3600"}
+            ),
+        },
+        timeout=UPLOAD_TIMEOUT,
+    )
+    if response.status_code != 201:
+        raise UploadError(f"Could not start upload of {path}: {response.status_code} {response.text}", response.status_code)
+    return urljoin(endpoint, response.headers["Location"])
+
+
+def _server_offset(session, upload_url, headers):
+    """Bytes the server already holds for upload_url, or None if the upload is gone."""
+    response = session.head(upload_url, headers=headers, timeout=UPLOAD_TIMEOUT)
+    if response.status_code in (404, 410):
+        return None
+    if response.status_code not in (200, 204):
+        raise UploadError(f"Could not check upload offset: {response.status_code}", response.status_code)
+    return int(response.headers["Upload-Offset"])
+
+
+def upload_resumable(
+    endpoint, key, bucket, path, file, size, content_hash, content_type="application/octet-stream", upsert=False
+):
+    """Uploads file to bucket/path with the TUS protocol Supabase Storage speaks.
+
+    The file is sent in UPLOAD_CHUNK_SIZE pieces. After a dropped connection
+    the server is asked how much it already has and sending resumes from
+    there, so only the interrupted chunk is repeated. With upsert an existing
+    object at path is replaced. Returns the number of chunks sent.
+    """
+    headers = {
+        "Tus-Resumable": TUS_VERSION,
+        "Authorization": f"Bearer {key}",
+        "apikey": key,
+        "x-upsert": "true" if upsert else "false",
+    }
+    pending_key = (bucket, path, content_hash)
+    chunks = 0
+    failures = 0
+
+    with requests.Session() as session:
+        with _pending_lock:
+            upload_url = _pending.get(pending_key)
+        offset = _server_offset(session, upload_url, headers) if upload_url else None
+        if offset is None:
+            upload_url = _create(session, endpoint, headers, bucket, path, size, content_type)
+            offset = 0
+            with _pending_lock:
+                _pending[pending_key] = upload_url
+
+        while offset < size:
+            file.seek(offset)
+            chunk = file.read(UPLOAD_CHUNK_SIZE)
+            try:
+                response = session.patch(
+                    upload_url,
+                    data=chunk,
+                    headers={**headers, "Upload-Offset": str(offset), "Content-Type": "application/offset+octet-stream"},
+                    timeout=UPLOAD_TIMEOUT,
+                )
+                if response.status_code != 204:
+                    raise UploadError(f"Chunk at {offset} rejected: {response.status_code} {response.text}", response.status_code)
+                offset = int(response.headers["Upload-Offset"])
+                chunks += 1
+                failures = 0
+            except (requests.RequestException, UploadError) as e:
+                failures += 1
+                if failures > UPLOAD_RETRIES:
+                    raise UploadError(f"Upload of {path} failed after {UPLOAD_RETRIES} retries: {e}")
+                time.sleep(min(2 ** failures, 30))
+                try:
+                    offset = _server_offset(session, upload_url, headers)
+                except (requests.RequestException, UploadError):
+                    continue  # Still unreachable; a wrong offset is corrected on the next failure
+                if offset is None:  # Expired on the server; start again
+                    upload_url = _create(session, endpoint, headers, bucket, path, size, content_type)
+                    offset = 0
+                    with _pending_lock:
+                        _pending[pending_key] = upload_url
+
+    with _pending_lock:
+        _pending.pop(pending_key, None)
+    return chunks
@@ -0,0 +1,114 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+import requests
+from dotenv import load_dotenv
+from cache import CACHE_DIR
+from metrics import span
+
+# Load environment variables
+load_dotenv()
+
+SPOOL_DIR = os.getenv("KYC_SPOOL_DIR", os.path.join(CACHE_DIR, "spool"))
+SPOOL_MAX_BYTES = int(os.getenv("SPOOL_MAX_BYTES", 1024 * 1024 * 1024))
+SPOOL_MAX_AGE = int(os.getenv("SPOOL_MAX_AGE", 60 * 60))  # Seconds since last use
+# Files newer than this are kept even over SPOOL_MAX_BYTES, since another
+# process sharing the spool may still be about to extract them
+SPOOL_MIN_AGE = int(os.getenv("SPOOL_MIN_AGE", 10 * 60))
+
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+DOWNLOAD_TIMEOUT = (10, 60)  # (connect, read) seconds
+SWEEP_INTERVAL = 60
+
+_last_sweep = 0.0
+_sweep_lock = threading.Lock()
+_in_use = {}  # path -> spool_url calls in this process not yet released
+
+
+def spool_url(url, suffix=""):
+    """Streams url into the spool directory in fixed-size chunks and returns the local path.
+
+    Spool files are named by the SHA-256 of their content, so downloading the
+    same bytes again reuses the existing file instead of adding another copy.
+    The path is held until release(path) is called and is never swept before.
+    """
+    os.makedirs(SPOOL_DIR, exist_ok=True)
+    digest = hashlib.sha256()
+    fd, part_path = tempfile.mkstemp(dir=SPOOL_DIR, suffix=".part")
+
+    try:
+        with span("download") as attrs, os.fdopen(fd, "wb") as f, requests.get(
+            url, stream=True, timeout=DOWNLOAD_TIMEOUT
+        ) as response:
+            if response.status_code != 200:
+                raise Exception(f"Failed to download file: {url}")
+            attrs["bytes"] = 0
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                digest.update(chunk)
+                f.write(chunk)
+                attrs["bytes"] += len(chunk)
+    except BaseException:
+        os.remove(part_path)
+        raise
+
+    path = os.path.join(SPOOL_DIR, digest.hexdigest() + suffix)
+    with _sweep_lock:
+        _in_use[path] = _in_use.get(path, 0) + 1
+        if os.path.exists(path):
+            os.remove(part_path)
+            os.utime(path)  # Reused, so keep it around for another SPOOL_MAX_AGE
+        else:
+            os.replace(part_path, path)
+
+    sweep(keep=path)
+    return path
+
+
+def release(path):
+    """Marks one spool_url() result as no longer needed, so sweep() may delete it."""
+    with _sweep_lock:
+        remaining = _in_use.get(path, 0) - 1
+        if remaining > 0:
+            _in_use[path] = remaining
+        else:
+            _in_use.pop(path, None)
+
+
+def sweep(force=False, keep=None):
+    """Deletes spool files unused for SPOOL_MAX_AGE, then the oldest ones while over SPOOL_MAX_BYTES.
+
+    Only released files older than SPOOL_MIN_AGE are deleted to save space;
+    keep, files not yet released and downloads in progress are never deleted.
+    """
+    global _last_sweep
+    with _sweep_lock:
+        now = time.time()
+        if not force and now - _last_sweep < SWEEP_INTERVAL:
+            return
+        _last_sweep = now
+
+        entries = []
+        for name in os.listdir(SPOOL_DIR):
+            path = os.path.join(SPOOL_DIR, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime))
+
+        entries.sort(key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        for path, size, mtime in entries:
+            if now - mtime < SPOOL_MAX_AGE and total <= SPOOL_MAX_BYTES:
+                break
+            if path == keep or path in _in_use or (path.endswith(".part") and now - mtime < SPOOL_MAX_AGE):
+                continue
+            if now - mtime < SPOOL_MIN_AGE:
+                continue  # Over the size limit, but too recent to be safe to delete
+            try:
+                os.remove(path)
+            except OSError:
+                continue  # Still open on Windows or already removed
+            total -= size
@@ -0,0 +1,179 @@
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+MANIFEST_TTL = float(os.getenv("MANIFEST_TTL", "300"))  # Seconds a listed user folder is trusted
+MANIFEST_LIST_WORKERS = int(os.getenv("MANIFEST_LIST_WORKERS", "8"))  # Concurrent storage.list() calls
+MANIFEST_PAGE_SIZE = int(os.getenv("MANIFEST_PAGE_SIZE", "1000"))  # Entries per storage.list() request
+
+# Supabase creates this placeholder to keep empty folders around
+PLACEHOLDER = ".emptyFolder"
+
+
+def _now_iso():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _entry(path, item):
+    metadata = item.get("metadata") or {}
+    return {
+        "path": path,
+        "name": item["name"],
+        "size": metadata.get("size"),
+        "last_modified": metadata.get("lastModified") or item.get("updated_at"),
+    }
+
+
+class StorageManifest:
+    """Cached listing of every object in a storage bucket laid out as user/folder/.../file.
+
+    Each user's folder tree is listed with concurrent, paginated storage.list()
+    calls and reused for ttl seconds. Uploads and deletes made by this process
+    are applied to the cached tree through record_upload() and record_delete(),
+    so only changes from elsewhere wait for a re-list.
+
+    get_bucket() must return the storage bucket client, e.g.
+    supabase_client.storage.from_("kyc-documents").
+    """
+
+    def __init__(self, get_bucket, ttl=MANIFEST_TTL, workers=MANIFEST_LIST_WORKERS, page_size=MANIFEST_PAGE_SIZE):
+        self.get_bucket = get_bucket
+        self.ttl = ttl
+        self.workers = workers
+        self.page_size = page_size
+        self.list_calls = 0
+        self._users = None  # (listed_at, [username])
+        self._trees = {}  # username -> {"listed_at", "folders": set, "objects": {path: entry}}
+        self._lock = threading.Lock()
+
+    def _list_page(self, prefix, offset):
+        with self._lock:
+            self.list_calls += 1
+        options = {"limit": self.page_size, "offset": offset, "sortBy": {"column": "name", "order": "asc"}}
+        return self.get_bucket().list(prefix, options) or []
+
+    def _list_prefix(self, prefix):
+        """Lists one folder level, following pagination. Returns (subfolder paths, file entries)."""
+        folders, files = [], []
+        offset = 0
+        while True:
+            items = self._list_page(prefix, offset)
+            for item in items:
+                if item["name"] == PLACEHOLDER:
+                    continue
+                path = f"{prefix}/{item['name']}" if prefix else item["name"]
+                # Folders come back without an id or metadata
+                if item.get("id") is None:
+                    folders.append(path)
+                else:
+                    files.append(_entry(path, item))
+            if len(items) < self.page_size:
+                return folders, files
+            offset += len(items)
+
+    def _list_trees(self, usernames):
+        """Lists the whole tree under each username, all folders in parallel."""
+        trees = {username: {"listed_at": time.monotonic(), "folders": set(), "objects": {}} for username in usernames}
+        if not trees:
+            return trees
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {pool.submit(self._list_prefix, username): username for username in usernames}
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    username = futures.pop(future)
+                    folders, files = future.result()
+                    tree = trees[username]
+                    for entry in files:
+                        tree["objects"][entry["path"]] = entry
+                    for folder in folders:
+                        tree["folders"].add(folder)
+                        futures[pool.submit(self._list_prefix, folder)] = username
+        return trees
+
+    def _is_fresh(self, listed_at, now):
+        return listed_at is not None and now - listed_at < self.ttl
+
+    def users(self):
+        """Top-level folder names, one per user."""
+        now = time.monotonic()
+        with self._lock:
+            cached = self._users
+        if cached and self._is_fresh(cached[0], now):
+            return list(cached[1])
+
+        folders, _ = self._list_prefix("")
+        usernames = sorted(folders)
+        with self._lock:
+            self._users = (now, usernames)
+        return list(usernames)
+
+    def _trees_for(self, usernames):
+        """Returns the cached tree for each username, re-listing stale ones together."""
+        now = time.monotonic()
+        with self._lock:
+            stale = [u for u in usernames if u not in self._trees or not self._is_fresh(self._trees[u]["listed_at"], now)]
+
+        if stale:
+            listed = self._list_trees(stale)
+            with self._lock:
+                self._trees.update(listed)
+
+        with self._lock:
+            return {username: self._trees[username] for username in usernames}
+
+    def folders(self, username):
+        """Direct subfolders of a user's folder (e.g. 'ID Proof', 'Address Proof')."""
+        tree = self._trees_for([username])[username]
+        return sorted(path.split("/")[1] for path in tree["folders"] if path.count("/") == 1)
+
+    def objects(self, usernames=None, folders=None):
+        """Object entries (path, name, size, last_modified) for the given users, or the whole bucket.
+
+        If folders is given, only objects under those top-level folders of each user are returned.
+        """
+        usernames = self.users() if usernames is None else list(usernames)
+        trees = self._trees_for(usernames)
+
+        entries = []
+        for username in usernames:
+            prefixes = tuple(f"{username}/{folder}/" for folder in folders) if folders else (f"{username}/",)
+            entries.extend(entry for path, entry in trees[username]["objects"].items() if path.startswith(prefixes))
+        return sorted(entries, key=lambda entry: entry["path"])
+
+    def refresh(self, usernames=None):
+        """Forgets cached listings so the next read lists storage again."""
+        with self._lock:
+            if usernames is None:
+                self._users = None
+                self._trees.clear()
+            else:
+                for username in usernames:
+                    self._trees.pop(username, None)
+
+    def record_upload(self, path, size=None):
+        """Adds an object this process just uploaded to the cached listing."""
+        parts = path.split("/")
+        with self._lock:
+            if self._users and parts[0] not in self._users[1]:
+                self._users = (self._users[0], sorted(self._users[1] + [parts[0]]))
+            tree = self._trees.get(parts[0])
+            if tree is None:
+                return  # Not listed yet; the first read will see it
+            for depth in range(2, len(parts)):
+                tree["folders"].add("/".join(parts[:depth]))
+            tree["objects"][path] = {"path": path, "name": parts[-1], "size": size, "last_modified": _now_iso()}
+
+    def record_delete(self, path):
+        """Removes an object this process just deleted from the cached listing."""
+        with self._lock:
+            tree = self._trees.get(path.split("/")[0])
+            if tree is not None:
+                tree["objects"].pop(path, None)
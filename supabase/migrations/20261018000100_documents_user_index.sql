@@ -0,0 +1,4 @@
+-- Per-user document queries filter on "user" and sort by timestamp;
+-- this index keeps them independent of the total table size.
+create index if not exists documents_user_timestamp_idx
+    on public.documents ("user", "timestamp" desc);
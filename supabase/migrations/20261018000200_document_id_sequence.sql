@@ -0,0 +1,28 @@
+-- Document IDs (DOCnnn) are allocated from a sequence so concurrent uploads
+-- can never receive the same number. Clients reserve blocks of IDs through
+-- reserve_document_ids() and hand them out locally.
+create sequence if not exists public.document_id_seq;
+
+-- Continue numbering after the highest existing DOCnnn
+select setval(
+    'public.document_id_seq',
+    coalesce(max(nullif(regexp_replace(document_id, '\D', '', 'g'), '')::bigint), 0) + 1,
+    false
+)
+from public.documents;
+
+create or replace function public.reserve_document_ids(block_size integer default 1)
+returns bigint[]
+language sql
+volatile
+as $$
+    select array_agg(nextval('public.document_id_seq'))
+    from generate_series(1, greatest(block_size, 1));
+$$;
+
+do $$
+begin
+    if not exists (select 1 from pg_constraint where conname = 'documents_document_id_key') then
+        alter table public.documents add constraint documents_document_id_key unique (document_id);
+    end if;
+end $$;
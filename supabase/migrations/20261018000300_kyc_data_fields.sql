@@ -0,0 +1,8 @@
+-- Normalized fields (name, dob, address, phone, id_numbers) parsed from each
+-- document's extracted text. Easy KYC answers direct lookups from this column
+-- without calling the LLM; the row's original_file_url is the source document.
+alter table public.kyc_data
+    add column if not exists fields jsonb not null default '{}'::jsonb;
+
+create index if not exists kyc_data_username_idx
+    on public.kyc_data (username);
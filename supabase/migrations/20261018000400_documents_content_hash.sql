@@ -0,0 +1,13 @@
+-- SHA-256 of each uploaded file. Uploading bytes a user already has stored
+-- records a new document that points at the existing object (storage_path)
+-- instead of writing it again, and later stages can key work on the hash.
+alter table public.documents
+    add column if not exists content_hash text,
+    add column if not exists storage_path text;
+
+create index if not exists documents_user_content_hash_idx
+    on public.documents ("user", content_hash);
+
+-- Deleting a document checks whether others still reference its object
+create index if not exists documents_storage_path_idx
+    on public.documents (storage_path);
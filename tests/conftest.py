@@ -0,0 +1,34 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# The app modules read these at import time; point them at throwaway values
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "local-test")
+os.environ.setdefault("GEMINI_API_KEY", "local-test")
+os.environ["KYC_CACHE_DIR"] = tempfile.mkdtemp(prefix="kyc-tests-")
+
+
+@pytest.fixture
+def local_client(monkeypatch):
+    """database.py and the pages wired to a fresh LocalSupabaseClient, with empty read caches."""
+    import database
+    import easy_kyc
+    import kyc
+    from cache import read_cache
+    from local_backend import LocalSupabaseClient
+
+    client = LocalSupabaseClient()
+    client.define_table("kyc_data")
+    # Pages bind supabase_client at import, so swap it in everywhere
+    for module in (database, kyc, easy_kyc):
+        monkeypatch.setattr(module, "supabase_client", client)
+    monkeypatch.setattr(database, "document_ids", database.DocumentIdAllocator())
+    read_cache.invalidate("documents", "kyc_data")
+    yield client
+    read_cache.invalidate("documents", "kyc_data")
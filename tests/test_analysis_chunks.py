@@ -0,0 +1,59 @@
+import pytest
+
+import process
+
+
+def test_short_texts_share_a_chunk():
+    assert process.chunk_texts(["Name: Jane Doe", "PAN: ABCDE1234F"], max_tokens=100) == ["Name: Jane Doe\nPAN: ABCDE1234F\n"]
+
+
+@pytest.mark.parametrize("max_tokens", [5, 20, 64])
+def test_chunks_respect_the_budget_and_keep_order(max_tokens):
+    texts = [
+        "\n".join(f"Line {i} of the first document" for i in range(40)),
+        "Address: " + " ".join(f"street{i}" for i in range(300)),  # One line far over the budget
+        "Name: Jane Doe",
+    ]
+    chunks = process.chunk_texts(texts, max_tokens=max_tokens)
+
+    assert len(chunks) > 1
+    assert all(process.estimate_tokens(chunk) <= max_tokens for chunk in chunks)
+    assert "".join(chunks).split() == "\n".join(texts).split()  # Nothing lost, nothing reordered
+
+
+def test_unbreakable_line_is_split_by_size():
+    chunks = process.chunk_texts(["x" * 1000], max_tokens=10)
+    assert all(process.estimate_tokens(chunk) <= 10 for chunk in chunks)
+    assert "".join(chunks).replace("\n", "") == "x" * 1000
+
+
+def test_merge_takes_the_majority_value():
+    merged = process.merge_extractions([
+        {"name": "Jane Doe", "dob": "1990-02-01"},
+        {"name": "jane  doe", "dob": "1990-02-01"},
+        {"name": "J. Doe", "dob": None},
+    ])
+    assert merged["name"] in ("Jane Doe", "jane  doe")
+    assert merged["dob"] == "1990-02-01"
+    assert merged["address"] is None
+    assert merged["conflicts"] == {"name": ["J. Doe", "Jane Doe", "jane  doe"]}
+    assert "failed_chunks" not in merged
+
+
+def test_merge_breaks_ties_with_the_longer_value():
+    merged = process.merge_extractions([{"address": "12 Lake Road"}, {"address": "12 Lake Road, Pune 411001"}])
+    assert merged["address"] == "12 Lake Road, Pune 411001"
+    assert merged["conflicts"] == {"address": ["12 Lake Road", "12 Lake Road, Pune 411001"]}
+
+
+def test_merge_reports_failed_chunks():
+    merged = process.merge_extractions([
+        {"name": "Jane Doe"},
+        {"error": "Invalid JSON response from Gemini", "raw_output": "..."},
+        {"error": "Gemini request failed: timeout"},
+    ])
+    assert merged["name"] == "Jane Doe"
+    assert merged["failed_chunks"] == 2
+
+    everything_failed = process.merge_extractions([{"error": "a"}, {"error": "b"}])
+    assert everything_failed == {"error": "a", "failed_chunks": 2}
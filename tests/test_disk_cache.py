@@ -0,0 +1,56 @@
+import os
+import time
+from types import SimpleNamespace
+
+import cache
+from cache import DiskCache
+
+
+def _age(cache_, key, seconds):
+    """Marks an entry as last used seconds ago."""
+    path = cache_._path(key)
+    mtime = time.time() - seconds
+    os.utime(path, (mtime, mtime))
+
+
+def test_lru_eviction_keeps_recently_used_entries(tmp_path):
+    disk = DiskCache(str(tmp_path), max_bytes=1000)
+    for i in range(5):
+        disk.set(f"key{i}", "x" * 100)
+        _age(disk, f"key{i}", 100 - i)
+    assert disk.get("key0") == "x" * 100  # Used again, so now the newest
+
+    for i in range(5, 10):
+        disk.set(f"key{i}", "x" * 100)
+
+    assert disk.stats()["bytes"] <= 1000
+    assert disk.stats()["bytes"] == disk._disk_usage()
+    assert disk.get("key0") is not None
+    assert disk.get("key1") is None
+    assert disk.get("key9") is not None
+
+
+def test_expired_entries_are_misses_and_free_their_space(tmp_path, monkeypatch):
+    disk = DiskCache(str(tmp_path), max_bytes=10_000, ttl=60)
+    disk.set("old", "x" * 100)
+    disk.set("new", "y" * 100)
+    assert disk.get("old") == "x" * 100
+
+    later = time.time() + 61
+    monkeypatch.setattr(cache, "time", SimpleNamespace(time=lambda: later, monotonic=time.monotonic))
+    assert disk.get("old") is None
+    assert disk.misses == 1
+    assert not os.path.exists(disk._path("old"))
+    assert disk.stats()["bytes"] == disk._disk_usage() > 0
+    assert disk.get("new") is None
+    assert disk.stats()["bytes"] == disk._disk_usage() == 0
+
+
+def test_size_is_right_across_overwrites(tmp_path):
+    disk = DiskCache(str(tmp_path), max_bytes=10_000)
+    disk.set("a", "x")
+    for size in (500, 50, 2000, 10):
+        disk.set("a", "x" * size)
+        disk.set("b", "y" * size)
+        assert disk.stats()["bytes"] == disk._disk_usage()
+    assert disk.get("a") == "x" * 10
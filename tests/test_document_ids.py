@@ -0,0 +1,58 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import database
+
+THREADS = 16
+SAVES_PER_THREAD = 40
+
+
+def test_parallel_saves_get_unique_ids(local_client, monkeypatch):
+    # Small blocks force many concurrent reservations against the sequence
+    monkeypatch.setattr(database, "document_ids", database.DocumentIdAllocator(block_size=3))
+
+    def save(worker):
+        results = []
+        for i in range(SAVES_PER_THREAD):
+            file_name = f"w{worker}_{i}.pdf"
+            results.append((database.save_document_metadata(f"user{worker}", "ID Proof", file_name, f"http://files/{file_name}"), file_name))
+        return results
+
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        results = [item for batch in pool.map(save, range(THREADS)) for item in batch]
+
+    doc_ids = [doc_id for (doc_id, error), _ in results]
+    assert all(error is None for (_, error), _ in results)
+    assert len(doc_ids) == THREADS * SAVES_PER_THREAD
+    assert len(set(doc_ids)) == len(doc_ids)
+
+    rows = {row["document_id"]: row for row in local_client.tables["documents"].rows}
+    assert set(rows) == set(doc_ids)
+    for (doc_id, _), file_name in results:
+        assert rows[doc_id]["filename"] == file_name
+        assert rows[doc_id]["url"] == f"http://files/{file_name}"
+
+
+def test_parallel_batches_and_single_saves_do_not_collide(local_client):
+    stored = {"url": "http://files/x.pdf", "content_hash": None, "storage_path": None}
+
+    def save_batch(worker):
+        uploads = [(f"b{worker}_{i}.pdf", stored) for i in range(7)]
+        return [doc_id for doc_id, error in database.save_documents_metadata(f"user{worker}", "ID Proof", uploads)]
+
+    def save_one(worker):
+        return [database.save_document_metadata(f"user{worker}", "Other", f"s{worker}.pdf", "http://files/s.pdf")[0]]
+
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        batches = list(pool.map(save_batch, range(THREADS)))
+        singles = list(pool.map(save_one, range(THREADS)))
+
+    doc_ids = [doc_id for ids in batches + singles for doc_id in ids]
+    assert None not in doc_ids
+    assert len(set(doc_ids)) == len(doc_ids) == THREADS * 8
+    assert sorted(row["document_id"] for row in local_client.tables["documents"].rows) == sorted(doc_ids)
+
+
+def test_ids_continue_across_allocators(local_client):
+    first = database.DocumentIdAllocator(block_size=5).next_ids(3)
+    second = database.DocumentIdAllocator(block_size=5).next_ids(3)
+    assert not set(first) & set(second)
@@ -0,0 +1,63 @@
+import pytest
+
+import database
+
+DOCUMENTS = [
+    {"document_id": "DOC-1", "user": "alice", "type": "ID Proof", "filename": "pan.pdf", "url": "u1", "timestamp": "2024-01-01T10:00:00"},
+    {"document_id": "DOC-2", "user": "bob", "type": "Address Proof", "filename": "bill.pdf", "url": "u2", "timestamp": "2024-01-02T10:00:00"},
+    {"document_id": "DOC-3", "user": "alice", "type": "Address Proof", "filename": "lease.pdf", "url": "u3", "timestamp": "2024-01-03T10:00:00"},
+    {"document_id": "DOC-4", "user": "alice", "type": "Income Proof", "filename": "slip.pdf", "url": "u4", "timestamp": "2024-01-04T10:00:00"},
+    {"document_id": "DOC-5", "user": "carol", "type": "ID Proof", "filename": "passport.jpg", "url": "u5", "timestamp": "2024-01-05T10:00:00"},
+]
+
+
+@pytest.fixture
+def documents(local_client):
+    local_client.table("documents").insert(DOCUMENTS).execute()
+    return local_client
+
+
+def ids(rows):
+    return [row["document_id"] for row in rows]
+
+
+def test_query_filters_by_value_and_list(documents):
+    assert ids(database.query_documents({"user": "alice"})) == ["DOC-1", "DOC-3", "DOC-4"]
+    assert ids(database.query_documents({"user": "alice", "type": "ID Proof"})) == ["DOC-1"]
+    assert ids(database.query_documents({"type": ["ID Proof", "Income Proof"]})) == ["DOC-1", "DOC-4", "DOC-5"]
+    assert database.query_documents({"user": "nobody"}) == []
+
+
+def test_query_projects_columns(documents):
+    rows = database.query_documents({"user": "bob"}, columns="document_id,filename")
+    assert rows == [{"document_id": "DOC-2", "filename": "bill.pdf"}]
+
+
+def test_query_orders_and_pages(documents):
+    assert ids(database.query_documents(order_by="timestamp", descending=True)) == ["DOC-5", "DOC-4", "DOC-3", "DOC-2", "DOC-1"]
+
+    pages = [ids(database.query_documents(limit=2, offset=offset)) for offset in (0, 2, 4, 6)]
+    assert pages == [["DOC-1", "DOC-2"], ["DOC-3", "DOC-4"], ["DOC-5"], []]
+
+
+def test_count_documents(documents):
+    assert database.count_documents() == 5
+    assert database.count_documents({"user": "alice"}) == 3
+    assert database.count_documents({"type": ["ID Proof", "Address Proof"]}) == 4
+    assert database.count_documents({"user": "nobody"}) == 0
+
+
+def test_count_sees_new_documents(documents):
+    assert database.count_documents({"user": "bob"}) == 1
+    doc_id, error = database.save_document_metadata("bob", "ID Proof", "id.pdf", "u6")
+    assert error is None
+    assert database.count_documents({"user": "bob"}) == 2
+    assert doc_id in ids(database.query_documents({"user": "bob"}))
+
+
+def test_documents_for_user_newest_first_and_paged(documents):
+    assert ids(database.get_documents_for_user("alice")) == ["DOC-4", "DOC-3", "DOC-1"]
+    assert ids(database.get_documents_for_user("alice", limit=2, offset=1)) == ["DOC-3", "DOC-1"]
+
+    rows = database.get_documents_for_user("carol", columns="document_id,filename")
+    assert rows == [{"document_id": "DOC-5", "filename": "passport.jpg"}]
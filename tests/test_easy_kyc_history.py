@@ -0,0 +1,58 @@
+from types import SimpleNamespace
+
+import easy_kyc
+from llm_client import LLMClient
+
+
+def _history(*turns):
+    messages = []
+    for question, answer in turns:
+        messages += [{"role": "user", "content": question}, {"role": "bot", "content": answer}]
+    return {"messages": messages, "summary": [], "compacted_turns": 0}
+
+
+def test_old_turns_are_summarized():
+    history = _history(*[(f"question {i}", "answer " * 50) for i in range(20)])
+    easy_kyc.compact_history(history)
+
+    assert len(history["messages"]) <= easy_kyc.EASY_KYC_HISTORY_MESSAGES
+    assert history["compacted_turns"] == 20 - len(history["messages"]) // 2
+    assert history["summary"][-1].startswith(f"Q: question {history['compacted_turns'] - 1} A: answer")
+    assert sum(len(line) + 1 for line in history["summary"]) <= easy_kyc.EASY_KYC_SUMMARY_CHARS
+    assert history["messages"][-2]["content"] == "question 19"
+
+
+def test_oversized_last_turn_is_truncated():
+    history = _history(("summarize everything", "x" * (easy_kyc.EASY_KYC_HISTORY_CHARS * 3)))
+    easy_kyc.compact_history(history)
+
+    assert len(history["messages"]) == 2
+    assert history["messages"][0]["content"] == "summarize everything"
+    assert sum(len(message["content"]) for message in history["messages"]) <= easy_kyc.EASY_KYC_HISTORY_CHARS
+    assert history["messages"][1]["content"].endswith("…")
+
+
+class BlockedChunkModel:
+    """Streams a chunk whose .text raises, as Gemini does for blocked or empty candidates."""
+
+    model_name = "blocked-chunk"
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        yield SimpleNamespace(text="Hello")
+        yield SimpleNamespace()  # No text attribute at all
+        yield self._blocked()
+        yield SimpleNamespace(text=" world")
+
+    @staticmethod
+    def _blocked():
+        class Blocked:
+            @property
+            def text(self):
+                raise ValueError("The response.text quick accessor only works when the response contains a valid Part")
+
+        return Blocked()
+
+
+def test_stream_skips_chunks_without_text():
+    client = LLMClient(max_retries=0)
+    assert "".join(client.generate_stream("hi", BlockedChunkModel(), timeout=5)) == "Hello world"
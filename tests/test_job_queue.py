@@ -0,0 +1,66 @@
+import pytest
+
+import extractors
+import job_queue
+import kyc
+import kyc_index
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    saved = []
+    monkeypatch.setattr(kyc, "download_file", lambda username, file_path: (f"/spool/{file_path}", f"http://files/{file_path}"))
+    monkeypatch.setattr(kyc, "save_kyc_data", lambda *args: saved.append(args))
+    monkeypatch.setattr(kyc_index, "sync_user_index", lambda username: None)
+    monkeypatch.setattr(job_queue, "JOB_RETRY_DELAY", 0)
+    queue = job_queue.JobQueue(str(tmp_path / "jobs.sqlite3"), max_attempts=2)
+    queue.saved = saved
+    return queue
+
+
+def test_extracted_text_is_saved_and_job_done(queue, monkeypatch):
+    monkeypatch.setattr(extractors, "extract_document", lambda path, name: ("pdf", "Name: Jane Doe"))
+    queue.enqueue("alice", "id/pan.pdf")
+
+    assert job_queue.work(queue, idle_exit=True) == 1
+    assert queue.saved == [("alice", "pdf", "Name: Jane Doe", "http://files/id/pan.pdf")]
+    assert queue.counts("alice")["done"] == 1
+
+
+@pytest.mark.parametrize("text", ["Error extracting text from PDF: file is damaged", "Unsupported file type: docx"])
+def test_extractor_error_text_fails_the_job(queue, monkeypatch, text):
+    monkeypatch.setattr(extractors, "extract_document", lambda path, name: ("pdf", text))
+    queue.enqueue("alice", "id/pan.pdf")
+
+    assert job_queue.work(queue, idle_exit=True) == 2  # Retried once, then given up
+    assert queue.saved == []
+    [job] = queue.jobs_for_user("alice")
+    assert job["status"] == "failed"
+    assert job["attempts"] == 2
+    assert job["error"] == f"RuntimeError: {text}"
+
+
+def test_expired_lease_counts_as_an_attempt(tmp_path):
+    queue = job_queue.JobQueue(str(tmp_path / "jobs.sqlite3"), max_attempts=2, lease_seconds=-1)
+    queue.enqueue("alice", "id/pan.pdf")
+
+    # Each claimer "dies" without completing, so the lease is already expired
+    assert queue.claim("worker-1")["attempts"] == 1
+    assert queue.claim("worker-2")["attempts"] == 2
+    assert queue.claim("worker-3") is None
+
+    [job] = queue.jobs_for_user("alice")
+    assert job["status"] == "failed"
+    assert job["error"] == "Worker stopped before finishing"
+
+
+def test_batch_save_rejects_extractor_errors(local_client):
+    results = [
+        {"document_type": "pdf", "extracted_text": "Name: Jane Doe", "file_url": "http://files/a.pdf"},
+        {"document_type": "pdf", "extracted_text": "Error extracting text from PDF: damaged", "file_url": "http://files/b.pdf"},
+        {"document_type": "image", "extracted_text": "Unsupported file type: gif", "file_url": "http://files/c.gif"},
+    ]
+    errors = kyc.save_kyc_data_batch("alice", results)
+
+    assert errors == [None, "Error extracting text from PDF: damaged", "Unsupported file type: gif"]
+    assert [row["original_file_url"] for row in local_client.tables["kyc_data"].rows] == ["http://files/a.pdf"]
@@ -0,0 +1,79 @@
+from datetime import date
+
+import pytest
+
+from kyc_fields import age_on, extract_fields, filter_id_numbers, lookup_field
+
+ID_PROOF = """GOVERNMENT OF INDIA
+Name: jane  doe
+Father's Name: John Doe
+Date of Birth: 02/05/1982
+Address: 12 MG Road, Bengaluru 560001
+Mobile: +91 98765 43210
+PAN: ABCDE1234F
+Aadhaar 1234 5678 9012
+Passport No: K1234567
+"""
+
+
+@pytest.fixture
+def documents():
+    return [{"document_type": "ID Proof", "source": "http://files/kyc/jane/ID%20Proof/id.pdf", "fields": extract_fields(ID_PROOF)}]
+
+
+def test_extract_fields_normalizes_values():
+    fields = extract_fields(ID_PROOF)
+    assert fields["name"] == "Jane Doe"
+    assert fields["dob"] == "1982-05-02"
+    assert fields["phone"] == "+919876543210"
+    assert {item["type"]: item["value"] for item in fields["id_numbers"]} == {
+        "Passport No": "K1234567",
+        "PAN": "ABCDE1234F",
+        "Aadhaar": "123456789012",
+    }
+
+
+@pytest.mark.parametrize(
+    "question, field",
+    [
+        ("What is the customer's date of birth?", "dob"),
+        ("What is the customer's name?", "name"),
+        ("What is the phone number?", "phone"),
+        ("What is the PAN?", "id_numbers"),
+        ("What is her age?", "age"),
+        ("How old is the customer?", "age"),
+        ("What is the father's name?", None),
+        ("Who is the nominee?", None),
+        ("What is the spouse's date of birth?", None),
+        ("Mother's name?", None),
+        ("How does the address compare with the ID proof?", None),
+        ("Summarise the identity documents.", None),
+    ],
+)
+def test_lookup_field_routing(question, field):
+    assert lookup_field(question) == field
+
+
+def test_filter_id_numbers_by_kind():
+    id_numbers = extract_fields(ID_PROOF)["id_numbers"]
+    assert [item["value"] for item in filter_id_numbers("What is the PAN?", id_numbers)] == ["ABCDE1234F"]
+    assert [item["value"] for item in filter_id_numbers("Passport number?", id_numbers)] == ["K1234567"]
+    assert filter_id_numbers("List the ID numbers", id_numbers) == id_numbers
+    assert filter_id_numbers("What is the voter ID number?", id_numbers) == []
+
+
+def test_age_on():
+    assert age_on("1982-05-02", today=date(2026, 5, 1)) == 43
+    assert age_on("1982-05-02", today=date(2026, 5, 2)) == 44
+
+
+def test_answers_from_fields(documents):
+    import easy_kyc
+
+    assert easy_kyc.answer_from_fields("What is the PAN?", documents) == "ID numbers: PAN: ABCDE1234F (from ID Proof - id.pdf)"
+    assert easy_kyc.answer_from_fields("What is her age?", documents) == (
+        f"Age: {age_on('1982-05-02')} (born 1982-05-02) (from ID Proof - id.pdf)"
+    )
+    assert easy_kyc.answer_from_fields("What is the father's name?", documents) is None
+    # Nothing stored of the kind asked for, so the LLM gets the question
+    assert easy_kyc.answer_from_fields("What is the voter ID number?", documents) is None
@@ -0,0 +1,76 @@
+import pytest
+
+import kyc
+import kyc_index
+from local_backend import LocalQuery
+
+DOCUMENTS = {
+    "pan.pdf": "Income Tax Department. Permanent Account Number card. Name: Jane Doe. PAN: ABCDE1234F.",
+    "bill.pdf": "Electricity bill for the billing period March. Address: 12 Lake Road, Pune. Amount due 1450.",
+    "slip.pdf": "Salary slip. Employer: Acme Steel. Gross monthly salary 85000, net pay 71000.",
+}
+
+
+@pytest.fixture
+def index(local_client, tmp_path, monkeypatch):
+    monkeypatch.setattr(kyc_index, "KYC_INDEX_DIR", str(tmp_path / "index"))
+    monkeypatch.setattr(kyc_index, "KYC_EMBED_BACKEND", "local")
+    monkeypatch.setattr(kyc_index, "_embed_model", kyc_index.HashEmbedding())
+    monkeypatch.setattr(kyc_index, "_indexes", {})
+    return kyc_index
+
+
+def _save(file_name, text, username="alice"):
+    kyc.save_kyc_data(username, "pdf", text, f"http://files/{username}/{file_name}")
+
+
+def test_sync_only_fetches_new_rows(index, monkeypatch):
+    for file_name, text in list(DOCUMENTS.items())[:2]:
+        _save(file_name, text)
+    _save("other.pdf", "Someone else's document", username="bob")
+
+    after_ids = []
+    gt = LocalQuery.gt
+
+    def record_gt(self, column, value):
+        after_ids.append((column, value))
+        return gt(self, column, value)
+
+    monkeypatch.setattr(LocalQuery, "gt", record_gt)
+
+    assert index.sync_user_index("alice") == 2
+    assert after_ids == []
+    assert index.sync_user_index("alice") == 0
+    assert after_ids == [("id", 2)]
+
+    _save("slip.pdf", DOCUMENTS["slip.pdf"])
+    assert index.sync_user_index("alice") == 1
+    assert after_ids[-1] == ("id", 2)
+    assert index._indexed_row_ids(index._get_index("alice")) == {1, 2, 4}
+
+
+def test_index_reloads_from_disk(index):
+    for file_name, text in DOCUMENTS.items():
+        _save(file_name, text)
+    index.sync_user_index("alice")
+
+    index._indexes.clear()  # As in a new process
+    reloaded = index._get_index("alice")
+    assert index._indexed_row_ids(reloaded) == {1, 2, 3}
+    assert index.sync_user_index("alice") == 0
+    assert any("12 Lake Road" in chunk for chunk in index.retrieve_context("alice", "address lake road", top_k=1))
+
+
+def test_retrieve_returns_the_relevant_chunk(index):
+    for file_name, text in DOCUMENTS.items():
+        _save(file_name, text)
+    index.sync_user_index("alice")
+
+    chunks = index.retrieve_context("alice", "What is the gross monthly salary?", top_k=2)
+    assert len(chunks) == 2
+    assert any("Gross monthly salary 85000" in chunk for chunk in chunks)
+    assert "Gross monthly salary 85000" in index.retrieve_context("alice", "salary slip employer", top_k=1)[0]
+
+
+def test_no_documents_no_context(index):
+    assert index.retrieve_context("carol", "anything") == []
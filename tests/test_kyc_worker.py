@@ -0,0 +1,41 @@
+import pytest
+
+import job_queue
+import kyc
+import kyc_worker
+
+
+@pytest.fixture
+def jobs(tmp_path, monkeypatch):
+    queue = job_queue.JobQueue(str(tmp_path / "jobs.sqlite3"))
+    monkeypatch.setattr(kyc, "job_queue", queue)
+    return queue
+
+
+def _saved(client, username, file_path):
+    url = client.storage.from_(kyc.BUCKET_NAME).get_public_url(f"{username}/{file_path}")
+    kyc.save_kyc_data(username, "pdf", f"text of {file_path}", url)
+
+
+def test_skips_files_already_extracted_elsewhere(local_client, jobs):
+    _saved(local_client, "alice", "id/pan.pdf")  # e.g. by the "Process Documents" button
+    jobs.enqueue("bob", "id/passport.pdf")  # Left to the job workers
+
+    keys = ["alice/id/pan.pdf", "alice/address/bill.pdf", "bob/id/passport.pdf", "bob/id/licence.jpg"]
+    assert kyc_worker.skip_extracted(keys) == ["alice/address/bill.pdf", "bob/id/licence.jpg"]
+
+
+def test_restart_does_not_duplicate_saved_rows(local_client, jobs, tmp_path, monkeypatch):
+    _saved(local_client, "alice", "id/pan.pdf")
+    keys = ["alice/id/pan.pdf", "alice/address/bill.pdf"]
+    monkeypatch.setattr(kyc_worker, "collect_files", lambda usernames, folders=None: keys)
+    started = []
+
+    def run_pipeline(todo, **kwargs):
+        started.extend(todo)
+        return iter(())
+
+    monkeypatch.setattr(kyc_worker, "run_pipeline", run_pipeline)
+    checkpoint = str(tmp_path / "worker.checkpoint")
+    assert kyc_worker.run(["alice"], checkpoint=checkpoint, restart=True) == 0
+    assert started == ["alice/address/bill.pdf"]
@@ -0,0 +1,65 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import cache
+import process
+from local_backend import FakeGeminiModel
+
+RESPONSE = '{"name": "Jane Doe", "address": "1 Park St", "dob": "1990-02-01", "phone_number": "+15550100"}'
+
+
+@pytest.fixture
+def llm_cache(tmp_path, monkeypatch):
+    fresh = cache.DiskCache(str(tmp_path / "llm"), max_bytes=1024 * 1024, ttl=60)
+    monkeypatch.setattr(process, "llm_cache", fresh)
+    return fresh
+
+
+def test_whitespace_variants_share_one_call(llm_cache):
+    model = FakeGeminiModel(RESPONSE)
+
+    first = process.analyze_text("Name: Jane Doe\nDOB: 01/02/1990", model=model)
+    second = process.analyze_text("  Name:   Jane Doe \n\n DOB: 01/02/1990 ", model=model)
+
+    assert model.calls == 1
+    assert first == second == {"name": "Jane Doe", "address": "1 Park St", "dob": "1990-02-01", "phone_number": "+15550100"}
+    assert llm_cache.hits == 1
+
+
+def test_case_variants_are_separate_calls(llm_cache):
+    # Names and ID numbers are case-sensitive, so these are different documents
+    model = FakeGeminiModel(RESPONSE)
+
+    process.analyze_text("PAN: ABCDE1234F", model=model)
+    process.analyze_text("PAN: abcde1234f", model=model)
+
+    assert model.calls == 2
+    assert llm_cache.hits == 0
+
+
+def test_invalid_json_is_not_cached(llm_cache):
+    model = FakeGeminiModel("Sorry, I can't help with that.")
+
+    first = process.analyze_text("Name: Jane Doe", model=model)
+    second = process.analyze_text("Name: Jane Doe", model=model)
+
+    assert model.calls == 2
+    assert first["error"] == second["error"] == "Invalid JSON response from Gemini"
+    assert llm_cache.hits == 0
+
+
+def test_expired_entries_call_the_model_again(llm_cache, monkeypatch):
+    model = FakeGeminiModel(RESPONSE)
+    process.analyze_text("Name: Jane Doe", model=model)
+    process.analyze_text("Name: Jane Doe", model=model)
+    assert model.calls == 1
+
+    later = time.time() + llm_cache.ttl + 1
+    monkeypatch.setattr(cache, "time", SimpleNamespace(time=lambda: later, monotonic=time.monotonic))
+    process.analyze_text("Name: Jane Doe", model=model)
+    assert model.calls == 2
+
+    process.analyze_text("Name: Jane Doe", model=model)  # Stored again after the refresh
+    assert model.calls == 2
@@ -0,0 +1,135 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import llm_client
+from llm_client import LLMClient, TokenBucket
+from local_backend import FakeGeminiModel, FakeRateLimitError
+
+
+class SlowModel:
+    """Blocks for latency seconds per call and records how many calls ran at once."""
+
+    model_name = "slow"
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.running = 0
+        self.max_running = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt, **kwargs):
+        with self._lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(self.latency)
+        with self._lock:
+            self.running -= 1
+        return SimpleNamespace(text=prompt)
+
+
+def test_timed_out_call_keeps_its_slot_until_the_thread_returns():
+    client = LLMClient(requests_per_minute=6000, max_concurrency=1, max_retries=0)
+    model = SlowModel(latency=0.5)
+
+    with pytest.raises(asyncio.TimeoutError):
+        client.generate("first", model, timeout=0.1)
+    assert client.generate("second", model, timeout=5).text == "second"
+    assert model.max_running == 1
+
+
+def test_batch_stays_within_max_concurrency():
+    client = LLMClient(requests_per_minute=6000, max_concurrency=2, max_retries=0)
+    model = SlowModel(latency=0.05)
+
+    responses = client.generate_batch([f"p{i}" for i in range(8)], model, timeout=5)
+    assert [response.text for response in responses] == [f"p{i}" for i in range(8)]
+    assert model.max_running == 2
+
+
+class ServerError(Exception):
+    code = 503
+
+
+class FlakyModel:
+    """Fails with error the first failures calls, then answers."""
+
+    model_name = "flaky"
+
+    def __init__(self, error, failures):
+        self.error = error
+        self.failures = failures
+        self.calls = 0
+
+    def generate_content(self, prompt, **kwargs):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error
+        return SimpleNamespace(text="ok")
+
+
+@pytest.fixture
+def no_jitter(monkeypatch):
+    monkeypatch.setattr(llm_client, "random", SimpleNamespace(uniform=lambda low, high: 1.0))
+
+
+def test_rate_limited_calls_are_retried_with_backoff(no_jitter):
+    client = LLMClient(requests_per_minute=6000, max_retries=3, backoff_base=0.05)
+    model = FakeGeminiModel("{}", rate_limit_ratio=1.0)
+
+    started = time.monotonic()
+    with pytest.raises(FakeRateLimitError):
+        client.generate("hi", model, timeout=5)
+    elapsed = time.monotonic() - started
+
+    assert model.calls == 4  # The first try and three retries
+    assert client.retries == 3
+    assert elapsed >= 0.05 + 0.1 + 0.2  # Backoff doubles after each failure
+
+
+def test_server_errors_are_retried_until_success(no_jitter):
+    client = LLMClient(requests_per_minute=6000, max_retries=3, backoff_base=0.01)
+    model = FlakyModel(ServerError("503 Service Unavailable"), failures=2)
+
+    assert client.generate("hi", model, timeout=5).text == "ok"
+    assert model.calls == 3
+    assert client.retries == 2
+
+
+def test_some_rate_limits_in_a_batch(no_jitter):
+    client = LLMClient(requests_per_minute=6000, max_concurrency=4, max_retries=10, backoff_base=0.001)
+    model = FakeGeminiModel("{}", rate_limit_ratio=0.3, seed=1)
+
+    responses = client.generate_batch([f"p{i}" for i in range(20)], model, timeout=10)
+    assert all(response.text == "{}" for response in responses)
+    assert model.rate_limited > 0
+    assert model.calls == 20 + model.rate_limited == client.calls
+    assert client.retries == model.rate_limited
+
+
+def test_other_errors_are_raised_at_once():
+    client = LLMClient(requests_per_minute=6000, max_retries=3, backoff_base=1.0)
+    model = FlakyModel(ValueError("Invalid argument"), failures=1)
+
+    started = time.monotonic()
+    with pytest.raises(ValueError):
+        client.generate("hi", model, timeout=5)
+    assert model.calls == 1
+    assert client.retries == 0
+    assert time.monotonic() - started < 0.5
+
+
+def test_token_bucket_limits_the_rate():
+    async def acquire(bucket, times):
+        started = time.monotonic()
+        for _ in range(times):
+            await bucket.acquire()
+        return time.monotonic() - started
+
+    # A full bucket allows a burst of capacity calls, then one per 1/rate seconds
+    assert asyncio.run(acquire(TokenBucket(rate=20, capacity=5), 5)) < 0.05
+    elapsed = asyncio.run(acquire(TokenBucket(rate=20, capacity=1), 6))
+    assert 0.25 - 0.01 <= elapsed < 0.5
@@ -0,0 +1,25 @@
+import kyc_pipeline
+
+
+def _download(file_name):
+    return f"/spool/{file_name}", f"http://files/{file_name}"
+
+
+def _extract(local_path, file_name):
+    return "ID Proof", f"text of {local_path}"
+
+
+def test_runs_reuse_one_spawned_pool():
+    released = []
+    files = [f"doc{i}.txt" for i in range(6)]
+
+    first = list(kyc_pipeline.run_pipeline(files, _download, _extract, lambda results: None, extract_workers=2, release=released.append))
+    pool = kyc_pipeline._pools[2]
+    second = list(kyc_pipeline.run_pipeline(files, _download, _extract, lambda results: None, extract_workers=2))
+
+    assert kyc_pipeline._pools[2] is pool
+    assert pool._mp_context.get_start_method() == "spawn"
+    assert sorted(result["file_name"] for result in first) == sorted(files)
+    assert all(result["error"] is None for result in first + second)
+    assert {result["extracted_text"] for result in first} == {f"text of /spool/{name}" for name in files}
+    assert sorted(released) == sorted(f"/spool/{name}" for name in files)
@@ -0,0 +1,44 @@
+import os
+import time
+
+import spool
+
+
+def _write(path, size, age):
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+    mtime = time.time() - age
+    os.utime(path, (mtime, mtime))
+
+
+def test_sweep_over_size_keeps_unreleased_and_recent_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(spool, "SPOOL_DIR", str(tmp_path))
+    monkeypatch.setattr(spool, "SPOOL_MAX_BYTES", 100)
+    monkeypatch.setattr(spool, "SPOOL_MIN_AGE", 600)
+    monkeypatch.setattr(spool, "_in_use", {})
+
+    queued = str(tmp_path / "queued.pdf")  # Old, but still waiting for extraction
+    released = str(tmp_path / "released.pdf")
+    recent = str(tmp_path / "recent.pdf")  # Possibly held by another process
+    _write(queued, 100, age=1200)
+    _write(released, 100, age=900)
+    _write(recent, 100, age=10)
+    spool._in_use[queued] = 1
+
+    spool.sweep(force=True)
+    assert os.path.exists(queued)
+    assert not os.path.exists(released)
+    assert os.path.exists(recent)
+
+    spool.release(queued)
+    spool.sweep(force=True)
+    assert not os.path.exists(queued)
+    assert os.path.exists(recent)
+
+
+def test_release_counts_every_spool_url_call(monkeypatch):
+    monkeypatch.setattr(spool, "_in_use", {"a.pdf": 2})
+    spool.release("a.pdf")
+    assert spool._in_use == {"a.pdf": 1}
+    spool.release("a.pdf")
+    assert spool._in_use == {}
@@ -0,0 +1,104 @@
+from types import SimpleNamespace
+
+import pytest
+
+import storage_manifest
+from local_backend import LocalStorage
+from storage_manifest import StorageManifest
+
+FILES = [
+    "alice/ID Proof/pan.pdf",
+    "alice/ID Proof/passport.jpg",
+    "alice/Address Proof/bill.pdf",
+    "alice/Address Proof/2023/lease.pdf",
+    "alice/Address Proof/2023/old/rent.pdf",
+    "bob/ID Proof/licence.png",
+    "carol/Other/.emptyFolder",
+]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(storage_manifest, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+@pytest.fixture
+def bucket():
+    bucket = LocalStorage().from_("kyc-documents")
+    for path in FILES:
+        bucket.upload(path, path.encode("utf-8"))
+    return bucket
+
+
+def paths(entries):
+    return [entry["path"] for entry in entries]
+
+
+def test_lists_every_page_and_nested_folder(bucket, clock):
+    manifest = StorageManifest(lambda: bucket, page_size=1)  # Every level needs several pages
+
+    assert manifest.users() == ["alice", "bob", "carol"]
+    assert paths(manifest.objects()) == sorted(path for path in FILES if not path.endswith(".emptyFolder"))
+    assert manifest.folders("alice") == ["Address Proof", "ID Proof"]
+    assert manifest.folders("carol") == ["Other"]
+    assert paths(manifest.objects(["alice"], ["Address Proof"])) == [
+        "alice/Address Proof/2023/lease.pdf",
+        "alice/Address Proof/2023/old/rent.pdf",
+        "alice/Address Proof/bill.pdf",
+    ]
+
+    [entry] = manifest.objects(["bob"])
+    assert entry["name"] == "licence.png"
+    assert entry["size"] == len(b"bob/ID Proof/licence.png")
+    assert entry["last_modified"]
+
+
+def test_page_boundary(bucket, clock):
+    for i in range(5):
+        bucket.upload(f"dave/ID Proof/scan{i}.pdf", b"x")
+    manifest = StorageManifest(lambda: bucket, page_size=5)  # Exactly one full page, then an empty one
+    assert len(manifest.objects(["dave"])) == 5
+
+
+def test_cached_listing_follows_this_process_uploads_and_deletes(bucket, clock):
+    manifest = StorageManifest(lambda: bucket, ttl=300)
+    manifest.objects(["alice"])
+    manifest.users()
+    calls = manifest.list_calls
+
+    bucket.upload("alice/Payroll Document/slip.pdf", b"slip")
+    manifest.record_upload("alice/Payroll Document/slip.pdf", 4)
+    bucket.remove(["alice/ID Proof/pan.pdf"])
+    manifest.record_delete("alice/ID Proof/pan.pdf")
+    manifest.record_upload("erin/ID Proof/pan.pdf", 3)
+
+    assert "alice/Payroll Document/slip.pdf" in paths(manifest.objects(["alice"]))
+    assert "alice/ID Proof/pan.pdf" not in paths(manifest.objects(["alice"]))
+    assert "Payroll Document" in manifest.folders("alice")
+    assert "erin" in manifest.users()
+    assert manifest.list_calls == calls
+
+
+def test_expired_listing_is_listed_again(bucket, clock):
+    listed = []
+    manifest = StorageManifest(lambda: bucket, ttl=300)
+    manifest.objects(["alice"])
+    clock[0] += 200
+    manifest.objects(["bob"])
+
+    bucket.upload("bob/ID Proof/voter.pdf", b"voter")  # Uploaded by another process
+    list_page = manifest._list_page
+    manifest._list_page = lambda prefix, offset: listed.append(prefix) or list_page(prefix, offset)
+
+    clock[0] += 50
+    assert "bob/ID Proof/voter.pdf" not in paths(manifest.objects(["alice", "bob"]))
+    assert listed == []
+
+    clock[0] += 60  # alice's listing is now 310s old, bob's 110s
+    manifest.objects(["alice", "bob"])
+    assert listed and all(prefix.startswith("alice") for prefix in listed)
+
+    clock[0] += 200
+    assert "bob/ID Proof/voter.pdf" in paths(manifest.objects(["bob"]))
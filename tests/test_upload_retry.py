@@ -0,0 +1,49 @@
+import io
+
+import pytest
+
+import database
+
+
+class Upload(io.BytesIO):
+    """Stands in for Streamlit's UploadedFile."""
+
+    def __init__(self, name, content):
+        super().__init__(content)
+        self.name = name
+        self.size = len(content)
+
+
+@pytest.fixture(params=["single", "resumable"])
+def upload_mode(request, monkeypatch):
+    monkeypatch.setattr(database, "RESUMABLE_UPLOAD_THRESHOLD", 0 if request.param == "resumable" else 1 << 30)
+    return request.param
+
+
+def _upload(name, content):
+    [(_, stored, error)] = database.upload_many_to_supabase([Upload(name, content)], "alice", "ID Proof")
+    return stored, error
+
+
+def test_metadata_save_can_be_retried_after_it_failed(local_client, upload_mode):
+    stored, error = _upload("pan.pdf", b"%PDF first try")
+    assert error is None
+    # The metadata insert failed here, leaving the object with no document row
+
+    stored, error = _upload("pan.pdf", b"%PDF first try")
+    assert error is None
+    assert stored["storage_path"] == "alice/ID Proof/pan.pdf"
+
+    [(doc_id, error)] = database.save_documents_metadata("alice", "ID Proof", [("pan.pdf", stored)])
+    assert error is None
+    assert local_client.storage.from_(database.BUCKET_NAME).files["alice/ID Proof/pan.pdf"][0] == b"%PDF first try"
+
+
+def test_stored_documents_are_never_overwritten(local_client, upload_mode):
+    stored, _ = _upload("pan.pdf", b"%PDF original")
+    database.save_documents_metadata("alice", "ID Proof", [("pan.pdf", stored)])
+
+    stored, error = _upload("pan.pdf", b"%PDF different content, same name")
+    assert stored is None
+    assert error
+    assert local_client.storage.from_(database.BUCKET_NAME).files["alice/ID Proof/pan.pdf"][0] == b"%PDF original"